@@ -18,6 +18,9 @@ class School(models.Model):
     class Meta:
         db_table = 'schools'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='idx_schools_name_id'),
+        ]
     
     def __str__(self):
         return self.name
@@ -37,6 +40,9 @@ class AcademicYear(models.Model):
     class Meta:
         db_table = 'academic_years'
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['-start_date', '-id'], name='idx_academic_years_start_id'),
+        ]
     
     def __str__(self):
         return self.name
@@ -57,6 +63,9 @@ class Subject(models.Model):
         db_table = 'subjects'
         unique_together = ['school', 'code']
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='idx_subjects_name_id'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -79,6 +88,9 @@ class Class(models.Model):
         db_table = 'classes'
         unique_together = ['school', 'code']
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='idx_classes_name_id'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.academic_year.name})"
@@ -99,6 +111,9 @@ class StudentClass(models.Model):
         db_table = 'student_enrollments'
         unique_together = ['student', 'class_obj', 'academic_year']
         ordering = ['-enrollment_date']
+        indexes = [
+            models.Index(fields=['-enrollment_date', '-id'], name='idx_enrollments_date_id'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.class_obj.name}"
@@ -118,6 +133,9 @@ class TeacherSubjectClass(models.Model):
         db_table = 'teacher_subject_classes'
         unique_together = ['teacher', 'subject', 'class_obj', 'academic_year']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='idx_tsc_created_id'),
+        ]
     
     def __str__(self):
         return f"{self.teacher.username} - {self.subject.name} - {self.class_obj.name}"
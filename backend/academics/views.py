@@ -7,14 +7,15 @@ from .serializers import (
     AcademicYearSerializer, SubjectSerializer, ClassSerializer,
     SchoolSerializer, StudentClassSerializer, TeacherSubjectClassSerializer
 )
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class SchoolViewSet(viewsets.ModelViewSet):
+class SchoolViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = School.objects.all()
     serializer_class = SchoolSerializer
 
 
-class AcademicYearViewSet(viewsets.ModelViewSet):
+class AcademicYearViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = AcademicYear.objects.all()
     serializer_class = AcademicYearSerializer
     
@@ -28,21 +29,21 @@ class AcademicYearViewSet(viewsets.ModelViewSet):
         return Response({'error': 'No current academic year set'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
 
 
-class ClassViewSet(viewsets.ModelViewSet):
+class ClassViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Class.objects.all()
     serializer_class = ClassSerializer
 
 
-class StudentClassViewSet(viewsets.ModelViewSet):
+class StudentClassViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = StudentClass.objects.all()
     serializer_class = StudentClassSerializer
 
 
-class TeacherSubjectClassViewSet(viewsets.ModelViewSet):
+class TeacherSubjectClassViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = TeacherSubjectClass.objects.all()
     serializer_class = TeacherSubjectClassSerializer
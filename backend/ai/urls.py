@@ -9,5 +9,7 @@ urlpatterns = [
     path('student-insights/<str:student_id>/', views.student_insights, name='student_insights'),
     path('workload-forecast/', views.workload_forecast, name='workload_forecast'),
     path('assignment-grade-suggest/', views.assignment_grade_suggest, name='assignment_grade_suggest'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('llm-stats/', views.llm_stats, name='llm_stats'),
 ]
 
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from assignments.models import Assignment, Submission
+from assignments import ai_cache, llm
 
 
 @api_view(['GET'])
@@ -102,3 +103,15 @@ def assignment_grade_suggest(request):
     }
     return Response(mock_data, status=status.HTTP_201_CREATED)
 
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    """Hit/miss counters for the AI feedback/grade cache (per process)"""
+    return Response(ai_cache.stats())
+
+
+@api_view(['GET'])
+def llm_stats(request):
+    """OpenAI client metrics: queue wait, rate limiter and circuit breaker state (per process)"""
+    return Response(llm.metrics())
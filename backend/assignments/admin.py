@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Assignment, Submission, Grade
+from .models import Assignment, Submission, Grade, AICacheEntry
 
 
 @admin.register(Assignment)
@@ -25,3 +25,10 @@ class GradeAdmin(admin.ModelAdmin):
     search_fields = ['submission__student__username', 'submission__assignment__title']
     raw_id_fields = ['submission', 'graded_by']
     readonly_fields = ['percentage']
+
+
+@admin.register(AICacheEntry)
+class AICacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'key', 'model', 'expires_at', 'created_at']
+    list_filter = ['kind', 'model']
+    search_fields = ['key']
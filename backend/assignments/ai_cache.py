@@ -0,0 +1,170 @@
+"""
+Content-addressed cache for generated feedback and LLM grades.
+
+Two tiers: an in-process LRU in front of the persistent ai_cache_entries table.
+Keys are a SHA-256 of the full request (model parameters, system prompt and
+user prompt) plus AI_CACHE_VERSION. Because the prompts embed the question
+text, rubric, options and the student's answer, editing a question changes
+its keys and old entries are simply never hit again; bumping
+AI_CACHE_VERSION invalidates everything at once.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from .models import AICacheEntry
+
+
+class _LRU:
+    """Thread-safe LRU with per-entry expiry (monotonic clock)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory = _LRU(settings.AI_CACHE_MAX_ENTRIES)
+_enabled = True
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _count(kind, event):
+    with _stats_lock:
+        counters = _stats.setdefault(kind, {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0})
+        counters[event] += 1
+
+
+def make_key(kind, request):
+    """Hash a request dict (model, messages, sampling params) into a cache key."""
+    payload = json.dumps(
+        {'kind': kind, 'version': settings.AI_CACHE_VERSION, 'request': request},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def set_enabled(enabled):
+    """
+    Switch the cache on or off for this process; while off every lookup misses
+    and nothing is stored. Returns the previous state.
+    """
+    global _enabled
+    previous, _enabled = _enabled, enabled
+    return previous
+
+
+def get(kind, key):
+    """Look a key up in the LRU, then the table. Returns None on a miss."""
+    if not _enabled:
+        return None
+    value = _memory.get(key)
+    if value is not None:
+        _count(kind, 'memory_hits')
+        return value
+
+    try:
+        entry = AICacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).only('value', 'expires_at').first()
+    except DatabaseError as e:
+        # The cache must never break generation; treat an unavailable table as a miss
+        print(f'AI cache lookup failed: {e}')
+        entry = None
+    if entry is not None:
+        remaining = (entry.expires_at - timezone.now()).total_seconds()
+        _memory.set(key, entry.value, max(remaining, 0))
+        _count(kind, 'db_hits')
+        return entry.value
+
+    _count(kind, 'misses')
+    return None
+
+
+def store(kind, key, value, model=''):
+    """Store a value in both tiers for AI_CACHE_TTL seconds."""
+    if not _enabled:
+        return
+    ttl = settings.AI_CACHE_TTL
+    _memory.set(key, value, ttl)
+    try:
+        AICacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'kind': kind,
+                'model': model,
+                'value': value,
+                'expires_at': timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+    except DatabaseError as e:
+        print(f'AI cache store failed: {e}')
+        return
+    _count(kind, 'stores')
+
+
+def get_or_compute(kind, request, compute):
+    """
+    Return the cached value for `request`, or call compute() and cache its result.
+    Exceptions from compute() propagate and nothing is cached, so callers' canned
+    fallback messages never end up in the cache.
+    """
+    key = make_key(kind, request)
+    value = get(kind, key)
+    if value is None:
+        value = compute()
+        store(kind, key, value, model=request.get('model', ''))
+    return value
+
+
+def purge_expired():
+    """Delete expired rows from the persistent tier. Returns the number removed."""
+    deleted, _ = AICacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def clear_memory():
+    _memory.clear()
+
+
+def stats():
+    """Hit/miss counters per kind for this process, plus LRU size."""
+    with _stats_lock:
+        counters = {kind: dict(values) for kind, values in _stats.items()}
+    return {
+        'version': settings.AI_CACHE_VERSION,
+        'enabled': _enabled,
+        'memory_entries': len(_memory),
+        'memory_max_entries': _memory.max_entries,
+        'kinds': counters,
+    }
@@ -5,3 +5,5 @@ class AssignmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assignments'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,298 @@
+"""
+Offline batch grading through the OpenAI Batch API.
+
+Instead of one request per answer, every pending short-answer grade and
+feedback prompt is written to a JSONL file (one /v1/chat/completions request
+per line), submitted as a single batch, and the results are ingested in bulk
+into Grade.ai_suggested_score and Grade.ai_suggested_feedback.
+
+Requests are built with the same helpers as the interactive paths and their
+custom_id is the AI cache key, so identical prompts are sent once, prompts
+already answered interactively are skipped, and batch results land in the
+AI cache where interactive grading and feedback reuse them.
+
+A submission is pending while it has no Grade or its Grade has no
+ai_suggested_score yet. Suggestions are only written onto existing Grades
+(a teacher's grade is never created or changed here); results for ungraded
+submissions stay in the AI cache and are filled in, without new requests,
+by the first ingest after the submission is graded.
+"""
+import json
+import shutil
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from . import ai_cache, llm
+from .models import AICacheEntry, Grade, Submission
+from .services import (
+    GRADING_MODEL, GradingReplyError, build_feedback_request, build_grading_request,
+    build_questions_map, parse_grading_reply, score_answers,
+)
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class OpenAIBatchProvider:
+    """Submits batch files to the OpenAI Batch API on the shared client."""
+
+    name = 'openai'
+
+    def __init__(self, client=None):
+        self.client = client or llm.get_client()
+
+    def submit(self, path):
+        with open(path, 'rb') as handle:
+            uploaded = self.client.files.create(file=handle, purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window='24h',
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(self.client.files.content(file_id).text.splitlines())
+        return [json.loads(line) for line in lines if line.strip()]
+
+
+class LocalBatchProvider:
+    """
+    File-based stand-in for the Batch API, for development and tests.
+    submit() copies the input to <directory>/<batch_id>/input.jsonl; the batch
+    is completed once something writes output.jsonl next to it, in the Batch
+    API output format. An empty `failed` marker file fails the batch.
+    """
+
+    name = 'local'
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.AI_BATCH_DIR)
+
+    def submit(self, path):
+        batch_id = f'batch_local_{uuid.uuid4().hex}'
+        batch_dir = self.directory / batch_id
+        batch_dir.mkdir(parents=True)
+        shutil.copyfile(path, batch_dir / 'input.jsonl')
+        return batch_id
+
+    def status(self, batch_id):
+        batch_dir = self.directory / batch_id
+        if not batch_dir.is_dir():
+            return 'failed'
+        if (batch_dir / 'failed').exists():
+            return 'failed'
+        if (batch_dir / 'output.jsonl').exists():
+            return 'completed'
+        return 'in_progress'
+
+    def results(self, batch_id):
+        output = self.directory / batch_id / 'output.jsonl'
+        with open(output, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+
+PROVIDERS = {
+    'openai': OpenAIBatchProvider,
+    'local': LocalBatchProvider,
+}
+
+
+def get_provider(name=None):
+    name = name or settings.AI_BATCH_PROVIDER
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f'Unknown batch provider: {name}')
+
+
+def _pending_submissions(assignment_ids=None):
+    submissions = (
+        Submission.objects
+        .exclude(status='DRAFT')
+        .filter(is_active=True)
+        .exclude(grade__ai_suggested_score__isnull=False)
+        .select_related('assignment')
+        .only('id', 'answers', 'assignment__id', 'assignment__questions', 'assignment__max_score')
+        .order_by('assignment_id', 'id')
+    )
+    if assignment_ids:
+        submissions = submissions.filter(assignment_id__in=assignment_ids)
+    return submissions
+
+
+def plan_pending(assignment_ids=None):
+    """
+    Build the model requests needed for every pending submission.
+
+    Returns (plan, requests). plan is a list of (submission, mcq_score, items)
+    where items are (questionNumber, kind, cache_key) for each model result the
+    submission needs; requests maps (kind, cache_key) to (request body,
+    question), deduplicated across submissions.
+
+    MCQ and True/False answers are scored locally and only need a feedback
+    request. Short answers need a grading request; their feedback is the
+    grader's reasoning, because feedback that depends on the grade can't be
+    requested in the same batch.
+    """
+    plan = []
+    requests = {}
+    questions_maps = {}
+    for submission in _pending_submissions(assignment_ids).iterator(chunk_size=500):
+        assignment = submission.assignment
+        if assignment.pk not in questions_maps:
+            questions_maps[assignment.pk] = build_questions_map(assignment.questions)
+        questions_map = questions_maps[assignment.pk]
+        answers, mcq_score = score_answers(submission.answers, questions_map)
+        
+        items = []
+        for answer in answers:
+            question = questions_map.get(answer.get('questionNumber'))
+            if not question:
+                continue
+            if question.get('type') == 'short_answer':
+                if not answer.get('textAnswer'):
+                    continue
+                kind = 'grade'
+                body = build_grading_request(question, answer['textAnswer'])
+            else:
+                kind = 'feedback'
+                body = build_feedback_request(question, answer.get('selectedOptions', []), answer['isCorrect'])
+                if body is None:
+                    continue
+            key = ai_cache.make_key(kind, body)
+            requests[(kind, key)] = (body, question)
+            items.append((answer.get('questionNumber'), kind, key))
+        plan.append((submission, mcq_score, items))
+    return plan, requests
+
+
+def _cached_values(keys):
+    """Values already in the persistent AI cache, fetched in one query."""
+    rows = AICacheEntry.objects.filter(key__in=list(keys), expires_at__gt=timezone.now()).values_list('key', 'value')
+    return dict(rows)
+
+
+def write_batch_file(path, assignment_ids=None):
+    """
+    Write the JSONL batch input for all pending submissions.
+    Requests whose result is already cached are left out.
+    Returns the number of request lines written.
+    """
+    _, requests = plan_pending(assignment_ids)
+    cached = _cached_values(key for _, key in requests)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as handle:
+        for (kind, key), (body, _) in requests.items():
+            if key in cached:
+                continue
+            line = {'custom_id': f'{kind}:{key}', 'method': 'POST', 'url': BATCH_ENDPOINT, 'body': body}
+            handle.write(json.dumps(line, ensure_ascii=False) + '\n')
+            written += 1
+    return written
+
+
+def _parse_results(results, requests):
+    """Parse batch output lines. Returns ({(kind, key): value}, failed line count)."""
+    values = {}
+    failed = 0
+    for line in results:
+        kind, _, key = (line.get('custom_id') or '').partition(':')
+        response = line.get('response') or {}
+        if line.get('error') or response.get('status_code') != 200 or (kind, key) not in requests:
+            failed += 1
+            continue
+        try:
+            content = response['body']['choices'][0]['message']['content']
+            if kind == 'grade':
+                values[(kind, key)] = parse_grading_reply(content, requests[(kind, key)][1])
+            else:
+                values[(kind, key)] = content.strip()
+        except (KeyError, IndexError, TypeError, AttributeError, GradingReplyError) as e:
+            print(f"Unreadable batch result {line.get('custom_id')}: {e}")
+            failed += 1
+    return values, failed
+
+
+def ingest_results(results, assignment_ids=None):
+    """
+    Write batch output into the AI cache and Grade suggestions in bulk.
+
+    Submissions whose results are all available (from this batch or the cache)
+    get ai_suggested_score (local MCQ score + graded short answers) and
+    ai_suggested_feedback (one line per question) on their existing Grade.
+    Submissions without a Grade are left alone (counted as ungraded); their
+    results are cached for a later ingest.
+    """
+    plan, requests = plan_pending(assignment_ids)
+    parsed, failed = _parse_results(results, requests)
+    values = {key: value for (_, key), value in parsed.items()}
+    values.update(_cached_values(key for _, key in requests if key not in values))
+    
+    expires_at = timezone.now() + timedelta(seconds=settings.AI_CACHE_TTL)
+    cache_entries = [
+        AICacheEntry(key=key, kind=kind, model=GRADING_MODEL, value=value, expires_at=expires_at)
+        for (kind, key), value in parsed.items()
+    ]
+    
+    grades = Grade.objects.filter(submission_id__in=[submission.id for submission, _, _ in plan])
+    grades_by_submission = {grade.submission_id: grade for grade in grades}
+    now = timezone.now()
+    to_update = []
+    still_pending = ungraded = 0
+    for submission, mcq_score, items in plan:
+        if any(key not in values for _, _, key in items):
+            still_pending += 1
+            continue
+        
+        grade = grades_by_submission.get(submission.id)
+        if grade is None:
+            ungraded += 1
+            continue
+        
+        score = mcq_score
+        lines = []
+        for question_number, kind, key in items:
+            value = values[key]
+            if kind == 'grade':
+                score += value.get('score', 0)
+                lines.append(f"Q{question_number}: {value.get('reasoning', '')}")
+            else:
+                lines.append(f'Q{question_number}: {value}')
+        score = Decimal(str(score)).quantize(Decimal('0.01'))
+        feedback = '\n'.join(lines)
+        
+        grade.ai_suggested_score = score
+        grade.ai_suggested_feedback = feedback
+        # bulk_update() bypasses auto_now
+        grade.updated_at = now
+        to_update.append(grade)
+    
+    with transaction.atomic():
+        AICacheEntry.objects.bulk_create(
+            cache_entries,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['kind', 'model', 'value', 'expires_at', 'updated_at'],
+        )
+        Grade.objects.bulk_update(to_update, ['ai_suggested_score', 'ai_suggested_feedback', 'updated_at'], batch_size=500)
+    
+    return {
+        'results': len(parsed),
+        'failed_results': failed,
+        'updated_grades': len(to_update),
+        'ungraded': ungraded,
+        'still_pending': still_pending,
+    }
@@ -0,0 +1,46 @@
+"""
+Background job handlers for AI grading and feedback (see settings.JOB_HANDLERS).
+Each handler receives the Job and returns a JSON-serializable result.
+"""
+from .models import Assignment, Submission
+from .services import (
+    auto_grade_assignment, grade_assignment_short_answers,
+    generate_submission_feedback, precompute_assignment_feedback
+)
+
+
+def ai_grade_assignment(job):
+    """Auto-grade MCQ/True-False answers, then AI-grade short answers."""
+    assignment = Assignment.objects.get(pk=job.payload['assignment_id'])
+    auto_graded = auto_grade_assignment(assignment)
+    short_answers = grade_assignment_short_answers(
+        assignment,
+        concurrency=job.payload.get('concurrency'),
+        progress=job.set_progress,
+    )
+    return {
+        'assignment_id': assignment.pk,
+        'auto_graded': auto_graded['graded'],
+        'scores': auto_graded['scores'],
+        'short_answers_graded': short_answers['graded'],
+        'short_answers_failed': short_answers['failed'],
+        'short_answer_results': short_answers['submissions'],
+    }
+
+
+def generate_feedback(job):
+    """Per-question feedback for one submission."""
+    submission = Submission.objects.select_related('assignment').get(pk=job.payload['submission_id'])
+    return {
+        'submission_id': submission.pk,
+        'feedback': generate_submission_feedback(submission, progress=job.set_progress),
+    }
+
+
+def precompute_feedback(job):
+    """Precompute MCQ feedback for a newly published assignment."""
+    bank = precompute_assignment_feedback(job.payload['assignment_id'])
+    return {
+        'assignment_id': job.payload['assignment_id'],
+        'patterns': sum(len(entry['patterns']) for entry in bank.values()),
+    }
@@ -0,0 +1,269 @@
+"""
+Shared OpenAI client manager.
+
+Every model call in assignments/services.py goes through chat_completion() or
+chat_completion_async(), which share:
+- one pooled, keep-alive HTTP client per process (per event loop for async),
+- token buckets for requests per minute and tokens per minute,
+- a circuit breaker that fails fast after repeated errors so callers drop to
+  their canned fallback strings instead of piling up on a struggling provider.
+metrics() exposes queue wait time, limiter and breaker state.
+Calls can be recorded to and replayed from disk (see assignments/replay.py).
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+import httpx
+import openai
+from django.conf import settings
+from .replay import Cassette, CassetteMiss
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket refilled continuously at `per_minute`.
+    reserve() deducts immediately (the balance may go negative) and returns how
+    long the caller must wait, so sync and async callers share one bucket.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # A single request larger than the bucket would otherwise wait forever
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.updated
+            return min(self.capacity, self.tokens + elapsed * self.rate)
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after `failure_threshold` consecutive failures.
+    OPEN -> HALF_OPEN after `reset_timeout` seconds; one trial call is let through
+    and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'CLOSED'
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'OPEN' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'HALF_OPEN'
+                self._trial_in_flight = False
+            if self.state == 'CLOSED':
+                return True
+            if self.state == 'HALF_OPEN' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'CLOSED'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give up a half-open trial slot without an outcome (e.g. cancelled call)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'HALF_OPEN' or self.failures >= self.failure_threshold:
+                if self.state != 'OPEN':
+                    self.trips += 1
+                self.state = 'OPEN'
+                self.opened_at = time.monotonic()
+
+
+_client = None
+_client_lock = threading.Lock()
+_request_bucket = TokenBucket(settings.OPENAI_REQUESTS_PER_MINUTE)
+_token_bucket = TokenBucket(settings.OPENAI_TOKENS_PER_MINUTE)
+breaker = CircuitBreaker(settings.OPENAI_BREAKER_FAILURES, settings.OPENAI_BREAKER_RESET_SECONDS)
+_cassette = (
+    Cassette(settings.OPENAI_CASSETTE_DIR, mode=settings.OPENAI_CASSETTE_MODE, latency=settings.OPENAI_CASSETTE_LATENCY)
+    if settings.OPENAI_CASSETTE_MODE else None
+)
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    'requests': 0,
+    'failures': 0,
+    'rejected_by_breaker': 0,
+    'queue_wait_seconds_total': 0.0,
+    'queue_wait_seconds_max': 0.0,
+}
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+        keepalive_expiry=60,
+    )
+
+
+def _client_kwargs():
+    return {
+        'api_key': settings.OPENAI_API_KEY,
+        'base_url': settings.OPENAI_BASE_URL or None,
+        'timeout': settings.OPENAI_TIMEOUT,
+        'max_retries': 0,  # callers decide whether to retry
+    }
+
+
+def get_client():
+    """The process-wide sync client; its connection pool is reused across calls."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    http_client=httpx.Client(limits=_limits(), timeout=settings.OPENAI_TIMEOUT),
+                    **_client_kwargs(),
+                )
+    return _client
+
+
+@asynccontextmanager
+async def async_client():
+    """An AsyncOpenAI client for the current event loop, closed on exit."""
+    client = openai.AsyncOpenAI(
+        http_client=httpx.AsyncClient(limits=_limits(), timeout=settings.OPENAI_TIMEOUT),
+        **_client_kwargs(),
+    )
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+def use_cassette(cassette):
+    """Route model calls through a record/replay Cassette (None to disable). Returns the previous one."""
+    global _cassette
+    previous, _cassette = _cassette, cassette
+    return previous
+
+
+def estimate_tokens(request):
+    """Rough prompt + completion size (~4 characters per token) for the TPM bucket."""
+    prompt_chars = sum(len(message.get('content', '')) for message in request.get('messages', []))
+    return prompt_chars // 4 + request.get('max_tokens', 0)
+
+
+def _admit(request):
+    """Breaker check and rate-limit reservation. Returns seconds to wait before calling."""
+    if not breaker.allow():
+        with _metrics_lock:
+            _metrics['rejected_by_breaker'] += 1
+        raise CircuitOpenError('OpenAI circuit breaker is open')
+    return max(_request_bucket.reserve(1), _token_bucket.reserve(estimate_tokens(request)))
+
+
+def _record_wait(wait):
+    with _metrics_lock:
+        _metrics['requests'] += 1
+        _metrics['queue_wait_seconds_total'] += wait
+        _metrics['queue_wait_seconds_max'] = max(_metrics['queue_wait_seconds_max'], wait)
+
+
+def _record_outcome(error):
+    # 4xx request errors (and replay misses) are our fault, not the provider's: don't trip on them
+    if error is None or isinstance(error, (openai.BadRequestError, openai.NotFoundError, CassetteMiss)):
+        breaker.record_success()
+        return
+    breaker.record_failure()
+    with _metrics_lock:
+        _metrics['failures'] += 1
+
+
+def chat_completion(**request):
+    """Rate-limited, breaker-protected chat completion on the shared sync client."""
+    wait = _admit(request)
+    if wait:
+        time.sleep(wait)
+    _record_wait(wait)
+    try:
+        if _cassette is not None:
+            response = _cassette.create(get_client(), request)
+        else:
+            response = get_client().chat.completions.create(**request)
+    except Exception as e:
+        _record_outcome(e)
+        raise
+    _record_outcome(None)
+    return response
+
+
+async def chat_completion_async(client, **request):
+    """Async counterpart of chat_completion() using an async_client()."""
+    wait = _admit(request)
+    if wait:
+        await asyncio.sleep(wait)
+    _record_wait(wait)
+    try:
+        if _cassette is not None:
+            response = await _cassette.create_async(client, request)
+        else:
+            response = await client.chat.completions.create(**request)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        _record_outcome(e)
+        raise
+    _record_outcome(None)
+    return response
+
+
+def metrics():
+    """Client manager metrics for this process."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    requests = snapshot['requests']
+    snapshot['queue_wait_seconds_avg'] = snapshot['queue_wait_seconds_total'] / requests if requests else 0.0
+    snapshot['breaker'] = {
+        'state': breaker.state,
+        'consecutive_failures': breaker.failures,
+        'trips': breaker.trips,
+    }
+    if _cassette is not None:
+        snapshot['cassette'] = _cassette.stats()
+    snapshot['rate_limits'] = {
+        'requests_per_minute': _request_bucket.capacity,
+        'requests_available': round(_request_bucket.available(), 2),
+        'tokens_per_minute': _token_bucket.capacity,
+        'tokens_available': round(_token_bucket.available(), 2),
+    }
+    return snapshot
@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from assignments.batch import TERMINAL_STATUSES, get_provider, ingest_results, write_batch_file
+
+
+class Command(BaseCommand):
+    help = 'Grade pending submissions offline through a batch API: build JSONL, submit, poll and ingest AI suggestions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignment', type=int, action='append', dest='assignment_ids',
+                            help='Limit to this assignment (repeatable; default: all pending submissions)')
+        parser.add_argument('--provider', choices=['openai', 'local'], default=None,
+                            help='Batch provider (default: AI_BATCH_PROVIDER)')
+        parser.add_argument('--resume', metavar='BATCH_ID', help='Poll and ingest an already submitted batch')
+        parser.add_argument('--no-wait', action='store_true', help='Submit and exit without polling')
+        parser.add_argument('--poll-interval', type=float, default=60.0)
+        parser.add_argument('--timeout', type=float, default=60 * 60 * 24, help='Give up polling after this many seconds')
+
+    def handle(self, *args, **options):
+        try:
+            provider = get_provider(options['provider'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        assignment_ids = options['assignment_ids']
+
+        batch_id = options['resume']
+        if not batch_id:
+            batch_dir = Path(settings.AI_BATCH_DIR)
+            batch_dir.mkdir(parents=True, exist_ok=True)
+            path = batch_dir / f"input-{timezone.now():%Y%m%d-%H%M%S-%f}.jsonl"
+            written = write_batch_file(path, assignment_ids)
+            if not written:
+                # Everything needed is already cached: ingest straight away
+                result = ingest_results([], assignment_ids)
+                self._report(result)
+                return
+            batch_id = provider.submit(path)
+            self.stdout.write(f'Submitted {written} requests from {path} as batch {batch_id} ({provider.name})')
+            if options['no_wait']:
+                self.stdout.write(f'Resume later with: manage.py batch_grade --resume {batch_id}')
+                return
+
+        deadline = time.monotonic() + options['timeout']
+        status = provider.status(batch_id)
+        while status not in TERMINAL_STATUSES:
+            if time.monotonic() > deadline:
+                raise CommandError(f'Batch {batch_id} still {status} after {options["timeout"]:.0f}s; resume with --resume {batch_id}')
+            self.stdout.write(f'Batch {batch_id}: {status}')
+            time.sleep(options['poll_interval'])
+            status = provider.status(batch_id)
+
+        if status != 'completed':
+            raise CommandError(f'Batch {batch_id} ended with status {status}')
+
+        self._report(ingest_results(provider.results(batch_id), assignment_ids))
+
+    def _report(self, result):
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {result['results']} results: {result['updated_grades']} grades updated, "
+            f"{result['ungraded']} ungraded submissions left for later, {result['still_pending']} still pending "
+            f"({result['failed_results']} failed results)"
+        ))
@@ -0,0 +1,142 @@
+import math
+import random
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from assignments import ai_cache, llm
+from assignments.models import Assignment, Submission
+from assignments.replay import MODES, Cassette
+from assignments.services import auto_grade_assignment, generate_submission_feedback, grade_assignment_short_answers
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Rank ceil(p/100 * n); round() would send .5 to the even neighbour
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the grading pipeline (auto-grade, short-answer grading, feedback) per assignment size, '
+        'with model calls recorded to or replayed from disk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_id', type=int, help='Template assignment; its submissions are sampled to build each size')
+        parser.add_argument('--sizes', default='10,50,200', help='Comma-separated submission counts')
+        parser.add_argument('--mode', choices=MODES, default='auto',
+                            help="'record' calls the provider, 'replay' only uses recordings, 'auto' records what is missing")
+        parser.add_argument('--cassette-dir', default=settings.OPENAI_CASSETTE_DIR)
+        parser.add_argument('--latency', type=float, default=None,
+                            help='Synthetic latency per replayed call in ms (default: the recorded latency)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra uniform random latency in ms')
+        parser.add_argument('--concurrency', type=int, default=None, help='Short-answer grading concurrency')
+        parser.add_argument('--with-cache', action='store_true',
+                            help='Keep the AI cache on (entries written during the run are kept)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            template = Assignment.objects.get(pk=options['assignment_id'])
+        except Assignment.DoesNotExist:
+            raise CommandError(f"Assignment {options['assignment_id']} does not exist")
+        answers_pool = list(
+            Submission.objects.filter(assignment=template).exclude(status='DRAFT').values_list('answers', flat=True)
+        )
+        if not answers_pool:
+            raise CommandError(f'Assignment {template.pk} has no submitted answers to sample from')
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+
+        cassette = Cassette(
+            options['cassette_dir'],
+            mode=options['mode'],
+            latency=options['latency'] / 1000 if options['latency'] is not None else None,
+            jitter=options['jitter'] / 1000,
+            seed=options['seed'],
+        )
+        # The services skip the model entirely without a key; replay never sends it
+        api_key = settings.OPENAI_API_KEY or ('replay' if options['mode'] == 'replay' else '')
+
+        with override_settings(OPENAI_API_KEY=api_key):
+            previous_cassette = llm.use_cassette(cassette)
+            cache_was_enabled = ai_cache.set_enabled(options['with_cache'])
+            rng = random.Random(options['seed'])
+            totals = {'recorded': 0, 'replayed': 0, 'misses': 0}
+            try:
+                self.stdout.write(
+                    f"{'size':>6} {'total s':>9} {'subs/s':>8} {'auto ms':>9} {'short s':>8} {'feedback s':>10} "
+                    f"{'sub p50 ms':>10} {'sub p95 ms':>10} {'call p50 ms':>11} {'call p95 ms':>11} {'calls':>6} {'misses':>6}"
+                )
+                for size in sizes:
+                    row = self._run_size(template, answers_pool, size, cassette, rng, options['concurrency'])
+                    self.stdout.write(
+                        f"{size:>6} {row['total']:>9.2f} {size / row['total']:>8.1f} {row['auto'] * 1000:>9.1f} "
+                        f"{row['short']:>8.2f} {row['feedback']:>10.2f} "
+                        f"{percentile(row['submission_seconds'], 50) * 1000:>10.1f} "
+                        f"{percentile(row['submission_seconds'], 95) * 1000:>10.1f} "
+                        f"{percentile(row['call_seconds'], 50) * 1000:>11.1f} "
+                        f"{percentile(row['call_seconds'], 95) * 1000:>11.1f} "
+                        f"{row['calls']:>6} {row['misses']:>6}"
+                    )
+                    for key in totals:
+                        totals[key] += row[key]
+            finally:
+                llm.use_cassette(previous_cassette)
+                ai_cache.set_enabled(cache_was_enabled)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['recorded']} calls recorded, {totals['replayed']} replayed, {totals['misses']} misses "
+            f"(cassettes in {options['cassette_dir']})"
+        ))
+
+    def _run_size(self, template, answers_pool, size, cassette, rng, concurrency):
+        """Grade a synthetic copy of the template with `size` submissions, then roll it back."""
+        cassette.reset_stats()
+        ai_cache.clear_memory()
+        with transaction.atomic():
+            assignment = Assignment.objects.get(pk=template.pk)
+            assignment.pk = None
+            assignment.title = f'{template.title} (benchmark x{size})'
+            assignment.save()
+            Submission.objects.bulk_create([
+                Submission(assignment=assignment, student_name=f'benchmark-{i}', status='SUBMITTED',
+                           answers=rng.choice(answers_pool))
+                for i in range(size)
+            ], batch_size=500)
+
+            started = time.perf_counter()
+            auto_grade_assignment(assignment)
+            auto_done = time.perf_counter()
+            grade_assignment_short_answers(assignment, concurrency=concurrency)
+            short_done = time.perf_counter()
+            submission_seconds = []
+            for submission in Submission.objects.filter(assignment=assignment).select_related('assignment').iterator(chunk_size=500):
+                submission_started = time.perf_counter()
+                generate_submission_feedback(submission)
+                submission_seconds.append(time.perf_counter() - submission_started)
+            finished = time.perf_counter()
+
+            transaction.set_rollback(True)
+
+        stats = cassette.stats()
+        return {
+            'total': finished - started,
+            'auto': auto_done - started,
+            'short': short_done - auto_done,
+            'feedback': finished - short_done,
+            'submission_seconds': submission_seconds,
+            'call_seconds': list(cassette.call_seconds),
+            'calls': stats['calls'],
+            'recorded': stats['recorded'],
+            'replayed': stats['replayed'],
+            'misses': stats['misses'],
+        }
@@ -0,0 +1,76 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from assignments.scoring import score_cohort
+from assignments.services import build_questions_map, score_answers
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized MCQ scorer against the per-answer loop on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=10000)
+        parser.add_argument('--questions', type=int, default=50)
+        parser.add_argument('--options', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n_questions = options['questions']
+        n_options = options['options']
+
+        questions = []
+        for number in range(1, n_questions + 1):
+            question_type = rng.choice(['mcq', 'mcq', 'mcq', 'true_false'])
+            option_count = 2 if question_type == 'true_false' else n_options
+            correct = sorted(rng.sample(range(option_count), rng.choice([1, 1, 1, 2]) if option_count > 2 else 1))
+            questions.append({
+                'questionNumber': number,
+                'type': question_type,
+                'options': [f'Option {i}' for i in range(option_count)],
+                'correctOptions': correct,
+                'marks': rng.randint(1, 5),
+            })
+
+        answers_list = []
+        for _ in range(options['submissions']):
+            answers = []
+            for q in questions:
+                if rng.random() < 0.05:
+                    continue  # unanswered
+                if rng.random() < 0.6:
+                    selected = list(q['correctOptions'])
+                else:
+                    selected = [rng.randrange(len(q['options']))]
+                answers.append({'questionNumber': q['questionNumber'], 'selectedOptions': selected})
+            answers_list.append(answers)
+
+        def run_loop():
+            questions_map = build_questions_map(questions)
+            return [score_answers(answers, questions_map)[1] for answers in answers_list]
+
+        def run_vectorized():
+            return score_cohort(questions, answers_list)[2]
+
+        loop_best, loop_totals = self._best_of(run_loop, options['repeat'])
+        vector_best, vector_totals = self._best_of(run_vectorized, options['repeat'])
+
+        if loop_totals != vector_totals:
+            raise CommandError('Vectorized scores do not match the reference loop')
+
+        self.stdout.write(f"{options['submissions']} submissions x {n_questions} questions (best of {options['repeat']})")
+        self.stdout.write(f'  loop:       {loop_best * 1000:.1f} ms')
+        self.stdout.write(f'  vectorized: {vector_best * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'  speedup:    {loop_best / vector_best:.1f}x, scores identical'))
+
+    @staticmethod
+    def _best_of(func, repeat):
+        best = None
+        result = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,143 @@
+import io
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from academics.models import Class, Subject
+from assignments.models import Assignment
+from assignments.serializers import AssignmentSerializer
+from attendance.models import Attendance
+from attendance.serializers import AttendanceSerializer
+from lms_backend.middleware import BROTLI_QUALITY, brotli
+from lms_backend.parsers import ORJSONParser
+from lms_backend.renderers import ORJSONRenderer
+from users.models import User
+
+
+def best_of(repeat, func):
+    """Fastest of `repeat` runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark JSON rendering/parsing (DRF stdlib json vs orjson) and gzip/brotli compression '
+        'of large assignment and attendance list payloads'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+        parser.add_argument('--from-db', action='store_true',
+                            help='Use the latest rows from the database instead of synthetic ones')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        rng = random.Random(options['seed'])
+        if options['from_db']:
+            payloads = {
+                'assignments': AssignmentSerializer(
+                    Assignment.objects.select_related('teacher', 'class_obj', 'subject')[:rows], many=True
+                ).data,
+                'attendance': AttendanceSerializer(
+                    Attendance.objects.select_related('student', 'class_obj', 'marked_by')[:rows], many=True
+                ).data,
+            }
+        else:
+            payloads = {
+                'assignments': AssignmentSerializer(self._assignments(rows, rng), many=True).data,
+                'attendance': AttendanceSerializer(self._attendance(rows, rng), many=True).data,
+            }
+
+        self.stdout.write(
+            f"{'payload':<12} {'rows':>5} {'bytes':>9} {'json ms':>8} {'orjson ms':>9} {'x':>5} "
+            f"{'parse ms':>8} {'orjson ms':>9} {'x':>5} {'gzip B':>8} {'gzip ms':>7} {'br B':>8} {'br ms':>6} {'same':>5}"
+        )
+        for name, data in payloads.items():
+            page = {'next': None, 'previous': None, 'results': data}
+            stdlib, fast = JSONRenderer(), ORJSONRenderer()
+            body = stdlib.render(page)
+            fast_body = fast.render(page)
+            same = json.loads(body) == json.loads(fast_body)
+
+            render = best_of(repeat, lambda: stdlib.render(page))
+            fast_render = best_of(repeat, lambda: fast.render(page))
+            parse = best_of(repeat, lambda: JSONParser().parse(io.BytesIO(body)))
+            fast_parse = best_of(repeat, lambda: ORJSONParser().parse(io.BytesIO(body)))
+            gzip_size = len(compress_string(fast_body))
+            gzip_time = best_of(repeat, lambda: compress_string(fast_body))
+            if brotli is not None:
+                br_size = str(len(brotli.compress(fast_body, quality=BROTLI_QUALITY)))
+                br_time = f'{best_of(repeat, lambda: brotli.compress(fast_body, quality=BROTLI_QUALITY)) * 1000:.1f}'
+            else:
+                br_size = br_time = '-'
+
+            self.stdout.write(
+                f"{name:<12} {len(data):>5} {len(fast_body):>9} {render * 1000:>8.1f} {fast_render * 1000:>9.1f} "
+                f"{render / fast_render:>5.1f} {parse * 1000:>8.1f} {fast_parse * 1000:>9.1f} {parse / fast_parse:>5.1f} "
+                f"{gzip_size:>8} {gzip_time * 1000:>7.1f} {br_size:>8} {br_time:>6} {'yes' if same else 'NO':>5}"
+            )
+        if brotli is None:
+            self.stdout.write('brotli is not installed: br columns skipped, responses fall back to gzip')
+
+    def _assignments(self, rows, rng):
+        """Unsaved assignments shaped like real ones: 20 questions each."""
+        now = timezone.now()
+        teacher = User(id=1, username='teacher', email='teacher@example.com')
+        class_obj = Class(id=1, name='Grade 5 - A')
+        subject = Subject(id=1, name='Mathematics')
+        questions = [
+            {
+                'questionNumber': number,
+                'type': 'mcq' if number % 2 else 'short_answer',
+                'questionText': f'Question {number}: explain the steps used to solve the problem.',
+                'options': ['Option A', 'Option B', 'Option C', 'Option D'],
+                'correctOptions': [number % 4],
+                'rubric': 'Award full marks for a complete, correct explanation.',
+                'marks': 2,
+            }
+            for number in range(1, 21)
+        ]
+        assignments = []
+        for index in range(rows):
+            assignment = Assignment(
+                id=index + 1, title=f'Assignment {index + 1}', description='Weekly practice. ' * 10,
+                teacher=teacher, class_obj=class_obj, subject=subject,
+                due_date=now + timedelta(days=rng.randint(1, 30)), max_score=Decimal('100.00'),
+                status='PUBLISHED', instructions='Answer every question.', questions=questions,
+                created_at=now, updated_at=now,
+            )
+            assignment.total_submissions = rng.randint(0, 40)
+            assignment.graded_count = rng.randint(0, assignment.total_submissions)
+            assignments.append(assignment)
+        return assignments
+
+    def _attendance(self, rows, rng):
+        """Unsaved attendance rows with coordinates, one class over many days."""
+        now = timezone.now()
+        class_obj = Class(id=1, name='Grade 5 - A')
+        teacher = User(id=1, username='teacher', email='teacher@example.com')
+        students = [User(id=index + 2, username=f'student{index}', email=f'student{index}@example.com') for index in range(40)]
+        statuses = [status for status, _ in Attendance.STATUS_CHOICES]
+        return [
+            Attendance(
+                id=index + 1, student=students[index % len(students)], class_obj=class_obj,
+                date=now.date() - timedelta(days=index // len(students)), status=rng.choice(statuses),
+                marked_by=teacher, marked_at=now,
+                latitude=Decimal(f'{rng.uniform(-90, 90):.6f}'), longitude=Decimal(f'{rng.uniform(-180, 180):.6f}'),
+                remarks='' if index % 5 else 'Arrived after assembly', created_at=now, updated_at=now,
+            )
+            for index in range(rows)
+        ]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from assignments.models import Assignment
+from assignments.services import grade_assignment_short_answers
+
+
+class Command(BaseCommand):
+    help = 'Grade every short answer of an assignment concurrently with OpenAI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_id', type=int)
+        parser.add_argument('--concurrency', type=int, default=None, help='Max in-flight requests (default: AI_GRADING_CONCURRENCY)')
+        parser.add_argument('--max-retries', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            assignment = Assignment.objects.get(pk=options['assignment_id'])
+        except Assignment.DoesNotExist:
+            raise CommandError(f"Assignment {options['assignment_id']} does not exist")
+
+        result = grade_assignment_short_answers(
+            assignment,
+            concurrency=options['concurrency'],
+            max_retries=options['max_retries'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Graded {result['graded']} short answers across {len(result['submissions'])} submissions "
+            f"in {result['elapsed_seconds']:.2f}s ({result['failed']} failed)"
+        ))
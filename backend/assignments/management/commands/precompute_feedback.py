@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from assignments.models import Assignment
+from assignments.services import precompute_assignment_feedback
+
+
+class Command(BaseCommand):
+    help = 'Precompute MCQ/True-False feedback for published assignments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_ids', nargs='*', type=int, help='Defaults to every published assignment')
+
+    def handle(self, *args, **options):
+        assignment_ids = options['assignment_ids'] or list(
+            Assignment.objects.filter(status='PUBLISHED', is_active=True).values_list('id', flat=True)
+        )
+        if not assignment_ids:
+            raise CommandError('No assignments to precompute')
+
+        for assignment_id in assignment_ids:
+            bank = precompute_assignment_feedback(assignment_id)
+            patterns = sum(len(entry['patterns']) for entry in bank.values())
+            self.stdout.write(f'Assignment {assignment_id}: {patterns} feedback patterns stored')
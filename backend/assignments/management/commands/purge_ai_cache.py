@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from assignments import ai_cache
+
+
+class Command(BaseCommand):
+    help = 'Delete expired entries from the persistent AI feedback/grade cache'
+
+    def handle(self, *args, **options):
+        deleted = ai_cache.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired cache entries'))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from assignments.models import Assignment
+from assignments.services import refresh_submission_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized submission/graded counters on assignments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_ids', nargs='*', type=int, help='Default: every assignment')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not settings.ASSIGNMENT_DENORMALIZED_COUNTS:
+            raise CommandError('ASSIGNMENT_DENORMALIZED_COUNTS is off; the counter columns are not used')
+
+        ids = options['assignment_ids'] or list(Assignment.objects.order_by('id').values_list('id', flat=True))
+        updated = 0
+        for start in range(0, len(ids), options['batch_size']):
+            updated += refresh_submission_counters(ids[start:start + options['batch_size']])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed counters on {updated} assignments'))
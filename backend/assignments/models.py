@@ -27,6 +27,14 @@ class Assignment(models.Model):
         default=list,
         help_text="Array of question objects with questionNumber, questionText, options, correctOptions, rubric, marks, type"
     )
+    precomputed_feedback = JSONField(
+        default=dict,
+        blank=True,
+        help_text="Feedback per MCQ/True-False answer pattern, generated when the assignment is published"
+    )
+    # Denormalized counts, maintained when ASSIGNMENT_DENORMALIZED_COUNTS is on
+    submission_counter = models.PositiveIntegerField(default=0)
+    graded_counter = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,6 +42,9 @@ class Assignment(models.Model):
     class Meta:
         db_table = 'assignments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='idx_assignments_created_id'),
+        ]
     
     def __str__(self):
         return self.title
@@ -79,6 +90,12 @@ class Submission(models.Model):
     class Meta:
         db_table = 'submissions'
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['assignment', 'status'], name='idx_submissions_asgn_status'),
+            # idx_submissions_submitted_id (submitted_at DESC NULLS LAST, id DESC) for
+            # cursor pagination is only in supabase_migration_complete.sql: SQLite
+            # can't index NULLS LAST
+        ]
     
     def __str__(self):
         student_identifier = self.student.username if self.student else self.student_name
@@ -102,6 +119,9 @@ class Grade(models.Model):
     class Meta:
         db_table = 'grades'
         ordering = ['-graded_at']
+        indexes = [
+            models.Index(fields=['-graded_at', '-id'], name='idx_grades_graded_id'),
+        ]
     
     @property
     def percentage(self):
@@ -112,3 +132,29 @@ class Grade(models.Model):
     def __str__(self):
         return f"{self.submission} - {self.score}/{self.max_score}"
 
+
+
+class AICacheEntry(models.Model):
+    """
+    Persistent tier of the AI response cache (see assignments/ai_cache.py).
+    key is a SHA-256 of the prompt inputs and model parameters.
+    """
+    KIND_CHOICES = [
+        ('feedback', 'Feedback'),
+        ('grade', 'Grade'),
+    ]
+    
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    model = models.CharField(max_length=100, blank=True, default='')
+    value = JSONField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ai_cache_entries'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.kind} - {self.key[:12]}"
@@ -0,0 +1,23 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept `Accept: text/event-stream` (EventSource).
+    Successful responses are StreamingHttpResponses built by the view; anything
+    DRF renders itself (404s, permission errors) goes out as an `error` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return sse_event('error', data).encode(self.charset)
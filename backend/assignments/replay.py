@@ -0,0 +1,143 @@
+"""
+Record/replay of OpenAI chat completions for offline benchmarking.
+
+A Cassette sits between assignments/llm.py and the HTTP client. In `record`
+mode every request goes to the provider and the request/response pair is
+written to <directory>/<sha256 of request>.json. In `replay` mode responses are
+served from disk after a synthetic delay, so the grading pipeline can be
+benchmarked without network access or spend. `auto` replays what is on disk
+and records the rest.
+
+Enable it for a whole process with OPENAI_CASSETTE_MODE / OPENAI_CASSETTE_DIR,
+or per run with llm.use_cassette() (see the benchmark_grading command).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from openai.types.chat import ChatCompletion
+
+MODES = ('record', 'replay', 'auto')
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """
+    latency: seconds to wait before returning a replayed response, or None to
+    reuse the latency measured when it was recorded. jitter adds a uniform
+    random 0..jitter seconds on top.
+    """
+
+    def __init__(self, directory, mode='replay', latency=None, jitter=0.0, seed=None):
+        if mode not in MODES:
+            raise ValueError(f'Unknown cassette mode: {mode}')
+        self.directory = Path(directory)
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.recorded = 0
+            self.replayed = 0
+            self.misses = 0
+            self.call_seconds = []
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'calls': self.recorded + self.replayed,
+                'recorded': self.recorded,
+                'replayed': self.replayed,
+                'misses': self.misses,
+            }
+
+    @staticmethod
+    def key(request):
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, request):
+        return self.directory / f'{self.key(request)}.json'
+
+    def _load(self, request):
+        """Return (response, recorded latency) or None when not on disk."""
+        if self.mode == 'record':
+            return None
+        try:
+            with open(self._path(request), encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except FileNotFoundError:
+            if self.mode == 'replay':
+                with self._lock:
+                    self.misses += 1
+                raise CassetteMiss(f'No recording for request {self.key(request)[:12]}')
+            return None
+        return ChatCompletion.model_validate(entry['response']), entry.get('elapsed_seconds', 0.0)
+
+    def _delay(self, recorded_latency):
+        base = recorded_latency if self.latency is None else self.latency
+        with self._lock:
+            return base + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _save(self, request, response, elapsed):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'request': request,
+            'response': response.model_dump(mode='json'),
+            'elapsed_seconds': round(elapsed, 6),
+        }
+        # Write-then-rename so concurrent recorders never leave a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            json.dump(entry, handle, ensure_ascii=False)
+        os.replace(tmp, self._path(request))
+
+    def _count(self, counter, elapsed):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.call_seconds.append(elapsed)
+
+    def create(self, client, request):
+        """Replay or record client.chat.completions.create(**request)."""
+        started = time.perf_counter()
+        replayed = self._load(request)
+        if replayed is not None:
+            response, recorded_latency = replayed
+            time.sleep(self._delay(recorded_latency))
+            self._count('replayed', time.perf_counter() - started)
+            return response
+
+        response = client.chat.completions.create(**request)
+        elapsed = time.perf_counter() - started
+        self._save(request, response, elapsed)
+        self._count('recorded', elapsed)
+        return response
+
+    async def create_async(self, client, request):
+        """Async counterpart of create() for an AsyncOpenAI client."""
+        started = time.perf_counter()
+        replayed = self._load(request)
+        if replayed is not None:
+            response, recorded_latency = replayed
+            await asyncio.sleep(self._delay(recorded_latency))
+            self._count('replayed', time.perf_counter() - started)
+            return response
+
+        response = await client.chat.completions.create(**request)
+        elapsed = time.perf_counter() - started
+        self._save(request, response, elapsed)
+        self._count('recorded', elapsed)
+        return response
@@ -0,0 +1,113 @@
+"""
+Vectorized MCQ / True-False scoring using NumPy bitmasks.
+
+Each question's correctOptions and each answer's selectedOptions are packed
+into an integer bitmask, so "selected set == correct set" becomes a single
+integer comparison over a (submissions x questions) matrix.
+"""
+import numpy as np
+from .services import build_questions_map, score_answers
+
+# Option indices must fit in a signed 64-bit mask
+MAX_OPTION_INDEX = 62
+
+
+def option_mask(options):
+    """
+    Pack a list of option indices into a bitmask.
+    Returns None when an option can't be represented (not an int or out of range),
+    in which case callers fall back to set comparison.
+    """
+    mask = 0
+    for option in options or []:
+        if not isinstance(option, int) or option < 0 or option > MAX_OPTION_INDEX:
+            return None
+        mask |= 1 << option
+    return mask
+
+
+def score_cohort(questions, answers_list):
+    """
+    Score MCQ and True/False answers for a whole cohort with a few NumPy operations.
+
+    Returns (question_numbers, correct, totals) where correct is a boolean
+    (submissions x questions) matrix aligned with question_numbers, and totals
+    matches score_answers() exactly for every submission.
+    """
+    questions_map = build_questions_map(questions)
+    question_numbers = [
+        number for number, q in questions_map.items()
+        if q.get('type', 'mcq') != 'short_answer'
+    ]
+    columns = {number: index for index, number in enumerate(question_numbers)}
+
+    marks_list = [questions_map[number].get('marks', 0) for number in question_numbers]
+    key_masks = [option_mask(questions_map[number].get('correctOptions', [])) for number in question_numbers]
+    integer_marks = all(isinstance(m, int) for m in marks_list)
+
+    n_rows, n_cols = len(answers_list), len(question_numbers)
+    row_index, col_index, masks = [], [], []
+    answer_order = []
+    fallback_rows = []
+    mask_cache = {}
+
+    for row, answers in enumerate(answers_list):
+        order = []
+        seen = set()
+        for answer in answers or []:
+            col = columns.get(answer.get('questionNumber'))
+            if col is None:
+                continue
+            options = answer.get('selectedOptions', [])
+            try:
+                cache_key = tuple(options)
+                mask = mask_cache[cache_key]
+            except KeyError:
+                mask = mask_cache[cache_key] = option_mask(options)
+            except TypeError:
+                mask = None
+            if mask is None or key_masks[col] is None or col in seen:
+                # Unpackable options or a repeated question: score this row the slow way
+                fallback_rows.append(row)
+                break
+            seen.add(col)
+            order.append(col)
+            masks.append(mask)
+        else:
+            row_index.extend([row] * len(order))
+            col_index.extend(order)
+            answer_order.append(order)
+            continue
+        del masks[len(masks) - len(order):]
+        answer_order.append([])
+
+    selected = np.zeros((n_rows, n_cols), dtype=np.int64)
+    answered = np.zeros((n_rows, n_cols), dtype=bool)
+    selected[row_index, col_index] = masks
+    answered[row_index, col_index] = True
+
+    keys = np.array([mask if mask is not None else -1 for mask in key_masks], dtype=np.int64)
+    correct = answered & (selected == keys)
+
+    if integer_marks:
+        totals = (correct.astype(np.int64) @ np.array(marks_list, dtype=np.int64)).tolist()
+    else:
+        # Sum in answer order so float totals are bit-for-bit identical to the loop
+        totals = []
+        for row, order in enumerate(answer_order):
+            total = 0
+            for col in order:
+                if correct[row, col]:
+                    total += marks_list[col]
+            totals.append(total)
+
+    for row in fallback_rows:
+        updated_answers, total = score_answers(answers_list[row], questions_map)
+        correct[row, :] = False
+        for answer in updated_answers:
+            col = columns.get(answer.get('questionNumber'))
+            if col is not None and answer.get('isCorrect'):
+                correct[row, col] = True
+        totals[row] = total
+
+    return question_numbers, correct, totals
@@ -56,14 +56,15 @@ class SubmissionSerializer(serializers.ModelSerializer):
         model = Submission
         fields = [
             'id', 'assignment', 'assignment_title', 'student', 'student_username',
-            'student_email', 'submission_text', 'status', 'submitted_at',
-            'is_active', 'created_at', 'updated_at', 'grade'
+            'student_email', 'student_name', 'submission_text', 'answers', 'status',
+            'submitted_at', 'is_active', 'created_at', 'updated_at', 'grade'
         ]
-        read_only_fields = ['id', 'submitted_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'student_name', 'answers', 'submitted_at', 'created_at', 'updated_at']
     
     def get_grade(self, obj):
         if hasattr(obj, 'grade'):
-            return GradeSerializer(obj.grade).data
+            # Without submission_details: the submission is already being serialized
+            return SubmissionGradeSerializer(obj.grade).data
         return None
 
 
@@ -75,16 +76,15 @@ class SubmissionCreateSerializer(serializers.ModelSerializer):
         fields = ['assignment', 'student', 'submission_text', 'status']
 
 
-class GradeSerializer(serializers.ModelSerializer):
-    """Serializer for Grade matching API structure"""
-    submission_details = SubmissionSerializer(source='submission', read_only=True)
+class SubmissionGradeSerializer(serializers.ModelSerializer):
+    """Grade as embedded in a submission (no nested submission)"""
     graded_by_username = serializers.CharField(source='graded_by.username', read_only=True, allow_null=True)
     percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
     
     class Meta:
         model = Grade
         fields = [
-            'id', 'submission', 'submission_details', 'score', 'max_score',
+            'id', 'submission', 'score', 'max_score',
             'percentage', 'feedback', 'graded_by', 'graded_by_username',
             'graded_at', 'ai_suggested_score', 'ai_suggested_feedback',
             'is_active', 'created_at', 'updated_at'
@@ -92,6 +92,19 @@ class GradeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'graded_at', 'created_at', 'updated_at', 'percentage']
 
 
+class GradeSerializer(SubmissionGradeSerializer):
+    """Serializer for Grade matching API structure"""
+    submission_details = SubmissionSerializer(source='submission', read_only=True)
+    
+    class Meta(SubmissionGradeSerializer.Meta):
+        fields = [
+            'id', 'submission', 'submission_details', 'score', 'max_score',
+            'percentage', 'feedback', 'graded_by', 'graded_by_username',
+            'graded_at', 'ai_suggested_score', 'ai_suggested_feedback',
+            'is_active', 'created_at', 'updated_at'
+        ]
+
+
 class GradeCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating Grade"""
     
@@ -1,29 +1,39 @@
 """
 Services for assignment grading and AI feedback
 """
+import asyncio
+import hashlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import openai
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from .models import Submission
+from .models import Assignment, Submission
+from . import ai_cache, llm
 from decimal import Decimal
 
 
-def auto_grade_submission(submission):
+def build_questions_map(questions):
+    """Index an assignment's JSONB questions by questionNumber."""
+    return {q.get('questionNumber'): q for q in (questions or []) if isinstance(q, dict)}
+
+
+def score_answers(answers, questions_map):
     """
-    Auto-grade a submission by comparing answers with answer keys.
-    Works with JSONB questions and answers structure.
+    Score a list of answers against a prebuilt questions map.
+    Returns (updated_answers, total_score). MCQ and True/False answers are
+    scored here; short answers are marked as not graded (AI grading is separate).
     """
-    assignment = submission.assignment
-    questions = assignment.questions or []
-    answers = submission.answers or []
-    
     total_score = 0
     updated_answers = []
     
-    # Create a map of questions by questionNumber
-    questions_map = {q.get('questionNumber'): q for q in questions if isinstance(q, dict)}
-    
-    for answer in answers:
+    for answer in answers or []:
         question_number = answer.get('questionNumber')
         question = questions_map.get(question_number)
         
@@ -62,6 +72,61 @@ def auto_grade_submission(submission):
         
         total_score += score
     
+    return updated_answers, total_score
+
+
+def submission_count_annotations():
+    """
+    total_submissions / graded_count annotations for an Assignment queryset,
+    computed with conditional aggregates in the same query.
+    """
+    return {
+        'total_submissions': Count('submissions'),
+        'graded_count': Count('submissions', filter=Q(submissions__status='GRADED')),
+    }
+
+
+def refresh_submission_counters(assignment_ids):
+    """
+    Recompute Assignment.submission_counter / graded_counter for the given
+    assignments with a single UPDATE (no-op unless ASSIGNMENT_DENORMALIZED_COUNTS).
+    Recounting instead of incrementing keeps the columns right after bulk
+    writes and status changes that bypass signals.
+    """
+    if not settings.ASSIGNMENT_DENORMALIZED_COUNTS:
+        return 0
+    assignment_ids = [pk for pk in set(assignment_ids) if pk is not None]
+    if not assignment_ids:
+        return 0
+    
+    def count(**filters):
+        counted = (
+            Submission.objects
+            .filter(assignment_id=OuterRef('pk'), **filters)
+            .order_by()
+            .values('assignment_id')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        return Coalesce(Subquery(counted), 0)
+    
+    return Assignment.objects.filter(pk__in=assignment_ids).update(
+        submission_counter=count(),
+        graded_counter=count(status='GRADED'),
+    )
+
+
+def auto_grade_submission(submission):
+    """
+    Auto-grade a submission by comparing answers with answer keys.
+    Works with JSONB questions and answers structure.
+    """
+    assignment = submission.assignment
+    
+    # Create a map of questions by questionNumber
+    questions_map = build_questions_map(assignment.questions)
+    updated_answers, total_score = score_answers(submission.answers, questions_map)
+    
     # Update submission
     submission.answers = updated_answers
     submission.ai_score = total_score
@@ -72,19 +137,94 @@ def auto_grade_submission(submission):
     return total_score
 
 
-async def grade_short_answer_async(question, student_answer):
+# Submissions auto_grade_assignment scores: handed in, not yet finalized by a teacher
+AUTO_GRADE_STATUSES = ('SUBMITTED', 'LATE')
+
+
+def auto_grade_assignment(assignment, chunk_size=500):
     """
-    Grade a short answer question using OpenAI.
-    Returns dict with isCorrect, score, and reasoning.
+    Auto-grade every submitted (SUBMITTED or LATE) submission of an
+    assignment in one pass. Drafts and GRADED submissions are left alone,
+    and statuses are not changed.
+    The answer key is loaded once, submissions are streamed with .iterator()
+    and results are written back with chunked bulk_update instead of one
+    save() per row. Returns per-submission scores and timing stats.
     """
-    if not settings.OPENAI_API_KEY:
-        return {
-            'isCorrect': False,
-            'score': 0,
-            'reasoning': 'AI grading unavailable'
-        }
+    started = time.perf_counter()
+    questions_map = build_questions_map(assignment.questions)
+    
+    submissions = (
+        Submission.objects
+        .filter(assignment_id=assignment.pk, status__in=AUTO_GRADE_STATUSES)
+        .only('id', 'answers', 'updated_at')
+        .order_by('id')
+    )
+    
+    scores = {}
+    batch = []
+    scoring_seconds = 0.0
+    write_seconds = 0.0
     
-    prompt = f"""You are a teacher grading a short answer question. Your task is to evaluate the student's response and determine if it demonstrates understanding of the key concepts.
+    def flush():
+        nonlocal write_seconds
+        write_started = time.perf_counter()
+        Submission.objects.bulk_update(batch, ['answers', 'updated_at'])
+        write_seconds += time.perf_counter() - write_started
+        batch.clear()
+    
+    now = timezone.now()
+    for submission in submissions.iterator(chunk_size=chunk_size):
+        score_started = time.perf_counter()
+        submission.answers, total_score = score_answers(submission.answers, questions_map)
+        # bulk_update() bypasses auto_now
+        submission.updated_at = now
+        scoring_seconds += time.perf_counter() - score_started
+        
+        scores[submission.id] = total_score
+        batch.append(submission)
+        if len(batch) >= chunk_size:
+            flush()
+    
+    if batch:
+        flush()
+    
+    total_seconds = time.perf_counter() - started
+    return {
+        'assignment_id': assignment.pk,
+        'graded': len(scores),
+        'scores': scores,
+        'timing': {
+            'scoring_seconds': round(scoring_seconds, 6),
+            'write_seconds': round(write_seconds, 6),
+            'total_seconds': round(total_seconds, 6),
+            'submissions_per_second': round(len(scores) / total_seconds, 2) if total_seconds > 0 else None,
+        },
+    }
+
+
+GRADING_MODEL = 'gpt-4o-mini'
+GRADING_ERROR_REASONING = 'Error in automated grading'
+GRADING_UNAVAILABLE_REASONING = 'AI grading unavailable'
+# Fallback results that must never overwrite a stored grade
+GRADING_FALLBACK_REASONINGS = (GRADING_ERROR_REASONING, GRADING_UNAVAILABLE_REASONING)
+GRADING_SYSTEM_PROMPT = 'You are an experienced teacher grading student responses. Be fair, consistent, and focus on whether the student demonstrates understanding of the key concepts.'
+
+# Errors worth retrying: throttling, timeouts, dropped connections and 5xx
+RETRYABLE_OPENAI_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class GradingReplyError(ValueError):
+    """Raised when the model's grading reply is not the JSON object we asked for."""
+
+
+def build_short_answer_prompt(question, student_answer):
+    """Build the user prompt for grading a short answer question."""
+    return f"""You are a teacher grading a short answer question. Your task is to evaluate the student's response and determine if it demonstrates understanding of the key concepts.
 
 Question: {question.get('questionText', '')}
 Maximum Marks: {question.get('marks', 0)}
@@ -102,53 +242,198 @@ Respond in JSON format only:
 
 Be fair but strict. Give full marks only if the answer demonstrates clear understanding of all key concepts. Give partial marks if some concepts are covered but not all. Give 0 if the answer is incorrect or doesn't address the question."""
 
+
+def build_grading_request(question, student_answer):
+    """The chat completion request used to grade a short answer."""
+    return {
+        'model': GRADING_MODEL,
+        'messages': [
+            {
+                'role': 'system',
+                'content': GRADING_SYSTEM_PROMPT,
+            },
+            {
+                'role': 'user',
+                'content': build_short_answer_prompt(question, student_answer),
+            },
+        ],
+        'response_format': {'type': 'json_object'},
+        'temperature': 0.3,
+        'max_tokens': 200,
+    }
+
+
+def parse_grading_reply(content, question):
+    """
+    Strictly parse a grading reply. Only a JSON object with a boolean isCorrect
+    and a numeric score is accepted; the score is clamped to the question's marks.
+    """
     try:
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        response = client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=[
-                {
-                    'role': 'system',
-                    'content': 'You are an experienced teacher grading student responses. Be fair, consistent, and focus on whether the student demonstrates understanding of the key concepts.',
-                },
-                {
-                    'role': 'user',
-                    'content': prompt,
-                },
-            ],
-            response_format={'type': 'json_object'},
-            temperature=0.3,
-            max_tokens=200,
-        )
-        
-        result = eval(response.choices[0].message.content) if isinstance(response.choices[0].message.content, str) else response.choices[0].message.content
-        
+        result = json.loads(content)
+    except (TypeError, ValueError) as e:
+        raise GradingReplyError(f'Reply is not valid JSON: {e}')
+    
+    if not isinstance(result, dict):
+        raise GradingReplyError('Reply is not a JSON object')
+    
+    is_correct = result.get('isCorrect', False)
+    score = result.get('score', 0)
+    reasoning = result.get('reasoning', '')
+    if not isinstance(is_correct, bool):
+        raise GradingReplyError('isCorrect must be a boolean')
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise GradingReplyError('score must be a number')
+    if not isinstance(reasoning, str):
+        raise GradingReplyError('reasoning must be a string')
+    
+    return {
+        'isCorrect': is_correct,
+        'score': min(max(0, score), question.get('marks', 0)),
+        'reasoning': reasoning,
+    }
+
+
+async def grade_short_answer_async(question, student_answer, client=None, max_retries=3, backoff_base=0.5):
+    """
+    Grade a short answer question using OpenAI.
+    Returns dict with isCorrect, score, and reasoning.
+    Transient API errors and malformed replies are retried with exponential backoff.
+    """
+    if not settings.OPENAI_API_KEY:
         return {
-            'isCorrect': result.get('isCorrect', False),
-            'score': min(max(0, result.get('score', 0)), question.get('marks', 0)),
-            'reasoning': result.get('reasoning', ''),
+            'isCorrect': False,
+            'score': 0,
+            'reasoning': GRADING_UNAVAILABLE_REASONING
         }
+    
+    if client is None:
+        async with llm.async_client() as client:
+            return await grade_short_answer_async(question, student_answer, client, max_retries, backoff_base)
+    
+    request = build_grading_request(question, student_answer)
+    cache_key = ai_cache.make_key('grade', request)
+    try:
+        # Inside the try: a cache/DB error fails this answer, not the whole gather()
+        cached = await sync_to_async(ai_cache.get)('grade', cache_key)
+        if cached is not None:
+            return cached
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = await llm.chat_completion_async(client, **request)
+                result = parse_grading_reply(response.choices[0].message.content, question)
+                await sync_to_async(ai_cache.store)('grade', cache_key, result, model=GRADING_MODEL)
+                return result
+            except (GradingReplyError, *RETRYABLE_OPENAI_ERRORS):
+                if attempt == max_retries:
+                    raise
+                delay = backoff_base * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
     except Exception as e:
         print(f'Error grading short answer with LLM: {e}')
         return {
             'isCorrect': False,
             'score': 0,
-            'reasoning': 'Error in automated grading',
+            'reasoning': GRADING_ERROR_REASONING,
         }
 
 
-def generate_encouraging_feedback(question, student_selected, is_correct, student_text_answer=None):
+async def _grade_short_answer_jobs(jobs, concurrency, max_retries, progress=None):
+    """Run grading jobs concurrently with at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+    report = sync_to_async(progress) if progress else None
+    
+    async def run(question, student_answer):
+        nonlocal done
+        async with semaphore:
+            result = await grade_short_answer_async(question, student_answer, client=client, max_retries=max_retries)
+        done += 1
+        if report:
+            await report(done, len(jobs))
+        return result
+    
+    async with llm.async_client() as client:
+        return await asyncio.gather(*(run(question, text) for _, _, question, text in jobs))
+
+
+def grade_assignment_short_answers(assignment, concurrency=None, max_retries=3, chunk_size=500, progress=None):
     """
-    Generate encouraging, growth-oriented feedback for a student's answer using OpenAI.
-    Works with JSONB question structure.
+    Grade every short answer across all submissions of an assignment.
+    Requests are fanned out concurrently (capped by AI_GRADING_CONCURRENCY),
+    and updated answers are written back with chunked bulk_update. Answers
+    whose grading failed are reported in 'failed' and left unchanged.
+    progress(done, total) is called as each answer is graded.
     """
-    if not settings.OPENAI_API_KEY:
-        if is_correct:
-            return 'Great job! You got this question correct. Keep up the excellent work!'
-        else:
-            return 'This question needs another look. Review the concepts and try again—you\'ve got this!'
+    started = time.perf_counter()
+    concurrency = concurrency or settings.AI_GRADING_CONCURRENCY
+    questions_map = build_questions_map(assignment.questions)
+    short_answer_numbers = {
+        number for number, q in questions_map.items() if q.get('type') == 'short_answer'
+    }
+    
+    submissions = list(
+        Submission.objects
+        .filter(assignment_id=assignment.pk)
+        .only('id', 'answers', 'updated_at')
+        .order_by('id')
+    )
+    
+    # (submission, answer index, question, student answer) per short answer
+    jobs = []
+    for submission in submissions:
+        for index, answer in enumerate(submission.answers or []):
+            number = answer.get('questionNumber')
+            if number in short_answer_numbers:
+                jobs.append((submission, index, questions_map[number], answer.get('textAnswer', '')))
     
+    results = asyncio.run(_grade_short_answer_jobs(jobs, concurrency, max_retries, progress)) if jobs else []
+    
+    changed = {}
+    scores = {}
+    failed = 0
+    for (submission, index, _, _), result in zip(jobs, results):
+        scores.setdefault(submission.id, []).append({
+            'questionNumber': submission.answers[index].get('questionNumber'),
+            **result,
+        })
+        if result.get('reasoning') in GRADING_FALLBACK_REASONINGS:
+            # Keep whatever the answer held before (e.g. an earlier good grade)
+            failed += 1
+            continue
+        submission.answers[index] = {**submission.answers[index], **result}
+        changed[submission.id] = submission
+    
+    now = timezone.now()
+    for submission in changed.values():
+        # bulk_update() bypasses auto_now
+        submission.updated_at = now
+    Submission.objects.bulk_update(list(changed.values()), ['answers', 'updated_at'], batch_size=chunk_size)
+    
+    return {
+        'assignment_id': assignment.pk,
+        'graded': len(results),
+        'failed': failed,
+        'submissions': scores,
+        'elapsed_seconds': round(time.perf_counter() - started, 6),
+    }
+
+
+FEEDBACK_FALLBACK_CORRECT = 'Great job! You got this question correct. Keep up the excellent work!'
+FEEDBACK_FALLBACK_INCORRECT = 'This question needs another look. Review the concepts and try again—you\'ve got this!'
+FEEDBACK_SYSTEM_PROMPT = 'You are a supportive, encouraging teacher. Always use positive, growth-oriented language. Never discourage students. Focus on what they can learn and improve.'
+
+
+FEEDBACK_NO_ANSWER = 'Please provide an answer to this question. Take your time to think through the key concepts.'
+FEEDBACK_UNAVAILABLE = 'Feedback unavailable for this question type.'
+
+
+def build_feedback_request(question, student_selected, is_correct, student_text_answer=None):
+    """
+    The chat completion request for a feedback message.
+    Returns None when the answer gets a fixed message instead of a model call
+    (an empty short answer, or an MCQ question without options).
+    """
     question_type = question.get('type', 'mcq')
     question_text = question.get('questionText', '')
     options = question.get('options', [])
@@ -158,7 +443,7 @@ def generate_encouraging_feedback(question, student_selected, is_correct, studen
     # Handle short answer questions
     if question_type == 'short_answer':
         if not student_text_answer:
-            return 'Please provide an answer to this question. Take your time to think through the key concepts.'
+            return None
         
         prompt = f"""You are a supportive and encouraging teacher providing feedback to a student.
 
@@ -168,42 +453,15 @@ Student's Answer: {student_text_answer}
 Student's Score: {'Full marks' if is_correct else 'Partial or no marks'}
 
 Provide constructive, encouraging feedback (2-3 sentences). If the answer is correct, celebrate their understanding. If incorrect or partially correct, gently guide them toward the key concepts without discouraging them. Be warm and supportive."""
-
-        try:
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            response = client.chat.completions.create(
-                model='gpt-4o-mini',
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'You are a supportive, encouraging teacher. Always use positive, growth-oriented language. Never discourage students. Focus on what they can learn and improve.',
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    },
-                ],
-                max_tokens=200,
-                temperature=0.7,
-            )
-            
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f'Error generating feedback for short answer: {e}')
-            if is_correct:
-                return 'Great job! You demonstrated good understanding of the key concepts. Keep up the excellent work!'
-            else:
-                return 'This question needs another look. Review the key concepts mentioned in the rubric and try to explain them in your own words. You\'ve got this!'
+        max_tokens = 200
     
     # Handle MCQ and True/False questions
-    if not options or not isinstance(options, list):
-        return 'Feedback unavailable for this question type.'
-    
-    student_answers = [options[i] for i in student_selected if i < len(options)]
-    correct_answers = [options[i] for i in correct_options if i < len(options)]
+    elif not options or not isinstance(options, list):
+        return None
     
-    if is_correct:
+    elif is_correct:
+        student_answers = [options[i] for i in student_selected if i < len(options)]
+        correct_answers = [options[i] for i in correct_options if i < len(options)]
         prompt = f"""You are a supportive and encouraging teacher providing feedback to a student.
 
 Question: {question_text}
@@ -213,32 +471,12 @@ Student's Answer: {', '.join(student_answers)}
 Rubric/Context: {rubric}
 
 The student got this question CORRECT. Provide brief, positive reinforcement (1-2 sentences). Be warm and encouraging."""
-
-        try:
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            response = client.chat.completions.create(
-                model='gpt-4o-mini',
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'You are a supportive, encouraging teacher. Always use positive, growth-oriented language. Never discourage students. Focus on what they can learn and improve.',
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    },
-                ],
-                max_tokens=150,
-                temperature=0.7,
-            )
-            
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f'Error generating feedback for correct answer: {e}')
-            return 'Great job! You got this question correct. Keep up the excellent work!'
+        max_tokens = 150
+    
     else:
         # Handle incorrect answers
+        student_answers = [options[i] for i in student_selected if i < len(options)]
+        correct_answers = [options[i] for i in correct_options if i < len(options)]
         prompt = f"""You are a supportive and encouraging teacher providing feedback to a student.
 
 Question: {question_text}
@@ -255,28 +493,231 @@ The student got this question INCORRECT. Provide encouraging, growth-oriented fe
 - Focus on learning and improvement
 
 Example tone: "You were on the right track! Consider focusing on [specific aspect]. Next time, try [helpful tip]." """
+        max_tokens = 200
+    
+    return {
+        'model': GRADING_MODEL,
+        'messages': [
+            {
+                'role': 'system',
+                'content': FEEDBACK_SYSTEM_PROMPT,
+            },
+            {
+                'role': 'user',
+                'content': prompt,
+            },
+        ],
+        'max_tokens': max_tokens,
+        'temperature': 0.7,
+    }
+
+
+def _feedback_completion(request):
+    """
+    Run a feedback completion through the AI cache. Identical prompts (same
+    question, selected options and correctness) are only sent to the model once.
+    """
+    def compute():
+        response = llm.chat_completion(**request)
+        return response.choices[0].message.content.strip()
+    
+    return ai_cache.get_or_compute('feedback', request, compute)
+
+
+def generate_encouraging_feedback(question, student_selected, is_correct, student_text_answer=None):
+    """
+    Generate encouraging, growth-oriented feedback for a student's answer using OpenAI.
+    Works with JSONB question structure.
+    """
+    if not settings.OPENAI_API_KEY:
+        if is_correct:
+            return FEEDBACK_FALLBACK_CORRECT
+        else:
+            return FEEDBACK_FALLBACK_INCORRECT
+    
+    is_short_answer = question.get('type', 'mcq') == 'short_answer'
+    request = build_feedback_request(question, student_selected, is_correct, student_text_answer)
+    if request is None:
+        return FEEDBACK_NO_ANSWER if is_short_answer else FEEDBACK_UNAVAILABLE
+    
+    try:
+        return _feedback_completion(request)
+    except Exception as e:
+        if is_short_answer:
+            print(f'Error generating feedback for short answer: {e}')
+            if is_correct:
+                return 'Great job! You demonstrated good understanding of the key concepts. Keep up the excellent work!'
+            else:
+                return 'This question needs another look. Review the key concepts mentioned in the rubric and try to explain them in your own words. You\'ve got this!'
+        print(f'Error generating feedback for {"correct" if is_correct else "incorrect"} answer: {e}')
+        return FEEDBACK_FALLBACK_CORRECT if is_correct else FEEDBACK_FALLBACK_INCORRECT
 
+
+def answer_pattern_key(selected_options):
+    """Normalize selectedOptions into a lookup key, e.g. [2, 0, 2] -> '0,2'."""
+    return ','.join(str(option) for option in sorted(set(selected_options or []), key=str))
+
+
+def question_fingerprint(question):
+    """Hash the parts of a question that feedback depends on."""
+    relevant = {
+        field: question.get(field)
+        for field in ('type', 'questionText', 'options', 'correctOptions', 'rubric')
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def likely_answer_patterns(question):
+    """
+    The answer patterns worth precomputing for an MCQ / True-False question:
+    each single option, the exact correct combination, and no answer.
+    """
+    options = question.get('options', [])
+    if not options or not isinstance(options, list):
+        return []
+    
+    patterns = [[index] for index in range(len(options))]
+    correct = sorted(set(question.get('correctOptions', [])), key=str)
+    if correct and correct not in patterns:
+        patterns.append(correct)
+    patterns.append([])
+    return patterns
+
+
+def precompute_assignment_feedback(assignment_id, max_workers=None):
+    """
+    Generate and store feedback for every likely answer pattern of each MCQ
+    and True/False question. Stored under Assignment.precomputed_feedback as
+    {questionNumber: {'fingerprint': ..., 'patterns': {pattern_key: feedback}}}
+    so grading-time feedback becomes a dictionary lookup.
+    """
+    if not settings.OPENAI_API_KEY:
+        # Nothing to gain: without a key feedback is a canned string anyway
+        return {}
+    
+    assignment = Assignment.objects.only('id', 'questions').get(pk=assignment_id)
+    questions_map = build_questions_map(assignment.questions)
+    
+    jobs = []
+    for number, question in questions_map.items():
+        if question.get('type', 'mcq') == 'short_answer':
+            continue
+        correct_key = answer_pattern_key(question.get('correctOptions', []))
+        for pattern in likely_answer_patterns(question):
+            key = answer_pattern_key(pattern)
+            jobs.append((number, question, pattern, key, key == correct_key))
+    
+    def run(job):
+        _, question, pattern, _, is_correct = job
         try:
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            response = client.chat.completions.create(
-                model='gpt-4o-mini',
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': 'You are a supportive, encouraging teacher. Always use positive, growth-oriented language. Never discourage students. Focus on what they can learn and improve.',
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt,
-                    },
-                ],
-                max_tokens=200,
-                temperature=0.7,
-            )
-            
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f'Error generating feedback for incorrect answer: {e}')
-            return 'This question needs another look. Review the concepts and try again—you\'ve got this!'
+            return generate_encouraging_feedback(question, pattern, is_correct)
+        finally:
+            # Worker threads get their own DB connection (AI cache); don't leak it
+            connection.close()
+    
+    bank = {}
+    with ThreadPoolExecutor(max_workers=max_workers or settings.AI_GRADING_CONCURRENCY) as executor:
+        for (number, question, _, key, _), feedback in zip(jobs, executor.map(run, jobs)):
+            entry = bank.setdefault(str(number), {
+                'fingerprint': question_fingerprint(question),
+                'patterns': {},
+            })
+            if feedback in (FEEDBACK_FALLBACK_CORRECT, FEEDBACK_FALLBACK_INCORRECT):
+                # The model call failed; leave the pattern to live generation
+                continue
+            entry['patterns'][key] = feedback
+    
+    Assignment.objects.filter(pk=assignment_id).update(precomputed_feedback=bank)
+    return bank
 
+
+def start_feedback_precompute(assignment, user=None):
+    """Queue feedback precompute for the job worker once the surrounding transaction commits."""
+    from jobs.services import enqueue
+    
+    transaction.on_commit(lambda: enqueue('precompute_feedback', {'assignment_id': assignment.pk}, user=user))
+
+
+def lookup_feedback(assignment, question, student_selected, is_correct, student_text_answer=None):
+    """
+    Feedback for one answer: a dictionary lookup into the precomputed bank
+    when the pattern was precomputed for the current version of the question,
+    live generation otherwise.
+    """
+    if question.get('type', 'mcq') != 'short_answer':
+        entry = (assignment.precomputed_feedback or {}).get(str(question.get('questionNumber')))
+        if entry and entry.get('fingerprint') == question_fingerprint(question):
+            feedback = entry.get('patterns', {}).get(answer_pattern_key(student_selected))
+            if feedback is not None:
+                return feedback
+    
+    return generate_encouraging_feedback(question, student_selected, is_correct, student_text_answer)
+
+
+def generate_submission_feedback(submission, progress=None):
+    """
+    Feedback for every answered question of a submission.
+    progress(done, total) is called after each question.
+    """
+    assignment = submission.assignment
+    questions_map = build_questions_map(assignment.questions)
+    answers = [
+        answer for answer in submission.answers or []
+        if answer.get('questionNumber') in questions_map
+    ]
+    
+    feedback = []
+    for answer in answers:
+        question = questions_map[answer.get('questionNumber')]
+        feedback.append({
+            'questionNumber': answer.get('questionNumber'),
+            'feedback': lookup_feedback(
+                assignment,
+                question,
+                answer.get('selectedOptions', []),
+                answer.get('isCorrect', False),
+                answer.get('textAnswer'),
+            ),
+        })
+        if progress:
+            progress(len(feedback), len(answers))
+    return feedback
+
+
+def iter_submission_feedback(submission, max_workers=None):
+    """
+    Generate per-question feedback concurrently and yield each result as soon
+    as it is ready, so the first one arrives after a single model call.
+    """
+    assignment = submission.assignment
+    questions_map = build_questions_map(assignment.questions)
+    answers = [
+        answer for answer in submission.answers or []
+        if answer.get('questionNumber') in questions_map
+    ]
+    if not answers:
+        return
+    
+    def run(answer):
+        try:
+            return {
+                'questionNumber': answer.get('questionNumber'),
+                'feedback': lookup_feedback(
+                    assignment,
+                    questions_map[answer.get('questionNumber')],
+                    answer.get('selectedOptions', []),
+                    answer.get('isCorrect', False),
+                    answer.get('textAnswer'),
+                ),
+            }
+        finally:
+            connection.close()
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers or settings.AI_GRADING_CONCURRENCY)
+    try:
+        futures = [executor.submit(run, answer) for answer in answers]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Client disconnected or we're done: don't start questions nobody will see
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,24 @@
+"""
+Keep Assignment.submission_counter / graded_counter in sync with submission
+and grade writes (only when ASSIGNMENT_DENORMALIZED_COUNTS is on).
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Grade, Submission
+from .services import refresh_submission_counters
+
+
+@receiver([post_save, post_delete], sender=Submission, dispatch_uid='assignments_submission_counters')
+def submission_changed(sender, instance, **kwargs):
+    refresh_submission_counters([instance.assignment_id])
+
+
+@receiver([post_save, post_delete], sender=Grade, dispatch_uid='assignments_grade_counters')
+def grade_changed(sender, instance, **kwargs):
+    if not settings.ASSIGNMENT_DENORMALIZED_COUNTS:
+        return
+    assignment_id = (
+        Submission.objects.filter(pk=instance.submission_id).values_list('assignment_id', flat=True).first()
+    )
+    refresh_submission_counters([assignment_id])
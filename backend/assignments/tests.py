@@ -0,0 +1,470 @@
+import asyncio
+import json
+import random
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+import httpx
+import openai
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from academics.models import AcademicYear, Class, School, Subject
+from . import ai_cache, llm
+from .management.commands.benchmark_grading import percentile
+from .batch import LocalBatchProvider, ingest_results, write_batch_file
+from .models import Assignment, Grade, Submission
+from .scoring import score_cohort
+from .services import (
+    GRADING_ERROR_REASONING, auto_grade_assignment, build_grading_request, build_questions_map,
+    grade_assignment_short_answers, score_answers,
+)
+
+SHORT_ANSWER = {
+    'questionNumber': 1,
+    'type': 'short_answer',
+    'questionText': 'Why do seasons change?',
+    'rubric': 'Axial tilt',
+    'marks': 4,
+}
+MCQ = {
+    'questionNumber': 2,
+    'type': 'mcq',
+    'questionText': 'Which planet is largest?',
+    'options': ['Mars', 'Jupiter'],
+    'correctOptions': [1],
+    'marks': 1,
+}
+
+
+def make_assignment(questions):
+    teacher = get_user_model().objects.create(username='teacher')
+    school = School.objects.create(name='School', code='S1')
+    year = AcademicYear.objects.create(school=school, name='2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    class_obj = Class.objects.create(school=school, academic_year=year, name='Grade 5', code='G5', grade_level=5)
+    subject = Subject.objects.create(school=school, name='Science', code='SCI')
+    return Assignment.objects.create(
+        title='Seasons', description='', teacher=teacher, class_obj=class_obj, subject=subject,
+        due_date=timezone.now(), questions=questions,
+    )
+
+
+class StubOpenAI:
+    """
+    Local stand-in for the chat completions endpoint, served through an
+    httpx.MockTransport. Grades every answer 3/4, except answers containing
+    'BROKEN', which get a 500. Records requests and peak concurrency.
+    """
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        body = json.loads(request.content)
+        self.requests.append(body)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if 'BROKEN' in body['messages'][-1]['content']:
+            return httpx.Response(500, json={'error': {'message': 'stub failure'}})
+        reply = {'isCorrect': False, 'score': 3, 'reasoning': 'Mentions the tilt only partly'}
+        return httpx.Response(200, json={
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body['model'],
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': json.dumps(reply)},
+            }],
+        })
+
+    @asynccontextmanager
+    async def client(self):
+        client = openai.AsyncOpenAI(
+            api_key='test',
+            base_url='http://openai.stub/v1',
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handle)),
+        )
+        try:
+            yield client
+        finally:
+            await client.close()
+
+
+@override_settings(OPENAI_API_KEY='test')
+class GradeShortAnswersTests(TransactionTestCase):
+    def setUp(self):
+        ai_cache.clear_memory()
+        llm.breaker.record_success()
+        self.stub = StubOpenAI()
+        patcher = mock.patch.object(llm, 'async_client', self.stub.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assignment = make_assignment([SHORT_ANSWER])
+
+    def submit(self, *texts):
+        return [
+            Submission.objects.create(
+                assignment=self.assignment,
+                student_name=f'student {index}',
+                status='SUBMITTED',
+                answers=[{'questionNumber': 1, 'textAnswer': text}],
+            )
+            for index, text in enumerate(texts)
+        ]
+
+    def test_requests_run_concurrently_up_to_the_limit(self):
+        submissions = self.submit(*(f'The axis is tilted ({index})' for index in range(8)))
+
+        result = grade_assignment_short_answers(self.assignment, concurrency=3, max_retries=0)
+
+        self.assertEqual(result['graded'], 8)
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual(len(self.stub.requests), 8)
+        self.assertEqual(self.stub.max_in_flight, 3)
+        for submission in submissions:
+            submission.refresh_from_db()
+            self.assertEqual(submission.answers[0]['score'], 3)
+            self.assertIs(submission.answers[0]['isCorrect'], False)
+
+    def test_repeated_grading_is_served_from_the_cache(self):
+        self.submit('The axis is tilted', 'The sun moves closer')
+        grade_assignment_short_answers(self.assignment, concurrency=2, max_retries=0)
+        self.assertEqual(len(self.stub.requests), 2)
+
+        result = grade_assignment_short_answers(self.assignment, concurrency=2, max_retries=0)
+
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(result['graded'], 2)
+        self.assertEqual(result['failed'], 0)
+
+    def test_a_failed_answer_falls_back_without_failing_the_rest(self):
+        good, broken = self.submit('The axis is tilted', 'BROKEN answer')
+        # An earlier good grade must survive the failed re-grade
+        broken.answers = [{'questionNumber': 1, 'textAnswer': 'BROKEN answer', 'score': 2, 'reasoning': 'Earlier grade'}]
+        broken.save()
+
+        result = grade_assignment_short_answers(self.assignment, concurrency=2, max_retries=0)
+
+        self.assertEqual(result['graded'], 2)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(result['submissions'][broken.id][0]['reasoning'], GRADING_ERROR_REASONING)
+        good.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(good.answers[0]['score'], 3)
+        self.assertEqual(broken.answers[0]['score'], 2)
+        self.assertEqual(broken.answers[0]['reasoning'], 'Earlier grade')
+
+    def test_a_cache_error_only_fails_its_own_answer(self):
+        good, failing = self.submit('The axis is tilted', 'Cache lookup explodes')
+        failing_key = ai_cache.make_key('grade', build_grading_request(SHORT_ANSWER, 'Cache lookup explodes'))
+        real_get = ai_cache.get
+
+        def flaky_get(kind, key):
+            if key == failing_key:
+                raise RuntimeError('cache backend down')
+            return real_get(kind, key)
+
+        with mock.patch.object(ai_cache, 'get', flaky_get):
+            result = grade_assignment_short_answers(self.assignment, concurrency=2, max_retries=0)
+
+        self.assertEqual(result['failed'], 1)
+        good.refresh_from_db()
+        failing.refresh_from_db()
+        self.assertEqual(good.answers[0]['score'], 3)
+        self.assertNotIn('score', failing.answers[0])
+
+
+class AutoGradeAssignmentTests(TestCase):
+    def setUp(self):
+        self.assignment = make_assignment([MCQ])
+
+    def submit(self, status, selected):
+        return Submission.objects.create(
+            assignment=self.assignment, student_name=f'{status} {selected}', status=status,
+            answers=[{'questionNumber': 2, 'selectedOptions': selected}],
+        )
+
+    def test_only_submitted_work_is_scored_and_statuses_are_kept(self):
+        draft = self.submit('DRAFT', [1])
+        graded = self.submit('GRADED', [1])
+        graded.answers[0].update({'isCorrect': False, 'score': 0})
+        graded.save()
+        right, wrong, late = self.submit('SUBMITTED', [1]), self.submit('SUBMITTED', [0]), self.submit('LATE', [1])
+
+        result = auto_grade_assignment(self.assignment)
+
+        self.assertEqual(result['graded'], 3)
+        self.assertEqual(result['scores'], {right.id: 1, wrong.id: 0, late.id: 1})
+        for submission, status, score in ((right, 'SUBMITTED', 1), (wrong, 'SUBMITTED', 0), (late, 'LATE', 1)):
+            submission.refresh_from_db()
+            self.assertEqual(submission.status, status)
+            self.assertEqual(submission.answers[0]['score'], score)
+        draft.refresh_from_db()
+        graded.refresh_from_db()
+        self.assertEqual(draft.status, 'DRAFT')
+        self.assertNotIn('score', draft.answers[0])
+        # The teacher's grade stands
+        self.assertEqual(graded.status, 'GRADED')
+        self.assertEqual(graded.answers[0]['score'], 0)
+
+    def test_results_are_written_in_chunks(self):
+        submissions = [self.submit('SUBMITTED', [index % 2]) for index in range(5)]
+
+        chunks = []
+        real_bulk_update = Submission.objects.bulk_update
+
+        def bulk_update(objs, fields, **kwargs):
+            chunks.append(len(objs))
+            return real_bulk_update(objs, fields, **kwargs)
+
+        with mock.patch.object(Submission.objects, 'bulk_update', bulk_update):
+            result = auto_grade_assignment(self.assignment, chunk_size=2)
+
+        self.assertEqual(chunks, [2, 2, 1])
+        self.assertEqual(result['graded'], 5)
+        scores = dict(Submission.objects.filter(pk__in=[s.pk for s in submissions]).values_list('pk', 'answers__0__score'))
+        self.assertEqual(scores, {submission.pk: index % 2 for index, submission in enumerate(submissions)})
+
+
+class GenerateFeedbackTests(TestCase):
+    def setUp(self):
+        assignment = make_assignment([SHORT_ANSWER])
+        self.submission = Submission.objects.create(
+            assignment=assignment, student_name='student', status='SUBMITTED',
+            answers=[{'questionNumber': 1, 'textAnswer': 'The axis is tilted'}],
+        )
+        self.url = f'/api/assignments/submissions/{self.submission.pk}/generate-feedback/'
+        patcher = mock.patch(
+            'assignments.viewsets.iter_submission_feedback',
+            side_effect=lambda submission: iter([{'questionNumber': 1, 'feedback': 'Mention the tilt'}]),
+        )
+        self.feedback = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def events(self, response):
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        return [block.split('\n')[0].removeprefix('event: ') for block in body.strip().split('\n\n')]
+
+    def test_get_streams_with_stream_param_or_event_stream_accept(self):
+        self.assertEqual(self.events(self.client.get(self.url, {'stream': '1'})), ['start', 'feedback', 'done'])
+        self.assertEqual(self.events(self.client.get(self.url, HTTP_ACCEPT='text/event-stream')), ['start', 'feedback', 'done'])
+        legacy = f'/api/teacher/submissions/{self.submission.pk}/generate-feedback'
+        self.assertEqual(self.events(self.client.get(legacy, {'stream': '1'})), ['start', 'feedback', 'done'])
+
+    def test_plain_get_does_not_generate_feedback(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+        self.feedback.assert_not_called()
+
+    def test_post_queues_a_job(self):
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['submission_id'], self.submission.pk)
+        self.feedback.assert_not_called()
+
+
+class SubmissionDetailPageTests(TestCase):
+    def test_page_loads_the_submission_and_offers_feedback(self):
+        assignment = make_assignment([SHORT_ANSWER])
+        answers = [{'questionNumber': 1, 'textAnswer': 'The axis is tilted'}]
+        submission = Submission.objects.create(assignment=assignment, student_name='student', answers=answers)
+
+        page = self.client.get(f'/teacher/submissions/{submission.pk}').content.decode()
+        self.assertIn(f'onclick="streamFeedback({submission.pk})"', page)
+        self.assertIn(f'loadSubmission({submission.pk})', page)
+
+        # What loadSubmission() renders the answer cards from
+        data = self.client.get(f'/api/assignments/submissions/{submission.pk}/').json()
+        self.assertEqual((data['student_name'], data['answers']), ('student', answers))
+
+
+class BatchGradingTests(TestCase):
+    """submit -> poll -> ingest through the file-based LocalBatchProvider."""
+
+    def setUp(self):
+        ai_cache.clear_memory()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.provider = LocalBatchProvider(self.directory)
+        self.assignment = make_assignment([SHORT_ANSWER, MCQ])
+        answers = [
+            {'questionNumber': 1, 'textAnswer': 'The axis is tilted'},
+            {'questionNumber': 2, 'selectedOptions': [1]},
+        ]
+        self.graded, self.ungraded = (
+            Submission.objects.create(assignment=self.assignment, student_name=name, status='SUBMITTED', answers=answers)
+            for name in ('graded', 'ungraded')
+        )
+        self.grade = Grade.objects.create(
+            submission=self.graded, score=Decimal('2.00'), max_score=Decimal('5.00'),
+            feedback='Teacher feedback', graded_by=self.assignment.teacher,
+        )
+
+    def complete(self, batch_id):
+        """Answer every request in the batch the way the Batch API would."""
+        batch_dir = self.directory / batch_id
+        with open(batch_dir / 'input.jsonl', encoding='utf-8') as handle:
+            requests = [json.loads(line) for line in handle]
+        with open(batch_dir / 'output.jsonl', 'w', encoding='utf-8') as handle:
+            for request in requests:
+                if request['custom_id'].startswith('grade:'):
+                    content = json.dumps({'isCorrect': True, 'score': 3, 'reasoning': 'Names the tilt'})
+                else:
+                    content = 'Well done, Jupiter is the largest planet.'
+                handle.write(json.dumps({
+                    'custom_id': request['custom_id'],
+                    'response': {'status_code': 200, 'body': {'choices': [{'message': {'content': content}}]}},
+                    'error': None,
+                }) + '\n')
+
+    def test_results_fill_ai_suggestions_without_touching_grades(self):
+        path = self.directory / 'input.jsonl'
+        # Both submissions share the same answers, so requests are deduplicated
+        self.assertEqual(write_batch_file(path), 2)
+        batch_id = self.provider.submit(path)
+        self.assertEqual(self.provider.status(batch_id), 'in_progress')
+
+        self.complete(batch_id)
+        self.assertEqual(self.provider.status(batch_id), 'completed')
+        result = ingest_results(self.provider.results(batch_id))
+
+        self.assertEqual(result['results'], 2)
+        self.assertEqual(result['failed_results'], 0)
+        self.assertEqual(result['updated_grades'], 1)
+        self.assertEqual(result['ungraded'], 1)
+        self.grade.refresh_from_db()
+        # MCQ scored locally (1) + short answer from the batch (3)
+        self.assertEqual(self.grade.ai_suggested_score, Decimal('4.00'))
+        self.assertEqual(
+            self.grade.ai_suggested_feedback,
+            'Q1: Names the tilt\nQ2: Well done, Jupiter is the largest planet.',
+        )
+        self.assertEqual(self.grade.score, Decimal('2.00'))
+        self.assertEqual(self.grade.feedback, 'Teacher feedback')
+        self.assertFalse(Grade.objects.filter(submission=self.ungraded).exists())
+
+    def test_results_are_reused_once_the_submission_is_graded(self):
+        path = self.directory / 'input.jsonl'
+        write_batch_file(path)
+        batch_id = self.provider.submit(path)
+        self.complete(batch_id)
+        ingest_results(self.provider.results(batch_id))
+
+        grade = Grade.objects.create(submission=self.ungraded, score=Decimal('1.00'), max_score=Decimal('5.00'))
+        # Everything is cached: nothing new to send
+        self.assertEqual(write_batch_file(self.directory / 'again.jsonl'), 0)
+        result = ingest_results([])
+
+        self.assertEqual(result['updated_grades'], 1)
+        grade.refresh_from_db()
+        self.assertEqual(grade.ai_suggested_score, Decimal('4.00'))
+        self.assertEqual(grade.score, Decimal('1.00'))
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        hundred = list(range(100, 0, -1))
+        self.assertEqual([percentile(hundred, pct) for pct in (50, 95, 99, 100)], [50, 95, 99, 100])
+        ten = list(range(1, 11))
+        self.assertEqual([percentile(ten, pct) for pct in (0, 10, 50, 55, 90)], [1, 1, 5, 6, 9])
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+class ScoreCohortTests(SimpleTestCase):
+    """The NumPy scorer must agree with services.score_answers on every submission."""
+    QUESTIONS = [
+        {'questionNumber': 1, 'type': 'mcq', 'correctOptions': [2], 'marks': 2},
+        {'questionNumber': 2, 'type': 'mcq', 'correctOptions': [0, 3], 'marks': 3},
+        {'questionNumber': 3, 'type': 'true_false', 'correctOptions': [0], 'marks': 1},
+        {'questionNumber': 4, 'type': 'true_false', 'correctOptions': [1], 'marks': 1},
+        SHORT_ANSWER | {'questionNumber': 5},
+    ]
+
+    def assertMatchesLoop(self, questions, answers_list):
+        numbers, correct, totals = score_cohort(questions, answers_list)
+        questions_map = build_questions_map(questions)
+        for row, answers in enumerate(answers_list):
+            scored, total = score_answers(answers, questions_map)
+            self.assertEqual(totals[row], total, answers)
+            expected = {number: False for number in numbers}
+            for answer in scored:
+                if answer.get('questionNumber') in expected and answer['isCorrect']:
+                    expected[answer['questionNumber']] = True
+            self.assertEqual(dict(zip(numbers, correct[row].tolist())), expected, answers)
+        return numbers, correct, totals
+
+    def test_multi_select_needs_exactly_the_correct_set(self):
+        answers_list = [
+            [{'questionNumber': 2, 'selectedOptions': [3, 0]}],
+            [{'questionNumber': 2, 'selectedOptions': [0]}],
+            [{'questionNumber': 2, 'selectedOptions': [0, 1, 3]}],
+            [{'questionNumber': 2, 'selectedOptions': [0, 3, 3]}],
+        ]
+        _, _, totals = self.assertMatchesLoop(self.QUESTIONS, answers_list)
+        self.assertEqual(totals, [3, 0, 0, 3])
+
+    def test_true_false_and_short_answers(self):
+        answers_list = [[
+            {'questionNumber': 3, 'selectedOptions': [0]},
+            {'questionNumber': 4, 'selectedOptions': [0]},
+            {'questionNumber': 5, 'textAnswer': 'Axial tilt'},
+        ]]
+        numbers, _, totals = self.assertMatchesLoop(self.QUESTIONS, answers_list)
+        self.assertEqual(numbers, [1, 2, 3, 4])
+        self.assertEqual(totals, [1])
+
+    def test_missing_answers_and_unknown_questions(self):
+        answers_list = [
+            None,
+            [],
+            [{'questionNumber': 1}],
+            [{'questionNumber': 99, 'selectedOptions': [2]}, {'questionNumber': 1, 'selectedOptions': [2]}],
+            [{'selectedOptions': [2]}],
+        ]
+        _, _, totals = self.assertMatchesLoop(self.QUESTIONS, answers_list)
+        self.assertEqual(totals, [0, 0, 0, 2, 0])
+
+    def test_rows_the_bitmask_cannot_hold_fall_back_to_the_loop(self):
+        answers_list = [
+            [{'questionNumber': 1, 'selectedOptions': ['2']}],
+            [{'questionNumber': 1, 'selectedOptions': [2]}, {'questionNumber': 1, 'selectedOptions': [2]}],
+            [{'questionNumber': 1, 'selectedOptions': [70]}],
+        ]
+        self.assertMatchesLoop(self.QUESTIONS, answers_list)
+        # Fractional marks take the answer-order summing path
+        fractional = [question | {'marks': 0.1} for question in self.QUESTIONS[:4]]
+        self.assertMatchesLoop(fractional, [
+            [{'questionNumber': q['questionNumber'], 'selectedOptions': q['correctOptions']} for q in fractional],
+        ])
+
+    def test_random_cohort_matches_the_loop(self):
+        rng = random.Random(2026)
+        answers_list = []
+        for _ in range(300):
+            answers = []
+            for number in rng.sample(range(0, 7), rng.randint(0, 6)):
+                answer = {'questionNumber': number}
+                if rng.random() < 0.9:
+                    answer['selectedOptions'] = rng.sample(range(4), rng.randint(0, 3))
+                answers.append(answer)
+            answers_list.append(answers)
+        self.assertMatchesLoop(self.QUESTIONS, answers_list)
@@ -1,6 +1,10 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from .models import Assignment, Submission, Grade
@@ -8,28 +12,73 @@ from .serializers import (
     AssignmentSerializer, SubmissionSerializer, GradeSerializer,
     AssignmentCreateSerializer, SubmissionCreateSerializer, GradeCreateSerializer
 )
-from .services import auto_grade_submission, generate_encouraging_feedback
+from .services import (
+    auto_grade_submission, auto_grade_assignment, generate_encouraging_feedback,
+    iter_submission_feedback, start_feedback_precompute, submission_count_annotations
+)
+from .read_models import gradebook_queryset, gradebook_rows, gradebook_values
+from .renderers import EventStreamRenderer, sse_event
+from jobs.services import enqueue
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Assignment management matching API structure"""
     queryset = Assignment.objects.all()
     serializer_class = AssignmentSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is not None and not fields & {'submission_count', 'graded_count'}:
+            return queryset
+        # AssignmentSerializer reads these instead of running two COUNTs per row
+        if settings.ASSIGNMENT_DENORMALIZED_COUNTS:
+            return queryset.annotate(total_submissions=F('submission_counter'), graded_count=F('graded_counter'))
+        return queryset.annotate(**submission_count_annotations())
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return AssignmentCreateSerializer
         return AssignmentSerializer
     
+    def perform_create(self, serializer):
+        assignment = serializer.save()
+        if assignment.status == 'PUBLISHED':
+            start_feedback_precompute(assignment, user=self.request.user)
+    
+    def perform_update(self, serializer):
+        was_published = serializer.instance.status == 'PUBLISHED'
+        assignment = serializer.save()
+        # Regenerate on publish, or when a published assignment's questions change
+        if assignment.status == 'PUBLISHED' and (not was_published or 'questions' in serializer.validated_data):
+            start_feedback_precompute(assignment, user=self.request.user)
+    
     @action(detail=True, methods=['post'])
     def ai_grade(self, request, pk=None):
-        """AI grading suggestion for assignment"""
+        """Queue AI grading for every submission; poll the returned job for progress"""
         assignment = self.get_object()
-        # Placeholder - integrate with AI service
+        job = enqueue('ai_grade', {'assignment_id': assignment.id}, user=request.user)
         return Response({
-            'message': 'AI grading suggestion endpoint',
-            'assignment_id': assignment.id
-        }, status=status.HTTP_201_CREATED)
+            'message': 'AI grading queued',
+            'assignment_id': assignment.id,
+            'job_id': job.id,
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'], url_path='auto-grade')
+    def auto_grade(self, request, pk=None):
+        """Auto-grade all MCQ/True-False answers of every submitted or late submission in one pass"""
+        assignment = self.get_object()
+        try:
+            chunk_size = int(request.data.get('chunk_size', 500))
+        except (TypeError, ValueError):
+            return Response({'error': 'chunk_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if chunk_size < 1:
+            return Response({'error': 'chunk_size must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = auto_grade_assignment(assignment, chunk_size=chunk_size)
+        return Response(result)
     
     @action(detail=True, methods=['get'])
     def submissions(self, request, pk=None):
@@ -56,23 +105,87 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class SubmissionViewSet(viewsets.ModelViewSet):
+class SubmissionViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Submission management matching API structure"""
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
+    # Read by SubmissionSerializer.get_grade
+    extra_select_related = ('grade', 'grade__graded_by')
     
     def get_serializer_class(self):
         if self.action == 'create':
             return SubmissionCreateSerializer
         return SubmissionSerializer
+    
+    @action(
+        detail=True,
+        methods=['get', 'post'],
+        url_path='generate-feedback',
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer],
+    )
+    def generate_feedback(self, request, pk=None):
+        """
+        Per-question feedback. POST queues a job (the job result holds the feedback);
+        GET with ?stream=1 or Accept: text/event-stream streams each question's
+        feedback over SSE as soon as it is generated. A plain GET is rejected, so
+        JSON clients never start model calls in the web worker by accident.
+        """
+        submission = self.get_object()
+        if request.query_params.get('stream') == '1' or isinstance(request.accepted_renderer, EventStreamRenderer):
+            return self._stream_feedback(submission)
+        if request.method == 'GET':
+            return Response(
+                {'error': 'Use ?stream=1 or Accept: text/event-stream to stream feedback, or POST to queue it'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        job = enqueue('generate_feedback', {'submission_id': submission.id}, user=request.user)
+        return Response({
+            'message': 'Feedback generation queued',
+            'submission_id': submission.id,
+            'job_id': job.id,
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    def _stream_feedback(self, submission):
+        def events():
+            count = 0
+            yield sse_event('start', {'submission_id': submission.id})
+            try:
+                for item in iter_submission_feedback(submission):
+                    count += 1
+                    yield sse_event('feedback', item)
+            except Exception as e:
+                print(f'Error streaming feedback for submission {submission.id}: {e}')
+                yield sse_event('error', {'error': 'Feedback generation failed'})
+            yield sse_event('done', {'submission_id': submission.id, 'count': count})
+        
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx and similar proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet for Grade management matching API structure"""
     queryset = Grade.objects.all()
+    # Grade.percentage is a model property
+    field_dependencies = {'percentage': ('score', 'max_score')}
     
     def get_serializer_class(self):
         if self.action == 'create':
             return GradeCreateSerializer
         return GradeSerializer
-
+    
+    @action(detail=False, methods=['get'])
+    def gradebook(self, request):
+        """
+        Flat gradebook rows (submission + grade) from a single joined query.
+        Filters: assignment, class_obj, subject, student, graded=1|0.
+        """
+        values = gradebook_values(gradebook_queryset(request.query_params))
+        page = self.paginate_queryset(values)
+        if page is not None:
+            return self.get_paginated_response(gradebook_rows(page))
+        return Response(gradebook_rows(values))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance, AttendanceReport
+from .models import Attendance, AttendanceReport, ClassDailyAttendance, StudentMonthlyAttendance
 
 
 @admin.register(Attendance)
@@ -15,3 +15,16 @@ class AttendanceReportAdmin(admin.ModelAdmin):
     list_filter = ['start_date', 'end_date']
     search_fields = ['student__username', 'class_obj__name']
 
+
+
+@admin.register(ClassDailyAttendance)
+class ClassDailyAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['id', 'class_obj', 'date', 'total', 'present', 'absent', 'late', 'excused', 'partial']
+    list_filter = ['date', 'class_obj']
+
+
+@admin.register(StudentMonthlyAttendance)
+class StudentMonthlyAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['id', 'student', 'class_obj', 'month', 'total', 'present', 'absent', 'late', 'excused', 'partial']
+    list_filter = ['month', 'class_obj']
+    search_fields = ['student__username', 'class_obj__name']
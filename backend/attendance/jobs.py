@@ -0,0 +1,10 @@
+"""
+Background job handlers for attendance (see settings.JOB_HANDLERS).
+Each handler receives the Job and returns a JSON-serializable result.
+"""
+from . import services
+
+
+def generate_attendance_reports(job):
+    """AttendanceReports for a whole class, school or academic year."""
+    return services.generate_attendance_reports(**job.payload)
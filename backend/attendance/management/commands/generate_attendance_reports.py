@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.services import generate_attendance_reports, report_batch_params
+from jobs.services import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Generate attendance reports for every enrolled student of a class, school or academic year'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--class', type=int, dest='class_obj', help='Class id')
+        scope.add_argument('--school', type=int, help='School id')
+        scope.add_argument('--academic-year', type=int, dest='academic_year', help='Academic year id')
+        parser.add_argument('--start', required=True, help='First day, YYYY-MM-DD')
+        parser.add_argument('--end', required=True, help='Last day, YYYY-MM-DD')
+        parser.add_argument('--queue', action='store_true', help='Queue a job for run_jobs instead of generating now')
+
+    def handle(self, *args, **options):
+        scope = next(name for name in ('class_obj', 'school', 'academic_year') if options[name] is not None)
+        try:
+            scope, scope_id, start, end = report_batch_params(scope, options[scope], options['start'], options['end'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['queue']:
+            payload = {'scope': scope, 'scope_id': scope_id, 'start_date': start.isoformat(), 'end_date': end.isoformat()}
+            job = enqueue('attendance_reports', payload)
+            self.stdout.write(self.style.SUCCESS(f'Queued attendance reports as job {job.id}'))
+            return
+
+        result = generate_attendance_reports(scope, scope_id, start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {result['created']} attendance reports for {scope} {scope_id} ({start} to {end}), "
+            f"replacing {result['replaced']}"
+        ))
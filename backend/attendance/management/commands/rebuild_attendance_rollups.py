@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from academics.models import Class
+from attendance.services import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-class daily and per-student monthly attendance rollups from attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('class_ids', nargs='*', type=int, help='Default: every class')
+        parser.add_argument('--batch-size', type=int, default=50, help='Classes rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        if not settings.ATTENDANCE_ROLLUPS:
+            raise CommandError('ATTENDANCE_ROLLUPS is off; the rollup tables are not used')
+
+        ids = options['class_ids'] or list(Class.objects.order_by('id').values_list('id', flat=True))
+        daily = monthly = 0
+        for start in range(0, len(ids), options['batch_size']):
+            written = rebuild_attendance_rollups(ids[start:start + options['batch_size']])
+            daily += written['daily']
+            monthly += written['monthly']
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt attendance rollups for {len(ids)} classes: {daily} class-days, {monthly} student-months'
+        ))
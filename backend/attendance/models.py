@@ -29,6 +29,9 @@ class Attendance(models.Model):
         db_table = 'attendance'
         unique_together = ['student', 'class_obj', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='idx_attendance_date_id'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.class_obj.name} - {self.date} - {self.status}"
@@ -45,6 +48,7 @@ class AttendanceReport(models.Model):
     absent_days = models.IntegerField(default=0)
     late_days = models.IntegerField(default=0)
     excused_days = models.IntegerField(default=0)
+    partial_days = models.IntegerField(default=0)
     attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     generated_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
@@ -54,7 +58,57 @@ class AttendanceReport(models.Model):
     class Meta:
         db_table = 'attendance_reports'
         ordering = ['-generated_at']
+        indexes = [
+            models.Index(fields=['-generated_at', '-id'], name='idx_att_reports_generated_id'),
+        ]
     
     def __str__(self):
         return f"Attendance Report - {self.student.username} - {self.start_date} to {self.end_date}"
 
+
+
+class AttendanceRollup(models.Model):
+    """Per-status attendance counts for one rollup key (see services.refresh_attendance_rollups)"""
+    total = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    excused = models.IntegerField(default=0)
+    partial = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class ClassDailyAttendance(AttendanceRollup):
+    """Attendance counts for one class on one day"""
+    class_obj = models.ForeignKey('academics.Class', on_delete=models.CASCADE, related_name='daily_attendance', db_column='class_obj_id')
+    date = models.DateField()
+
+    class Meta:
+        db_table = 'attendance_class_daily'
+        unique_together = ['class_obj', 'date']
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.class_obj_id} - {self.date}: {self.present}/{self.total} present"
+
+
+class StudentMonthlyAttendance(AttendanceRollup):
+    """Attendance counts for one student in one class for one calendar month"""
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_attendance')
+    class_obj = models.ForeignKey('academics.Class', on_delete=models.CASCADE, related_name='monthly_attendance', db_column='class_obj_id')
+    # First day of the month
+    month = models.DateField()
+
+    class Meta:
+        db_table = 'attendance_student_monthly'
+        unique_together = ['student', 'class_obj', 'month']
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['class_obj', 'month'], name='idx_att_monthly_class_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.class_obj_id} - {self.month:%Y-%m}: {self.present}/{self.total} present"
@@ -31,12 +31,12 @@ class AttendanceReportSerializer(serializers.ModelSerializer):
             'id', 'student', 'student_username', 'student_email',
             'class_obj', 'class_name', 'start_date', 'end_date',
             'total_days', 'present_days', 'absent_days', 'late_days',
-            'excused_days', 'attendance_percentage', 'generated_at',
+            'excused_days', 'partial_days', 'attendance_percentage', 'generated_at',
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'total_days', 'present_days', 'absent_days',
-            'late_days', 'excused_days', 'attendance_percentage',
+            'late_days', 'excused_days', 'partial_days', 'attendance_percentage',
             'generated_at', 'created_at', 'updated_at'
         ]
 
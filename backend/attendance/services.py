@@ -0,0 +1,548 @@
+"""
+Services for marking and aggregating attendance
+"""
+import base64
+import datetime
+from functools import reduce
+from itertools import islice
+from operator import or_
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date
+from academics.models import Class, StudentClass
+from .models import Attendance, AttendanceReport, ClassDailyAttendance, StudentMonthlyAttendance
+
+STATUSES = {status for status, _ in Attendance.STATUS_CHOICES}
+# Keys of status_counts(), stored as columns on the rollup tables
+COUNT_FIELDS = ['total', *(status.lower() for status, _ in Attendance.STATUS_CHOICES)]
+# Output key -> grouping expression for attendance_summary(group_by=...)
+GROUPINGS = {
+    'student': F('student_id'),
+    'class_obj': F('class_obj_id'),
+    'day': F('date'),
+    'week': TruncWeek('date'),
+    'month': TruncMonth('date'),
+}
+# Groupings each rollup table can answer (see rollup_source)
+ROLLUP_GROUPINGS = {
+    ClassDailyAttendance: {
+        'class_obj': F('class_obj_id'),
+        'day': F('date'),
+        'week': TruncWeek('date'),
+        'month': TruncMonth('date'),
+    },
+    StudentMonthlyAttendance: {
+        'student': F('student_id'),
+        'class_obj': F('class_obj_id'),
+        'month': F('month'),
+    },
+}
+ROLLUP_BATCH_SIZE = 1000
+# generate_attendance_reports scope -> lookup on Attendance, StudentClass and the rollups
+REPORT_SCOPES = {
+    'class_obj': 'class_obj_id',
+    'school': 'class_obj__school_id',
+    'academic_year': 'class_obj__academic_year_id',
+}
+# The same scopes as lookups on Class
+CLASS_SCOPES = {
+    'class_obj': 'id',
+    'school': 'school_id',
+    'academic_year': 'academic_year_id',
+}
+REPORT_BATCH_SIZE = 1000
+# Cell codes of attendance_matrix(); 0 = not marked
+MATRIX_CODES = ['', *(status for status, _ in Attendance.STATUS_CHOICES)]
+MATRIX_ENCODINGS = ('base64', 'rle')
+# Written on conflict with an existing (student, class_obj, date) row
+UPSERT_FIELDS = ['status', 'remarks', 'marked_by', 'marked_at', 'is_active', 'updated_at']
+
+
+def _as_id(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def bulk_mark_attendance(entries, class_obj=None, date=None, marked_by=None):
+    """
+    Upsert attendance rows in one transaction.
+
+    entries: [{'student', 'status', 'remarks', optional 'class_obj'/'date'
+    overriding the defaults}]. Every (student, class) pair is checked
+    against active StudentClass enrollments with a single query; valid
+    rows are written with one INSERT ... ON CONFLICT DO UPDATE per batch.
+
+    Returns {'created': n, 'updated': n, 'rejected': [{'index', 'student', 'errors'}]}.
+    """
+    default_class, default_date = _as_id(class_obj), _as_date(date)
+    rows, rejected, seen = [], [], set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            rejected.append({'index': index, 'student': None, 'errors': ['Expected an object']})
+            continue
+        errors = []
+        student_id = _as_id(entry.get('student'))
+        class_id = _as_id(entry['class_obj']) if 'class_obj' in entry else default_class
+        day = _as_date(entry['date']) if 'date' in entry else default_date
+        status = entry.get('status', 'PRESENT')
+        remarks = entry.get('remarks', '')
+        if student_id is None:
+            errors.append('A valid student id is required')
+        if class_id is None:
+            errors.append('A valid class_obj id is required')
+        if day is None:
+            errors.append('A valid date (YYYY-MM-DD) is required')
+        if status not in STATUSES:
+            errors.append(f'Invalid status: {status}')
+        if remarks is not None and not isinstance(remarks, str):
+            errors.append('remarks must be a string')
+        key = (student_id, class_id, day)
+        if not errors and key in seen:
+            errors.append('Duplicate entry for this student, class and date')
+        if errors:
+            rejected.append({'index': index, 'student': entry.get('student'), 'errors': errors})
+            continue
+        seen.add(key)
+        rows.append((index, Attendance(
+            student_id=student_id, class_obj_id=class_id, date=day, status=status,
+            remarks=remarks, marked_by_id=marked_by, is_active=True,
+        )))
+
+    if rows:
+        student_ids = {row.student_id for _, row in rows}
+        class_ids = {row.class_obj_id for _, row in rows}
+        enrolled = set(
+            StudentClass.objects.filter(student_id__in=student_ids, class_obj_id__in=class_ids, is_active=True)
+            .values_list('student_id', 'class_obj_id')
+        )
+        valid = []
+        for index, row in rows:
+            if (row.student_id, row.class_obj_id) in enrolled:
+                valid.append(row)
+            else:
+                rejected.append({'index': index, 'student': row.student_id, 'errors': ['Student is not enrolled in this class']})
+        rows = valid
+        rejected.sort(key=lambda item: item['index'])
+
+    created = updated = 0
+    if rows:
+        keys = [(row.student_id, row.class_obj_id, row.date) for row in rows]
+        with transaction.atomic():
+            # Only to report created vs updated; the upsert itself is race-free
+            existing = set(
+                Attendance.objects.filter(
+                    student_id__in={row.student_id for row in rows},
+                    class_obj_id__in={row.class_obj_id for row in rows},
+                    date__in={row.date for row in rows},
+                ).values_list('student_id', 'class_obj_id', 'date')
+            )
+            Attendance.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['student', 'class_obj', 'date'],
+                update_fields=UPSERT_FIELDS,
+            )
+            # bulk_create() doesn't send post_save
+            transaction.on_commit(lambda: refresh_attendance_rollups(keys))
+        updated = sum((row.student_id, row.class_obj_id, row.date) in existing for row in rows)
+        created = len(rows) - updated
+
+    return {'created': created, 'updated': updated, 'rejected': rejected}
+
+
+def status_counts():
+    """total plus one Count(filter=Q(status=...)) per status, keyed by the lowercased status."""
+    counts = {'total': Count('id')}
+    for status, _ in Attendance.STATUS_CHOICES:
+        counts[status.lower()] = Count('id', filter=Q(status=status))
+    return counts
+
+
+def attendance_percentage(counts):
+    """Share of PRESENT days, as reports have always computed it."""
+    return round(counts['present'] / counts['total'] * 100, 2) if counts['total'] else 0
+
+
+def filter_attendance(queryset=None, student=None, class_obj=None, start_date=None, end_date=None):
+    queryset = Attendance.objects.all() if queryset is None else queryset
+    if student:
+        queryset = queryset.filter(student_id=student)
+    if class_obj:
+        queryset = queryset.filter(class_obj_id=class_obj)
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    return queryset
+
+
+def _whole_months(start, end):
+    """Whether start..end (either may be open) falls on calendar month boundaries."""
+    return (start is None or start.day == 1) and (end is None or (end + datetime.timedelta(days=1)).day == 1)
+
+
+def rollup_source(group_by=None, student=None, class_obj=None, start_date=None, end_date=None):
+    """
+    (queryset, groupings) over the rollup table that answers a summary with
+    these filters, or None when none covers it and attendance has to be
+    scanned (ATTENDANCE_ROLLUPS off, or the grouping/range isn't stored).
+
+    ClassDailyAttendance answers anything without a student filter or
+    grouping; StudentMonthlyAttendance answers the rest when the range
+    starts and ends on month boundaries.
+    """
+    if not settings.ATTENDANCE_ROLLUPS:
+        return None
+    start, end = _as_date(start_date), _as_date(end_date)
+    if (start_date and start is None) or (end_date and end is None):
+        return None
+
+    groupings = ROLLUP_GROUPINGS[ClassDailyAttendance]
+    if not student and (group_by is None or group_by in groupings):
+        queryset = ClassDailyAttendance.objects.all()
+        if class_obj:
+            queryset = queryset.filter(class_obj_id=class_obj)
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset, groupings
+
+    groupings = ROLLUP_GROUPINGS[StudentMonthlyAttendance]
+    if _whole_months(start, end) and (group_by is None or group_by in groupings):
+        queryset = StudentMonthlyAttendance.objects.all()
+        if student:
+            queryset = queryset.filter(student_id=student)
+        if class_obj:
+            queryset = queryset.filter(class_obj_id=class_obj)
+        if start:
+            queryset = queryset.filter(month__gte=start)
+        if end:
+            queryset = queryset.filter(month__lte=end)
+        return queryset, groupings
+    return None
+
+
+def _summarize(queryset, aggregates, groupings, group_by):
+    if group_by is None:
+        return queryset.aggregate(**aggregates)
+    # Aliased: 'student' and 'class_obj' would clash with the model's fields
+    alias = f'_{group_by}'
+    groups = (
+        queryset.annotate(**{alias: groupings[group_by]})
+        .values(alias)
+        .annotate(**aggregates)
+        .order_by(alias)
+    )
+    return [{group_by: row.pop(alias), **row} for row in groups]
+
+
+def attendance_summary(queryset=None, group_by=None, **filters):
+    """
+    Every status count (total, present, absent, late, excused, partial) in
+    one query. Filters: student, class_obj, start_date, end_date.
+
+    Without group_by returns one dict. group_by is one of GROUPINGS
+    ('student', 'class_obj', 'day', 'week', 'month'): returns a list of
+    dicts ordered by that key, e.g. {'week': date(2026, 10, 12), 'total': 5, ...}.
+
+    Without an explicit queryset the counts come from the rollup tables
+    when they cover the filters (see rollup_source).
+    """
+    if group_by is not None and group_by not in GROUPINGS:
+        raise ValueError(f'Unknown grouping: {group_by}')
+    if queryset is None:
+        source = rollup_source(group_by, **filters)
+        if source is not None:
+            rollups, groupings = source
+            sums = {name: Coalesce(Sum(name), 0) for name in COUNT_FIELDS}
+            return _summarize(rollups.order_by(), sums, groupings, group_by)
+    queryset = filter_attendance(queryset, **filters).order_by()
+    return _summarize(queryset, status_counts(), GROUPINGS, group_by)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def _daily_counts(queryset):
+    return queryset.order_by().values('class_obj_id', 'date').annotate(**status_counts())
+
+
+def _monthly_counts(queryset):
+    return (
+        queryset.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('student_id', 'class_obj_id', 'month')
+        .annotate(**status_counts())
+    )
+
+
+def _upsert_rollups(model, rows, unique_fields):
+    model.objects.bulk_create(
+        [model(**row) for row in rows],
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=[*COUNT_FIELDS, 'updated_at'],
+    )
+
+
+def _delete_rollups(model, key_fields, keys):
+    if keys:
+        model.objects.filter(reduce(or_, (Q(**dict(zip(key_fields, key))) for key in keys))).delete()
+
+
+def refresh_attendance_rollups(keys):
+    """
+    Recompute the ClassDailyAttendance and StudentMonthlyAttendance rows
+    covering the given (student_id, class_obj_id, date) attendance keys
+    (no-op unless ATTENDANCE_ROLLUPS): one grouped query and one upsert per
+    table, and rows left with no attendance are deleted. Like
+    refresh_submission_counters, rollups are recounted rather than
+    incremented, so deletes and edits that move a row to another day keep
+    them right. Returns the number of rollup rows written.
+    """
+    if not settings.ATTENDANCE_ROLLUPS:
+        return 0
+    keys = {
+        (student_id, class_id, _as_date(day))
+        for student_id, class_id, day in keys
+        if student_id is not None and class_id is not None and _as_date(day) is not None
+    }
+    if not keys:
+        return 0
+    days = {(class_id, day) for _, class_id, day in keys}
+    months = {(student_id, class_id, day.replace(day=1)) for student_id, class_id, day in keys}
+    class_ids = {class_id for class_id, _ in days}
+    first_month = min(month for _, _, month in months)
+    last_day = max(day for _, _, day in keys)
+
+    with transaction.atomic():
+        daily = [
+            row for row in _daily_counts(
+                Attendance.objects.filter(class_obj_id__in=class_ids, date__in={day for _, day in days})
+            )
+            if (row['class_obj_id'], row['date']) in days
+        ]
+        _upsert_rollups(ClassDailyAttendance, daily, ['class_obj', 'date'])
+        _delete_rollups(
+            ClassDailyAttendance, ('class_obj_id', 'date'),
+            days - {(row['class_obj_id'], row['date']) for row in daily},
+        )
+
+        monthly = [
+            row for row in _monthly_counts(
+                Attendance.objects.filter(
+                    student_id__in={student_id for student_id, _, _ in months},
+                    class_obj_id__in=class_ids,
+                    date__gte=first_month,
+                    date__lt=_next_month(last_day),
+                )
+            )
+            if (row['student_id'], row['class_obj_id'], row['month']) in months
+        ]
+        _upsert_rollups(StudentMonthlyAttendance, monthly, ['student', 'class_obj', 'month'])
+        _delete_rollups(
+            StudentMonthlyAttendance, ('student_id', 'class_obj_id', 'month'),
+            months - {(row['student_id'], row['class_obj_id'], row['month']) for row in monthly},
+        )
+    return len(daily) + len(monthly)
+
+
+def rebuild_attendance_rollups(class_ids=None):
+    """
+    Replace the rollup rows of the given classes (default: all) with fresh
+    counts from attendance, streaming the grouped rows in batches.
+    Returns {'daily': n, 'monthly': n} rows written.
+    """
+    source = Attendance.objects.all()
+    daily_rollups = ClassDailyAttendance.objects.all()
+    monthly_rollups = StudentMonthlyAttendance.objects.all()
+    if class_ids is not None:
+        source = source.filter(class_obj_id__in=class_ids)
+        daily_rollups = daily_rollups.filter(class_obj_id__in=class_ids)
+        monthly_rollups = monthly_rollups.filter(class_obj_id__in=class_ids)
+
+    written = {}
+    with transaction.atomic():
+        daily_rollups.delete()
+        monthly_rollups.delete()
+        for name, model, rows in (
+            ('daily', ClassDailyAttendance, _daily_counts(source)),
+            ('monthly', StudentMonthlyAttendance, _monthly_counts(source)),
+        ):
+            written[name] = 0
+            rows = rows.iterator(chunk_size=ROLLUP_BATCH_SIZE)
+            while batch := list(islice(rows, ROLLUP_BATCH_SIZE)):
+                model.objects.bulk_create([model(**row) for row in batch])
+                written[name] += len(batch)
+    return written
+
+
+def report_batch_params(scope, scope_id, start_date, end_date):
+    """Validated (scope, scope_id, start, end) for generate_attendance_reports; raises ValueError."""
+    if scope not in REPORT_SCOPES:
+        raise ValueError(f"scope must be one of: {', '.join(REPORT_SCOPES)}")
+    scope_id = _as_id(scope_id)
+    if scope_id is None:
+        raise ValueError(f'A valid {scope} id is required')
+    start, end = _as_date(start_date), _as_date(end_date)
+    if start is None or end is None:
+        raise ValueError('start_date and end_date must be valid dates (YYYY-MM-DD)')
+    if start > end:
+        raise ValueError('start_date must not be after end_date')
+    return scope, scope_id, start, end
+
+
+def generate_attendance_reports(scope, scope_id, start_date, end_date):
+    """
+    One AttendanceReport per student and class in a class_obj, school or
+    academic_year (scope) for start_date..end_date: every actively enrolled
+    student, plus anyone with attendance in the range. All counts come from
+    one grouped query (over the monthly rollup when it covers the range)
+    and the reports are written with bulk_create. In the same transaction,
+    with the scope's classes locked, earlier reports for the same student,
+    class and range are deleted, so reruns and retried jobs replace reports
+    instead of duplicating them.
+
+    Returns {'scope', 'scope_id', 'start_date', 'end_date', 'created', 'replaced'}.
+    """
+    scope, scope_id, start, end = report_batch_params(scope, scope_id, start_date, end_date)
+    in_scope = {REPORT_SCOPES[scope]: scope_id}
+    if settings.ATTENDANCE_ROLLUPS and _whole_months(start, end):
+        rows = (
+            StudentMonthlyAttendance.objects.filter(**in_scope, month__gte=start, month__lte=end)
+            .values('student_id', 'class_obj_id')
+            .annotate(**{name: Sum(name) for name in COUNT_FIELDS})
+        )
+    else:
+        rows = (
+            Attendance.objects.filter(**in_scope, date__gte=start, date__lte=end)
+            .values('student_id', 'class_obj_id')
+            .annotate(**status_counts())
+        )
+    counts = {(row.pop('student_id'), row.pop('class_obj_id')): row for row in rows.order_by()}
+    enrolled = (
+        StudentClass.objects.filter(**in_scope, is_active=True)
+        .order_by()
+        .values_list('student_id', 'class_obj_id')
+        .distinct()
+    )
+    no_attendance = dict.fromkeys(COUNT_FIELDS, 0)
+
+    reports = []
+    for student_id, class_id in sorted(counts.keys() | set(enrolled)):
+        row = counts.get((student_id, class_id), no_attendance)
+        reports.append(AttendanceReport(
+            student_id=student_id,
+            class_obj_id=class_id,
+            start_date=start,
+            end_date=end,
+            total_days=row['total'],
+            present_days=row['present'],
+            absent_days=row['absent'],
+            late_days=row['late'],
+            excused_days=row['excused'],
+            partial_days=row['partial'],
+            attendance_percentage=attendance_percentage(row),
+        ))
+    keys = {(report.student_id, report.class_obj_id) for report in reports}
+    with transaction.atomic():
+        # Serializes concurrent runs over the same classes (e.g. a requeued job)
+        list(Class.objects.select_for_update().filter(**{CLASS_SCOPES[scope]: scope_id}).values_list('id'))
+        previous = [
+            report_id
+            for report_id, student_id, class_id in AttendanceReport.objects.filter(
+                **in_scope, start_date=start, end_date=end
+            ).values_list('id', 'student_id', 'class_obj_id')
+            if (student_id, class_id) in keys
+        ]
+        AttendanceReport.objects.filter(pk__in=previous).delete()
+        AttendanceReport.objects.bulk_create(reports, batch_size=REPORT_BATCH_SIZE)
+    return {
+        'scope': scope,
+        'scope_id': scope_id,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'created': len(reports),
+        'replaced': len(previous),
+    }
+
+
+def _run_lengths(cells):
+    """[count, code, count, code, ...] runs of a bytes-like, row-major cell buffer."""
+    runs = []
+    previous, count = None, 0
+    for code in cells:
+        if code == previous:
+            count += 1
+            continue
+        if count:
+            runs += [count, previous]
+        previous, count = code, 1
+    if count:
+        runs += [count, previous]
+    return runs
+
+
+def attendance_matrix(class_obj, start_date, end_date, encoding='base64'):
+    """
+    A class's students x days attendance grid from one query.
+
+    rows are the students and columns the days with any attendance marked
+    in the class in the range (its school days). cells holds one code per
+    (row, column), row-major, indexing MATRIX_CODES (0 = not marked):
+    'base64' is a uint8 buffer, 'rle' a flat [count, code, ...] list.
+    """
+    if encoding not in MATRIX_ENCODINGS:
+        raise ValueError(f"encoding must be one of: {', '.join(MATRIX_ENCODINGS)}")
+    marks = list(
+        Attendance.objects
+        .filter(class_obj_id=class_obj, date__gte=start_date, date__lte=end_date)
+        .order_by()
+        .values_list('student_id', 'student__username', 'student__first_name', 'student__last_name', 'date', 'status')
+    )
+    students = {}
+    for student_id, username, first_name, last_name, _, _ in marks:
+        if student_id not in students:
+            students[student_id] = {
+                'id': student_id,
+                'username': username,
+                'name': f'{first_name} {last_name}'.strip(),
+            }
+    rows = sorted(students.values(), key=lambda student: (student['name'].lower(), student['username']))
+    row_index = {student['id']: index for index, student in enumerate(rows)}
+    dates = sorted({day for _, _, _, _, day, _ in marks})
+    column_index = {day: index for index, day in enumerate(dates)}
+
+    codes = {status: code for code, status in enumerate(MATRIX_CODES)}
+    cells = bytearray(len(rows) * len(dates))
+    for student_id, _, _, _, day, status in marks:
+        cells[row_index[student_id] * len(dates) + column_index[day]] = codes.get(status, 0)
+
+    return {
+        'class_obj': class_obj,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'rows': rows,
+        'columns': [day.isoformat() for day in dates],
+        'codes': MATRIX_CODES,
+        'encoding': encoding,
+        'cells': base64.b64encode(cells).decode('ascii') if encoding == 'base64' else _run_lengths(cells),
+    }
@@ -0,0 +1,36 @@
+"""
+Keep the attendance rollup tables in sync with attendance writes (only when
+ATTENDANCE_ROLLUPS is on). Bulk marking refreshes them itself; the
+rebuild_attendance_rollups command fixes anything written behind their back
+(QuerySet.update(), raw SQL).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Attendance
+from .services import refresh_attendance_rollups
+
+
+def _key(instance):
+    return (instance.student_id, instance.class_obj_id, instance.date)
+
+
+@receiver(pre_save, sender=Attendance, dispatch_uid='attendance_rollups_previous_key')
+def remember_previous_key(sender, instance, **kwargs):
+    # An edit may move the row to another student, class or day
+    if settings.ATTENDANCE_ROLLUPS and instance.pk is not None:
+        instance._rollup_previous_key = (
+            Attendance.objects.filter(pk=instance.pk).values_list('student_id', 'class_obj_id', 'date').first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Attendance, dispatch_uid='attendance_rollups')
+def attendance_changed(sender, instance, **kwargs):
+    if not settings.ATTENDANCE_ROLLUPS:
+        return
+    keys = [_key(instance)]
+    previous = getattr(instance, '_rollup_previous_key', None)
+    if previous and previous != keys[0]:
+        keys.append(previous)
+    transaction.on_commit(lambda: refresh_attendance_rollups(keys))
@@ -0,0 +1,243 @@
+import base64
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from academics.models import AcademicYear, Class, School, StudentClass
+from .models import Attendance, AttendanceReport, ClassDailyAttendance, StudentMonthlyAttendance
+from .services import attendance_matrix, bulk_mark_attendance, generate_attendance_reports, rebuild_attendance_rollups
+
+
+def make_class(student_count):
+    """A Grade 5 class for 2026 with student_count enrolled students."""
+    school = School.objects.create(name='School', code='S1')
+    year = AcademicYear.objects.create(school=school, name='2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    class_obj = Class.objects.create(school=school, academic_year=year, name='Grade 5', code='G5', grade_level=5)
+    students = [get_user_model().objects.create(username=f'student{index}') for index in range(student_count)]
+    for student in students:
+        StudentClass.objects.create(student=student, class_obj=class_obj, academic_year=year)
+    return class_obj, students
+
+
+class GenerateAttendanceReportsTests(TestCase):
+    def setUp(self):
+        self.class_obj, students = make_class(5)
+        Attendance.objects.create(student=students[0], class_obj=self.class_obj, date=date(2026, 3, 2), status='PRESENT')
+        Attendance.objects.create(student=students[0], class_obj=self.class_obj, date=date(2026, 3, 3), status='ABSENT')
+
+    def test_rerun_replaces_reports_for_the_same_range(self):
+        first = generate_attendance_reports('class_obj', self.class_obj.pk, '2026-03-01', '2026-03-31')
+        second = generate_attendance_reports('class_obj', self.class_obj.pk, '2026-03-01', '2026-03-31')
+        generate_attendance_reports('class_obj', self.class_obj.pk, '2026-04-01', '2026-04-30')
+
+        self.assertEqual((first['created'], first['replaced']), (5, 0))
+        self.assertEqual((second['created'], second['replaced']), (5, 5))
+        march = AttendanceReport.objects.filter(start_date=date(2026, 3, 1), end_date=date(2026, 3, 31))
+        self.assertEqual(march.count(), 5)
+        self.assertEqual(AttendanceReport.objects.count(), 10)
+        self.assertEqual(sorted(march.values_list('total_days', flat=True)), [0, 0, 0, 0, 2])
+
+
+class BulkMarkAttendanceTests(TestCase):
+    def setUp(self):
+        self.class_obj, self.students = make_class(3)
+        self.day = date(2026, 3, 2)
+
+    def test_upsert_reports_created_and_updated_rows(self):
+        Attendance.objects.create(student=self.students[0], class_obj=self.class_obj, date=self.day, status='ABSENT')
+
+        result = bulk_mark_attendance(
+            [
+                {'student': self.students[0].pk, 'status': 'PRESENT', 'remarks': 'Arrived'},
+                {'student': self.students[1].pk, 'status': 'LATE'},
+                {'student': self.students[2].pk, 'date': '2026-03-03'},
+            ],
+            class_obj=self.class_obj.pk, date='2026-03-02', marked_by=self.students[0].pk,
+        )
+
+        self.assertEqual(result, {'created': 2, 'updated': 1, 'rejected': []})
+        self.assertEqual(Attendance.objects.count(), 3)
+        updated = Attendance.objects.get(student=self.students[0], date=self.day)
+        self.assertEqual((updated.status, updated.remarks), ('PRESENT', 'Arrived'))
+        self.assertEqual(
+            set(Attendance.objects.values_list('student_id', 'date', 'status')),
+            {
+                (self.students[0].pk, self.day, 'PRESENT'),
+                (self.students[1].pk, self.day, 'LATE'),
+                (self.students[2].pk, date(2026, 3, 3), 'PRESENT'),
+            },
+        )
+
+        again = bulk_mark_attendance(
+            [{'student': self.students[1].pk, 'status': 'EXCUSED'}], class_obj=self.class_obj.pk, date=self.day,
+        )
+        self.assertEqual(again, {'created': 0, 'updated': 1, 'rejected': []})
+        self.assertEqual(Attendance.objects.get(student=self.students[1]).status, 'EXCUSED')
+
+    def test_rejects_invalid_entries_and_students_not_enrolled(self):
+        outsider = get_user_model().objects.create(username='outsider')
+
+        result = bulk_mark_attendance(
+            [
+                {'student': outsider.pk, 'status': 'PRESENT'},
+                {'student': self.students[0].pk, 'status': 'ASLEEP'},
+                {'student': self.students[1].pk, 'status': 'PRESENT'},
+                {'student': self.students[1].pk, 'status': 'ABSENT'},
+                {'student': 'abc'},
+                'not an entry',
+                {'student': self.students[2].pk, 'date': '2026-02-30'},
+            ],
+            class_obj=self.class_obj.pk, date='2026-03-02',
+        )
+
+        self.assertEqual((result['created'], result['updated']), (1, 0))
+        self.assertEqual(
+            [(item['index'], item['errors']) for item in result['rejected']],
+            [
+                (0, ['Student is not enrolled in this class']),
+                (1, ['Invalid status: ASLEEP']),
+                (3, ['Duplicate entry for this student, class and date']),
+                (4, ['A valid student id is required']),
+                (5, ['Expected an object']),
+                (6, ['A valid date (YYYY-MM-DD) is required']),
+            ],
+        )
+        self.assertEqual(list(Attendance.objects.values_list('student_id', 'status')), [(self.students[1].pk, 'PRESENT')])
+
+
+@override_settings(ATTENDANCE_ROLLUPS=True)
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        self.class_obj, self.students = make_class(2)
+
+    def rollups(self):
+        daily = set(ClassDailyAttendance.objects.values_list('date', 'total', 'present', 'absent', 'late'))
+        monthly = set(StudentMonthlyAttendance.objects.values_list('student_id', 'month', 'total', 'present', 'absent', 'late'))
+        return daily, monthly
+
+    def assertMatchesRebuild(self):
+        kept = self.rollups()
+        rebuild_attendance_rollups()
+        self.assertEqual(kept, self.rollups())
+
+    def mark(self, student, day, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Attendance.objects.create(student=student, class_obj=self.class_obj, date=day, status=status)
+
+    def test_save_and_date_move_recount_both_days(self):
+        first, second = self.students
+        self.mark(first, date(2026, 3, 2), 'PRESENT')
+        moved = self.mark(second, date(2026, 3, 2), 'ABSENT')
+        self.assertEqual(self.rollups(), (
+            {(date(2026, 3, 2), 2, 1, 1, 0)},
+            {(first.pk, date(2026, 3, 1), 1, 1, 0, 0), (second.pk, date(2026, 3, 1), 1, 0, 1, 0)},
+        ))
+
+        moved.date, moved.status = date(2026, 4, 1), 'LATE'
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+
+        self.assertEqual(self.rollups(), (
+            {(date(2026, 3, 2), 1, 1, 0, 0), (date(2026, 4, 1), 1, 0, 0, 1)},
+            {(first.pk, date(2026, 3, 1), 1, 1, 0, 0), (second.pk, date(2026, 4, 1), 1, 0, 0, 1)},
+        ))
+        self.assertMatchesRebuild()
+
+    def test_delete_removes_emptied_rollups(self):
+        first, second = self.students
+        kept = self.mark(first, date(2026, 3, 2), 'PRESENT')
+        deleted = self.mark(second, date(2026, 3, 3), 'ABSENT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+
+        self.assertEqual(self.rollups(), (
+            {(date(2026, 3, 2), 1, 1, 0, 0)},
+            {(first.pk, date(2026, 3, 1), 1, 1, 0, 0)},
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.delete()
+        self.assertEqual(self.rollups(), (set(), set()))
+
+    def test_bulk_marking_refreshes_rollups(self):
+        first, second = self.students
+        self.mark(first, date(2026, 3, 2), 'ABSENT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_mark_attendance(
+                [
+                    {'student': first.pk, 'status': 'PRESENT'},
+                    {'student': second.pk, 'status': 'LATE'},
+                    {'student': second.pk, 'status': 'PRESENT', 'date': '2026-03-03'},
+                ],
+                class_obj=self.class_obj.pk, date='2026-03-02',
+            )
+
+        self.assertEqual(self.rollups(), (
+            {(date(2026, 3, 2), 2, 1, 0, 1), (date(2026, 3, 3), 1, 1, 0, 0)},
+            {(first.pk, date(2026, 3, 1), 1, 1, 0, 0), (second.pk, date(2026, 3, 1), 2, 1, 0, 1)},
+        ))
+        self.assertMatchesRebuild()
+
+    @override_settings(ATTENDANCE_ROLLUPS=False)
+    def test_disabled_rollups_are_left_alone(self):
+        self.mark(self.students[0], date(2026, 3, 2), 'PRESENT')
+        self.assertEqual(self.rollups(), (set(), set()))
+
+
+class AttendanceMatrixTests(TestCase):
+    def setUp(self):
+        self.class_obj, (self.zoe, self.adam, self.unmarked) = make_class(3)
+        get_user_model().objects.filter(pk=self.zoe.pk).update(first_name='Zoe')
+        get_user_model().objects.filter(pk=self.adam.pk).update(first_name='Adam', last_name='Ng')
+        for student, day, status in [
+            (self.zoe, date(2026, 3, 2), 'PRESENT'),
+            (self.zoe, date(2026, 3, 3), 'PRESENT'),
+            (self.zoe, date(2026, 3, 5), 'PRESENT'),
+            (self.adam, date(2026, 3, 2), 'ABSENT'),
+            (self.adam, date(2026, 3, 5), 'LATE'),
+            (self.adam, date(2026, 4, 1), 'PRESENT'),
+        ]:
+            Attendance.objects.create(student=student, class_obj=self.class_obj, date=day, status=status)
+        # [absent, unmarked, late] for Adam, [present] * 3 for Zoe
+        self.cells = [2, 0, 3, 1, 1, 1]
+
+    def test_base64_cells_are_a_row_major_uint8_grid(self):
+        matrix = attendance_matrix(self.class_obj.pk, date(2026, 3, 1), date(2026, 3, 31))
+
+        self.assertEqual([row['name'] for row in matrix['rows']], ['Adam Ng', 'Zoe'])
+        self.assertEqual([row['id'] for row in matrix['rows']], [self.adam.pk, self.zoe.pk])
+        self.assertEqual(matrix['columns'], ['2026-03-02', '2026-03-03', '2026-03-05'])
+        self.assertEqual(matrix['codes'], ['', 'PRESENT', 'ABSENT', 'LATE', 'EXCUSED', 'PARTIAL'])
+        self.assertEqual(matrix['encoding'], 'base64')
+        self.assertEqual(list(base64.b64decode(matrix['cells'])), self.cells)
+
+    def test_rle_cells_decode_to_the_same_grid(self):
+        matrix = attendance_matrix(self.class_obj.pk, date(2026, 3, 1), date(2026, 3, 31), encoding='rle')
+
+        self.assertEqual(matrix['cells'], [1, 2, 1, 0, 1, 3, 3, 1])
+        runs = matrix['cells']
+        self.assertEqual([code for count, code in zip(runs[::2], runs[1::2]) for _ in range(count)], self.cells)
+
+    def test_empty_range_and_unknown_encoding(self):
+        empty = attendance_matrix(self.class_obj.pk, date(2026, 5, 1), date(2026, 5, 31), encoding='rle')
+        self.assertEqual((empty['rows'], empty['columns'], empty['cells']), ([], [], []))
+        with self.assertRaises(ValueError):
+            attendance_matrix(self.class_obj.pk, date(2026, 3, 1), date(2026, 3, 31), encoding='png')
+
+    def test_matrix_endpoint(self):
+        url = '/api/attendance/attendance/matrix/'
+        self.client.force_login(self.adam)
+        response = self.client.get(url, {
+            'class_obj': self.class_obj.pk, 'start_date': '2026-03-01', 'end_date': '2026-03-31', 'encoding': 'rle',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cells'], [1, 2, 1, 0, 1, 3, 3, 1])
+
+        for params in (
+            {'start_date': '2026-03-01', 'end_date': '2026-03-31'},
+            {'class_obj': self.class_obj.pk, 'start_date': '2026-03-31', 'end_date': '2026-03-01'},
+            {'class_obj': self.class_obj.pk, 'start_date': '2026-01-01', 'end_date': '2027-12-31'},
+            {'class_obj': self.class_obj.pk, 'start_date': '2026-03-01', 'end_date': '2026-03-31', 'encoding': 'png'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
@@ -1,69 +1,119 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 from django.utils import timezone
-from django.db.models import Count, Q
 from .models import Attendance, AttendanceReport
 from .serializers import AttendanceSerializer, AttendanceReportSerializer
+from .services import (
+    GROUPINGS, MATRIX_ENCODINGS, REPORT_SCOPES, attendance_matrix, attendance_percentage,
+    attendance_summary, bulk_mark_attendance, generate_attendance_reports, report_batch_params
+)
+from jobs.services import enqueue
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     
     @action(detail=False, methods=['post'])
     def mark_bulk(self, request):
-        """Mark attendance for multiple students at once"""
+        """
+        Mark attendance for multiple students at once. Existing rows for the
+        same student, class and date are updated. Each entry may override
+        class_obj and date, so several classes can be marked in one call.
+        """
         data = request.data
-        class_obj_id = data.get('class_obj')
-        date = data.get('date')
         attendances = data.get('attendances', [])
+        if not isinstance(attendances, list):
+            return Response({'error': 'attendances must be a list'}, status=status.HTTP_400_BAD_REQUEST)
         
-        created_count = 0
-        for att_data in attendances:
-            serializer = AttendanceSerializer(data={
-                'student': att_data.get('student'),
-                'class_obj': class_obj_id,
-                'date': date,
-                'status': att_data.get('status', 'PRESENT'),
-                'remarks': att_data.get('remarks', ''),
-                'marked_by': request.user.id if request.user.is_authenticated else None,
-            })
-            if serializer.is_valid():
-                serializer.save()
-                created_count += 1
-        
+        result = bulk_mark_attendance(
+            attendances,
+            class_obj=data.get('class_obj'),
+            date=data.get('date'),
+            marked_by=request.user.id if request.user.is_authenticated else None,
+        )
+        count = result['created'] + result['updated']
         return Response({
-            'message': f'Marked attendance for {created_count} students',
-            'count': created_count
-        }, status=status.HTTP_201_CREATED)
+            'message': f'Marked attendance for {count} students',
+            'count': count,
+            **result,
+        }, status=status.HTTP_201_CREATED if count or not result['rejected'] else status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Get attendance statistics"""
-        class_obj_id = request.query_params.get('class_obj')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        queryset = Attendance.objects.all()
-        
-        if class_obj_id:
-            queryset = queryset.filter(class_obj_id=class_obj_id)
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
+        """
+        Get attendance statistics. Filters: class_obj, student, start_date,
+        end_date; ?group_by=student|class_obj|day|week|month adds per-group counts.
+        """
+        params = request.query_params
+        group_by = params.get('group_by')
+        if group_by and group_by not in GROUPINGS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(GROUPINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        filters = {
+            'class_obj': params.get('class_obj'),
+            'student': params.get('student'),
+            'start_date': params.get('start_date'),
+            'end_date': params.get('end_date'),
+        }
         
-        stats = queryset.values('status').annotate(count=Count('id'))
+        counts = attendance_summary(**filters)
+        response = {
+            'statistics': [
+                {'status': value, 'count': counts[value.lower()]}
+                for value, _ in Attendance.STATUS_CHOICES if counts[value.lower()]
+            ],
+            'counts': counts,
+            'total': counts['total'],
+        }
+        if group_by:
+            response['groups'] = attendance_summary(group_by=group_by, **filters)
+        return Response(response)
+    
+    @action(detail=False, methods=['get'])
+    def matrix(self, request):
+        """
+        Students x days grid for a class: ?class_obj=&start_date=&end_date=
+        and optional encoding=base64 (default, uint8 buffer) or rle.
+        Cell codes index the returned "codes" list; 0 means not marked.
+        """
+        params = request.query_params
+        class_obj = params.get('class_obj')
+        encoding = params.get('encoding', 'base64')
+        try:
+            start_date = parse_date(params.get('start_date', ''))
+            end_date = parse_date(params.get('end_date', ''))
+        except ValueError:
+            start_date = end_date = None
+        if not class_obj or not class_obj.isdigit():
+            return Response({'error': 'A valid class_obj id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date is None or end_date is None or start_date > end_date:
+            return Response(
+                {'error': 'start_date and end_date (YYYY-MM-DD, start first) are required'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if (end_date - start_date).days >= settings.ATTENDANCE_MATRIX_MAX_DAYS:
+            return Response(
+                {'error': f'At most {settings.ATTENDANCE_MATRIX_MAX_DAYS} days per matrix'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if encoding not in MATRIX_ENCODINGS:
+            return Response(
+                {'error': f"encoding must be one of: {', '.join(MATRIX_ENCODINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         
-        return Response({
-            'statistics': list(stats),
-            'total': queryset.count()
-        })
+        return Response(attendance_matrix(int(class_obj), start_date, end_date, encoding=encoding))
 
 
-class AttendanceReportViewSet(viewsets.ReadOnlyModelViewSet):
+class AttendanceReportViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = AttendanceReport.objects.all()
     serializer_class = AttendanceReportSerializer
     
@@ -76,35 +126,62 @@ class AttendanceReportViewSet(viewsets.ReadOnlyModelViewSet):
         start_date = data.get('start_date')
         end_date = data.get('end_date')
         
-        # Calculate attendance statistics
-        attendances = Attendance.objects.filter(
-            student_id=student_id,
-            class_obj_id=class_obj_id,
-            date__gte=start_date,
-            date__lte=end_date
+        # Calculate attendance statistics (one query)
+        counts = attendance_summary(
+            student=student_id, class_obj=class_obj_id, start_date=start_date, end_date=end_date
         )
         
-        total_days = attendances.count()
-        present_days = attendances.filter(status='PRESENT').count()
-        absent_days = attendances.filter(status='ABSENT').count()
-        late_days = attendances.filter(status='LATE').count()
-        excused_days = attendances.filter(status='EXCUSED').count()
-        
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-        
         report = AttendanceReport.objects.create(
             student_id=student_id,
             class_obj_id=class_obj_id,
             start_date=start_date,
             end_date=end_date,
-            total_days=total_days,
-            present_days=present_days,
-            absent_days=absent_days,
-            late_days=late_days,
-            excused_days=excused_days,
-            attendance_percentage=attendance_percentage
+            total_days=counts['total'],
+            present_days=counts['present'],
+            absent_days=counts['absent'],
+            late_days=counts['late'],
+            excused_days=counts['excused'],
+            partial_days=counts['partial'],
+            attendance_percentage=attendance_percentage(counts)
         )
         
         serializer = AttendanceReportSerializer(report)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-
+    
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        """
+        Generate reports for every enrolled student of one class_obj, school
+        or academic_year between start_date and end_date. A class is done in
+        the request; schools and academic years (or "background": true) are
+        queued as a job to poll.
+        """
+        data = request.data
+        scopes = [scope for scope in REPORT_SCOPES if data.get(scope)]
+        if len(scopes) != 1:
+            return Response(
+                {'error': f"Give exactly one of: {', '.join(REPORT_SCOPES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            scope, scope_id, start, end = report_batch_params(
+                scopes[0], data[scopes[0]], data.get('start_date'), data.get('end_date')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if scope != 'class_obj' or data.get('background'):
+            payload = {'scope': scope, 'scope_id': scope_id, 'start_date': start.isoformat(), 'end_date': end.isoformat()}
+            job = enqueue('attendance_reports', payload, user=request.user)
+            return Response({
+                'message': 'Attendance report generation queued',
+                **payload,
+                'job_id': job.id,
+                'status': job.status,
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        result = generate_attendance_reports(scope, scope_id, start, end)
+        return Response({
+            'message': f"Generated {result['created']} attendance reports",
+            **result,
+        }, status=status.HTTP_201_CREATED)
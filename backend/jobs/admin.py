@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress_done', 'progress_total', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['kind', 'locked_by']
+    raw_id_fields = ['created_by']
+    readonly_fields = ['percentage']
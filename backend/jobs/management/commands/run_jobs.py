@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.services import claim_next, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs (AI grading, feedback generation) from the jobs table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS)
+        parser.add_argument('--pool', choices=['thread', 'process'], default=settings.JOB_POOL)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if options['pool'] == 'process':
+            # Spawn rather than fork so children never share the parent's DB connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.stdout.write(f"Worker {worker_id} started ({options['pool']} pool, {workers} workers)")
+        in_flight = set()
+        last_stale_check = 0
+        try:
+            while not self._stopping:
+                in_flight = {future for future in in_flight if not future.done()}
+
+                if time.monotonic() - last_stale_check > settings.JOB_STALE_SECONDS:
+                    requeued, failed = requeue_stale()
+                    if requeued or failed:
+                        self.stdout.write(f'Requeued {requeued} stale jobs, failed {failed} out of attempts')
+                    last_stale_check = time.monotonic()
+
+                claimed = False
+                while len(in_flight) < workers:
+                    job = claim_next(worker_id)
+                    if job is None:
+                        break
+                    claimed = True
+                    self.stdout.write(f'Running job {job.pk} ({job.kind}), attempt {job.attempts}')
+                    in_flight.add(executor.submit(run_job, job.pk))
+
+                if options['once'] and not claimed and not in_flight:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            executor.shutdown(wait=True)
+            self.stdout.write(f'Worker {worker_id} stopped')
+
+    def _stop(self, signum, frame):
+        self._stopping = True
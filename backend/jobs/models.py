@@ -0,0 +1,62 @@
+from django.db import models
+from django.db.models import JSONField
+from django.conf import settings
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Background job, claimed and run by `manage.py run_jobs`.
+    kind selects the handler from settings.JOB_HANDLERS.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=100)
+    payload = JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    result = JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='idx_jobs_status_run_after'),
+            models.Index(fields=['-created_at', '-id'], name='idx_jobs_created_id'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.status}"
+    
+    @property
+    def percentage(self):
+        if self.progress_total > 0:
+            return round(self.progress_done / self.progress_total * 100, 2)
+        return 100 if self.status == 'SUCCEEDED' else 0
+    
+    def set_progress(self, done, total=None):
+        """Record progress from inside a handler (also serves as a heartbeat)."""
+        self.progress_done = done
+        if total is not None:
+            self.progress_total = total
+        Job.objects.filter(pk=self.pk).update(
+            progress_done=self.progress_done,
+            progress_total=self.progress_total,
+            updated_at=timezone.now(),
+        )
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    percentage = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'payload', 'status', 'progress_done', 'progress_total',
+            'percentage', 'result', 'error', 'attempts', 'max_attempts',
+            'created_by', 'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
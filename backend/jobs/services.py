@@ -0,0 +1,128 @@
+"""
+Services for enqueueing, claiming and running background jobs
+"""
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3):
+    """Create a PENDING job. The handler for `kind` must be listed in JOB_HANDLERS."""
+    if kind not in settings.JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts,
+    )
+
+
+def claim_next(worker_id):
+    """
+    Claim the oldest runnable job. SELECT ... FOR UPDATE SKIP LOCKED lets
+    several workers poll the same table without handing out a job twice.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='PENDING', run_after__lte=timezone.now())
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'RUNNING'
+        job.locked_by = worker_id
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'locked_by', 'attempts', 'started_at', 'updated_at'])
+        return job
+
+
+def run_job(job_id):
+    """
+    Run a claimed job with its handler and record the outcome. Failed jobs are
+    retried with exponential backoff until max_attempts is reached.
+    Safe to call in a worker thread or process. A heartbeat thread keeps
+    updated_at fresh while the handler runs, so requeue_stale() only picks
+    up jobs whose worker died, not long handlers that never report progress.
+    """
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, stop_heartbeat), daemon=True)
+    try:
+        job = Job.objects.get(pk=job_id)
+        heartbeat.start()
+        try:
+            handler = import_string(settings.JOB_HANDLERS[job.kind])
+            result = handler(job)
+        except Exception as e:
+            print(f'Job {job.pk} ({job.kind}) failed: {e}')
+            job.error = traceback.format_exc()
+            job.finished_at = timezone.now()
+            if job.attempts < job.max_attempts:
+                job.status = 'PENDING'
+                job.run_after = timezone.now() + timedelta(seconds=settings.JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1)))
+                job.locked_by = None
+            else:
+                job.status = 'FAILED'
+            job.save(update_fields=['status', 'error', 'finished_at', 'run_after', 'locked_by', 'updated_at'])
+            return job.status
+
+        job.status = 'SUCCEEDED'
+        job.result = result
+        job.error = None
+        job.finished_at = timezone.now()
+        if job.progress_total and job.progress_done < job.progress_total:
+            job.progress_done = job.progress_total
+        job.save(update_fields=['status', 'result', 'error', 'finished_at', 'progress_done', 'updated_at'])
+        return job.status
+    finally:
+        stop_heartbeat.set()
+        if heartbeat.is_alive():
+            heartbeat.join()
+        connection.close()
+
+
+def _heartbeat(job_id, stop):
+    """Touch a RUNNING job's updated_at every JOB_HEARTBEAT_SECONDS until stopped."""
+    try:
+        while not stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            Job.objects.filter(pk=job_id, status='RUNNING').update(updated_at=timezone.now())
+    except Exception as e:
+        print(f'Job {job_id} heartbeat failed: {e}')
+    finally:
+        connection.close()
+
+
+def requeue_stale(stale_after=None):
+    """
+    Put RUNNING jobs back in the queue when their worker stopped sending
+    heartbeats for JOB_STALE_SECONDS, e.g. after a crash. The lost run
+    counts as an attempt (attempts is bumped on claim), so a job that keeps
+    killing its worker is marked FAILED once it has used max_attempts.
+    Returns (requeued, failed).
+    """
+    stale_after = stale_after or settings.JOB_STALE_SECONDS
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', updated_at__lt=now - timedelta(seconds=stale_after))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED',
+        error='Worker stopped responding',
+        locked_by=None,
+        finished_at=now,
+        updated_at=now,
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='PENDING',
+        locked_by=None,
+        updated_at=now,
+    )
+    return requeued, failed
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from assignments.tests import SHORT_ANSWER, make_assignment
+from .models import Job
+
+
+class JobApiTests(TestCase):
+    def setUp(self):
+        self.assignment = make_assignment([SHORT_ANSWER])
+        self.teacher = self.assignment.teacher
+        self.client.force_login(self.teacher)
+
+    def test_ai_grade_queues_a_job_the_requester_can_poll(self):
+        response = self.client.post(f'/api/assignments/assignments/{self.assignment.pk}/ai_grade/')
+
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.json()['job_id'])
+        self.assertEqual((job.kind, job.status, job.created_by), ('ai_grade', 'PENDING', self.teacher))
+        self.assertEqual(job.payload, {'assignment_id': self.assignment.pk})
+
+        detail = self.client.get(f'/api/jobs/{job.pk}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['status'], 'PENDING')
+
+    def test_jobs_are_only_visible_to_their_requester(self):
+        own = Job.objects.create(kind='ai_grade', created_by=self.teacher)
+        other = Job.objects.create(kind='ai_grade', created_by=get_user_model().objects.create(username='other'))
+        Job.objects.create(kind='ai_grade')
+
+        listed = self.client.get('/api/jobs/').json()['results']
+        self.assertEqual([job['id'] for job in listed], [own.pk])
+        self.assertEqual(self.client.get(f'/api/jobs/{other.pk}/').status_code, 404)
+
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/jobs/').json()['results'], [])
@@ -0,0 +1,19 @@
+from rest_framework import viewsets
+from .models import Job
+from .serializers import JobSerializer
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
+
+
+class JobViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ReadOnlyModelViewSet):
+    """Job status and progress, for the jobs the requesting user queued"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    # Job.percentage is a model property
+    field_dependencies = {'percentage': ('progress_done', 'progress_total', 'status')}
+
+    def get_queryset(self):
+        # Payloads and results carry student scores and feedback
+        user = self.request.user
+        if not user.is_authenticated:
+            return Job.objects.none()
+        return super().get_queryset().filter(created_by=user)
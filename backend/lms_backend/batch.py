@@ -0,0 +1,160 @@
+"""
+POST /api/batch: run several API calls in one round trip.
+
+    {"parallel": true, "requests": [
+        {"id": "assignment", "method": "GET", "path": "/api/assignments/assignments/12/"},
+        {"id": "submissions", "method": "GET", "path": "/api/assignments/assignments/12/submissions/"}
+    ]}
+
+A bare array of sub-requests is accepted too. Each sub-request is resolved
+with the project URLconf and its view called in-process, as the same user
+(session, token and CSRF headers are inherited from the batch request), so
+no new HTTP connection is made. The reply lists one {id, status, headers,
+body} per sub-request, in order; a failing sub-request doesn't fail the
+batch. With "parallel": true and only GET/HEAD sub-requests, they run
+concurrently on a thread pool; otherwise they run one after another.
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import orjson
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+BATCH_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+SAFE_METHODS = ('GET', 'HEAD')
+# Returned per sub-response when the view set them
+FORWARDED_HEADERS = ('Content-Type', 'Location', 'ETag', 'Last-Modified', 'Cache-Control')
+# Batch-request headers that don't apply to its sub-requests
+_DROPPED_META = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_ACCEPT_ENCODING', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+
+def _error(item_id, status_code, message):
+    return {'id': item_id, 'status': status_code, 'headers': {}, 'body': {'error': message}}
+
+
+class BatchView(APIView):
+    """Run up to API_BATCH_MAX_REQUESTS API calls in one request."""
+
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            items, parallel = data, False
+        elif isinstance(data, dict) and isinstance(data.get('requests'), list):
+            items, parallel = data['requests'], bool(data.get('parallel'))
+        else:
+            return Response({'error': 'Expected a list of requests'}, status=status.HTTP_400_BAD_REQUEST)
+        if not items:
+            return Response({'error': 'No requests given'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.API_BATCH_MAX_REQUESTS:
+            return Response(
+                {'error': f'At most {settings.API_BATCH_MAX_REQUESTS} requests per batch'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        parent = request._request
+        read_only = all(isinstance(item, dict) and str(item.get('method', 'GET')).upper() in SAFE_METHODS for item in items)
+        if parallel and read_only and len(items) > 1:
+            workers = min(len(items), settings.API_BATCH_MAX_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda item: self._dispatch_in_thread(parent, item), items))
+        else:
+            results = [self.dispatch_one(parent, item) for item in items]
+        return Response({'responses': results})
+
+    def _dispatch_in_thread(self, parent, item):
+        try:
+            return self.dispatch_one(parent, item)
+        finally:
+            # Worker threads open their own connections; don't leak them
+            connections.close_all()
+
+    def dispatch_one(self, parent, item):
+        """Resolve and run one sub-request; always returns a result dict."""
+        if not isinstance(item, dict):
+            return _error(None, status.HTTP_400_BAD_REQUEST, 'Each request must be an object')
+        item_id = item.get('id')
+        method = str(item.get('method', 'GET')).upper()
+        path = item.get('path')
+        if method not in BATCH_METHODS:
+            return _error(item_id, status.HTTP_405_METHOD_NOT_ALLOWED, f'Unsupported method: {method}')
+        if not isinstance(path, str) or not path.startswith('/'):
+            return _error(item_id, status.HTTP_400_BAD_REQUEST, 'path must be an absolute path')
+
+        url = urlsplit(path)
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return _error(item_id, status.HTTP_404_NOT_FOUND, f'No route for {url.path}')
+        if getattr(match.func, 'view_class', None) is type(self):
+            return _error(item_id, status.HTTP_400_BAD_REQUEST, 'Batches cannot be nested')
+
+        sub_request = self._build_request(parent, method, url, item)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+        except Exception as e:
+            print(f'Error running batch request {method} {path}: {e}')
+            return _error(item_id, status.HTTP_500_INTERNAL_SERVER_ERROR, 'Request failed')
+
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        content_type = response.get('Content-Type', '')
+        if 'json' in content_type and content:
+            try:
+                body = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                body = content.decode(errors='replace')
+        else:
+            body = content.decode(errors='replace') if content else None
+        return {
+            'id': item_id,
+            'status': response.status_code,
+            'headers': {name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)},
+            'body': body,
+        }
+
+    @staticmethod
+    def _build_request(parent, method, url, item):
+        """A WSGIRequest for the sub-request, carrying the batch request's identity."""
+        environ = {key: value for key, value in parent.META.items() if key not in _DROPPED_META}
+        body = item.get('body')
+        content_type = None
+        if body is None:
+            payload = b''
+        elif isinstance(body, str):
+            payload, content_type = body.encode(), 'text/plain; charset=utf-8'
+        else:
+            payload, content_type = orjson.dumps(body), 'application/json'
+        for name, value in (item.get('headers') or {}).items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                content_type = value
+            else:
+                environ[f'HTTP_{key}'] = str(value)
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': url.query,
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+        })
+        if content_type:
+            environ['CONTENT_TYPE'] = content_type
+        sub_request = WSGIRequest(environ)
+        # Set by middleware on the batch request; the sub-request skips middleware
+        for attribute in ('session', 'user', 'auth', 'csrf_processing_done'):
+            if hasattr(parent, attribute):
+                setattr(sub_request, attribute, getattr(parent, attribute))
+        sub_request.COOKIES = parent.COOKIES
+        return sub_request
@@ -0,0 +1,170 @@
+"""
+Project middleware
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+import orjson
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+logger = logging.getLogger('lms_backend.queries')
+
+# Dynamic responses: brotli 5 is about as fast as gzip 6 and noticeably smaller
+BROTLI_QUALITY = 5
+
+
+def accepted_encodings(header):
+    """Codings from an Accept-Encoding header with a non-zero q-value."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress JSON responses of at least API_COMPRESSION_MIN_BYTES with brotli
+    (when installed and accepted) or gzip. Streaming responses (SSE) and
+    responses that already have a Content-Encoding are left alone; static
+    files are precompressed by WhiteNoise.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if 'json' not in response.get('Content-Type', ''):
+            return response
+        if len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding, compressed = 'br', brotli.compress(response.content, quality=BROTLI_QUALITY)
+        elif 'gzip' in accepted or '*' in accepted:
+            encoding, compressed = 'gzip', compress_string(response.content)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # A strong ETag can't describe the encoded body (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more queries than its budget (raised when QUERY_BUDGET_STRICT)."""
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() hook collecting (sql, seconds) per statement."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((sql, time.perf_counter() - started))
+
+    @property
+    def seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    def slowest(self, limit):
+        return sorted(self.statements, key=lambda statement: statement[1], reverse=True)[:limit]
+
+    def repeated(self, limit):
+        """Statements run more than once with different parameters: the N+1 signature."""
+        counts = Counter(sql for sql, _ in self.statements)
+        return [(sql, count) for sql, count in counts.most_common(limit) if count > 1]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record every query a request runs (count, total DB time, slowest and
+    repeated statements), add them to the `Server-Timing` header, log one
+    JSON line per request to the `lms_backend.queries` logger and check the
+    count against the route's budget (QUERY_BUDGETS by URL name, else
+    QUERY_BUDGET_DEFAULT). Over budget is a warning, or a
+    QueryBudgetExceeded error when QUERY_BUDGET_STRICT (tests).
+
+    Queries run while a streaming response is being consumed happen after
+    this middleware returns and aren't counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSTRUMENTATION:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        count, db_seconds = len(recorder.statements), recorder.seconds
+        if settings.QUERY_TIMING_HEADER:
+            timing = f'db;dur={db_seconds * 1000:.1f};desc="{count} SQL", app;dur={elapsed * 1000:.1f}'
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else None
+        budget = settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET_DEFAULT)
+        over_budget = bool(budget) and count > budget
+        level = logging.WARNING if over_budget else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, orjson.dumps({
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'queries': count,
+                'budget': budget or None,
+                'db_ms': round(db_seconds * 1000, 2),
+                'total_ms': round(elapsed * 1000, 2),
+                'slowest': [
+                    {'ms': round(seconds * 1000, 2), 'sql': sql}
+                    for sql, seconds in recorder.slowest(settings.QUERY_LOG_SLOWEST)
+                ],
+                'repeated': [{'count': n, 'sql': sql} for sql, n in recorder.repeated(settings.QUERY_LOG_SLOWEST)],
+            }).decode())
+        if over_budget and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ({route}) ran {count} queries, budget is {budget}'
+            )
+        return response
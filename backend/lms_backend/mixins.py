@@ -0,0 +1,370 @@
+"""
+Shared ViewSet mixins
+"""
+import hashlib
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import HyperlinkedRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .renderers import NDJSONRenderer, dumps
+
+
+def _walk_serializer(serializer, model, prefix, to_many, select, prefetch, names=None):
+    for name, field in serializer.fields.items():
+        if field.write_only or (names is not None and name not in names):
+            continue
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        is_nested = isinstance(nested, serializers.BaseSerializer)
+
+        if field.source == '*':
+            if is_nested:
+                _walk_serializer(nested, model, prefix, to_many, select, prefetch)
+            continue
+
+        current, path, many = model, prefix, to_many
+        parts = field.source.split('.')
+        for index, part in enumerate(parts):
+            try:
+                model_field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                # A property or method: nothing more to derive
+                break
+            if not model_field.is_relation or model_field.related_model is None:
+                break
+            last = index == len(parts) - 1
+            if last and not is_nested and isinstance(field, (PrimaryKeyRelatedField, HyperlinkedRelatedField)):
+                # Rendered from the local <fk>_id column, no join needed
+                break
+
+            path = f'{path}__{part}' if path else part
+            many = many or model_field.many_to_many or model_field.one_to_many
+            (prefetch if many else select).add(path)
+            current = model_field.related_model
+
+            if last and is_nested:
+                _walk_serializer(nested, current, path, many, select, prefetch)
+
+
+# Keyed by client-chosen ?fields= sets too, so bounded
+@lru_cache(maxsize=1024)
+def related_paths(serializer_class, names=None):
+    """
+    Derive (select_related, prefetch_related) lookups for a ModelSerializer
+    from its fields' dotted `source` paths and nested serializers.
+    Forward FKs and one-to-ones are joined; anything reached through a
+    reverse FK or many-to-many is prefetched.
+    names: a frozenset of top-level fields to consider (default: all).
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return (), ()
+    select, prefetch = set(), set()
+    _walk_serializer(serializer_class(), model, '', False, select, prefetch, names)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    """Names of the fields a serializer renders."""
+    return tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+@lru_cache(maxsize=1024)
+def deferred_columns(serializer_class, names=None, keep=frozenset()):
+    """
+    Plain columns that none of the rendered fields (`names`, default: all)
+    read, safe to defer(). Relations stay loaded (select_related can't
+    traverse a deferred FK) and so do the columns in `keep`.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return ()
+    kept = set(keep)
+    for name, field in serializer_class().fields.items():
+        if field.write_only or field.source == '*' or (names is not None and name not in names):
+            continue
+        kept.add(field.source.split('.')[0])
+    return tuple(sorted(
+        model_field.name for model_field in model._meta.concrete_fields
+        if not model_field.is_relation and not model_field.primary_key and model_field.name not in kept
+    ))
+
+
+class OptimizedQuerySetMixin:
+    """
+    Apply select_related/prefetch_related derived from the serializer, so
+    list endpoints don't issue one query per row for `source='fk.field'`
+    columns and nested serializers.
+
+    Relations read inside SerializerMethodFields can't be discovered; list
+    them in extra_select_related / extra_prefetch_related.
+
+    On list/retrieve, columns no rendered field reads are defer()red, and
+    ?fields=a,b renders only those fields (?exclude=a,b everything else),
+    dropping their joins and columns too, so large JSON/text columns are
+    only fetched when shown. Columns read by SerializerMethodFields or model
+    properties can't be discovered either; map the field to them in
+    field_dependencies so they are loaded whenever it is rendered.
+    """
+    extra_select_related = ()
+    extra_prefetch_related = ()
+    field_dependencies = {}
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Derive the lookups once when the ViewSet class is created
+        if getattr(cls, 'serializer_class', None) is not None:
+            related_paths(cls.serializer_class)
+
+    def get_sparse_fields(self):
+        """The frozenset of fields requested via ?fields= / ?exclude=, or None for all."""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        self._sparse_fields = None
+        request = getattr(self, 'request', None)
+        if request is None or getattr(self, 'action', None) not in self.sparse_fieldset_actions:
+            return None
+        params = request.query_params
+        if 'fields' not in params and 'exclude' not in params:
+            return None
+
+        available = readable_fields(self.get_serializer_class())
+        requested = {}
+        for param in ('fields', 'exclude'):
+            names = {name.strip() for name in params.get(param, '').split(',') if name.strip()}
+            unknown = names.difference(available)
+            if unknown:
+                raise ValidationError({param: f"Unknown fields: {', '.join(sorted(unknown))}"})
+            requested[param] = names
+        names = requested['fields'] or set(available)
+        self._sparse_fields = frozenset(names - requested['exclude'])
+        return self._sparse_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        names = self.get_sparse_fields()
+        select, prefetch = related_paths(serializer_class, names)
+        select = [*select, *self.extra_select_related]
+        prefetch = [*prefetch, *self.extra_prefetch_related]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if getattr(self, 'action', None) in self.sparse_fieldset_actions:
+            deferred = deferred_columns(serializer_class, names, frozenset(self.get_kept_columns(queryset.model, names)))
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_kept_columns(self, model, names):
+        """Columns of `model` never deferred when `names` (None: all fields) are rendered."""
+        # Ordering columns are read back for pagination cursors
+        keep = {item.lstrip('-') for item in model._meta.ordering if isinstance(item, str)}
+        for name, columns in self.field_dependencies.items():
+            if names is None or name in names:
+                keep.update(columns)
+        return keep
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+            for name in list(target.fields):
+                if name not in names:
+                    del target.fields[name]
+        return serializer
+
+
+class StreamingListMixin:
+    """
+    Streaming list mode for large exports: `Accept: application/x-ndjson`
+    (or ?format=ndjson) streams one JSON object per line, and ?stream=1
+    streams a plain JSON array. Either way the whole filtered queryset is
+    read with .iterator(chunk_size) and serialized a chunk at a time, so
+    worker memory stays flat however many rows there are. No pagination
+    is applied.
+    """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
+    def is_streaming(self, request):
+        return isinstance(request.accepted_renderer, NDJSONRenderer) or request.query_params.get('stream') == '1'
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_streaming(request):
+            return super().list(request, *args, **kwargs)
+        ndjson = isinstance(request.accepted_renderer, NDJSONRenderer)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # One bound serializer (and sparse fieldset) reused for every row
+        serializer = self.get_serializer()
+        rows = (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=settings.API_STREAM_CHUNK_SIZE))
+        if ndjson:
+            content, content_type = self._ndjson_chunks(rows), NDJSONRenderer.media_type
+        else:
+            content, content_type = self._json_array_chunks(rows), 'application/json'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        # Stop nginx and similar proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def _chunks(rows):
+        """Encoded rows, grouped so each write carries a chunk of rows."""
+        chunk = []
+        for row in rows:
+            chunk.append(dumps(row))
+            if len(chunk) == settings.API_STREAM_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _ndjson_chunks(self, rows):
+        try:
+            for chunk in self._chunks(rows):
+                yield b'\n'.join(chunk) + b'\n'
+        except Exception as e:
+            print(f'Error streaming {self.__class__.__name__} list: {e}')
+            yield dumps({'error': 'Streaming failed'}) + b'\n'
+
+    def _json_array_chunks(self, rows):
+        yield b'['
+        first = True
+        try:
+            for chunk in self._chunks(rows):
+                yield (b'' if first else b',') + b','.join(chunk)
+                first = False
+        except Exception as e:
+            # Leave the array unterminated so clients see the export is incomplete
+            print(f'Error streaming {self.__class__.__name__} list: {e}')
+            return
+        yield b']'
+
+
+def _loaded_versions(obj, parts, field, timestamps):
+    """
+    (pk, <field>) of the objects reached from obj along a lookup path, read
+    from what select_related/prefetch_related already loaded. Non-null
+    <field> values are also appended to `timestamps`.
+    """
+    if obj is None:
+        return None
+    if parts:
+        try:
+            related = getattr(obj, parts[0])
+        except ObjectDoesNotExist:
+            # A missing reverse one-to-one (e.g. an ungraded submission's grade)
+            return None
+        if hasattr(related, 'all'):
+            # Prefetched: .all() reads the cache
+            return tuple(_loaded_versions(item, parts[1:], field, timestamps) for item in related.all())
+        return _loaded_versions(related, parts[1:], field, timestamps)
+    value = getattr(obj, field, None)
+    if value is not None:
+        timestamps.append(value)
+    return obj.pk, value
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for list and retrieve. The ETag is a fingerprint of the
+    rows being returned, taken after they are loaded but before anything is
+    serialized: each row's pk, updated_at and annotations, the pk and
+    updated_at of every related row the serializer renders, and the
+    pagination links. A matching If-None-Match is answered with 304 and
+    nothing is serialized. No extra query is run, so a list costs one page
+    however large the table, and a deleted row changes the fingerprint.
+
+    Lists send no Last-Modified: max(updated_at) goes backwards when the
+    newest row is deleted, which would answer If-Modified-Since with a stale
+    304. Retrieve sends it only when no related rows are rendered, for the
+    same reason.
+
+    Changes that touch neither updated_at nor an annotation (e.g. values a
+    SerializerMethodField queries itself) aren't seen; annotate them onto
+    the queryset so they are part of the row.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_kept_columns(self, model, names):
+        # Read for the fingerprint, so never deferred
+        return {*super().get_kept_columns(model, names), self.last_modified_field}
+
+    def list(self, request, *args, **kwargs):
+        if getattr(self, 'is_streaming', lambda request: False)(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        links = () if page is None else (self.paginator.get_next_link(), self.paginator.get_previous_link())
+        etag, _ = self.get_validators(rows, links)
+
+        def render():
+            serializer = self.get_serializer(rows, many=True)
+            if page is None:
+                return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
+
+        return self._conditional(request, etag, None, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_validators([instance])
+        return self._conditional(request, etag, last_modified, lambda: Response(self.get_serializer(instance).data))
+
+    def get_related_paths(self):
+        """Lookup paths of the related rows the serializer renders."""
+        select, prefetch = related_paths(self.get_serializer_class(), getattr(self, 'get_sparse_fields', lambda: None)())
+        return sorted({
+            *select, *prefetch, *getattr(self, 'extra_select_related', ()), *getattr(self, 'extra_prefetch_related', ()),
+        })
+
+    def get_validators(self, rows, extra=()):
+        """(etag, last_modified timestamp or None) for already loaded `rows`."""
+        paths = [path.split('__') for path in self.get_related_paths()]
+        annotations = tuple(self.get_queryset().query.annotations)
+        field, timestamps = self.last_modified_field, []
+        versions = [
+            (
+                _loaded_versions(row, (), field, timestamps),
+                tuple(getattr(row, name, None) for name in annotations),
+                tuple(_loaded_versions(row, parts, field, timestamps) for parts in paths),
+            )
+            for row in rows
+        ]
+        last_modified = None
+        if not paths and timestamps:
+            last_modified = int(max(timestamps).timestamp())
+
+        user = getattr(self.request, 'user', None)
+        fingerprint = repr((
+            self.request.get_full_path(), getattr(self.request, 'accepted_media_type', None),
+            getattr(user, 'pk', None), extra, versions,
+        ))
+        return f'"{hashlib.sha1(fingerprint.encode()).hexdigest()}"', last_modified
+
+    def _conditional(self, request, etag, last_modified, render):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+            if not 200 <= response.status_code < 300:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let browsers keep the body but revalidate on every poll
+        response['Cache-Control'] = 'private, no-cache'
+        return response
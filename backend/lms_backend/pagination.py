@@ -0,0 +1,202 @@
+"""
+Keyset (cursor) pagination for every list endpoint.
+
+Pages are ordered by the model's Meta.ordering plus an id tiebreaker, and the
+cursor carries the ordering values of the boundary row. The next page is a
+`WHERE (ordering columns) beyond (cursor values)` range scan on a matching
+composite index, so page N costs the same as page 1 however large the table
+grows (no OFFSET). NULLs always sort last so the comparison is well defined.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _beyond(field, descending, nullable, value, reverse, inclusive=False):
+    """
+    Rows after `value` in one column's order (before it when reverse).
+    NULLs sort last, so walking forward they follow every value and walking
+    backwards every value follows them.
+    """
+    if reverse:
+        if value is None:
+            return Q(**{f'{field}__isnull': False}) if not inclusive else Q()
+        lookup = 'gt' if descending else 'lt'
+        return Q(**{f'{field}__{lookup}{"e" if inclusive else ""}': value})
+    if value is None:
+        return Q(**{f'{field}__isnull': True}) if inclusive else Q(pk__in=[])
+    lookup = 'lt' if descending else 'gt'
+    condition = Q(**{f'{field}__{lookup}{"e" if inclusive else ""}': value})
+    if nullable:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def _equal(field, value):
+    if value is None:
+        return Q(**{f'{field}__isnull': True})
+    return Q(**{field: value})
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Response: {"next": url|null, "previous": url|null, "results": [...]}.
+    ?page_size= overrides PAGE_SIZE up to max_page_size.
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset, view=None):
+        """
+        [(field, descending, nullable)] from the view, the queryset or
+        Meta.ordering, ending with the id tiebreaker.
+        """
+        ordering = getattr(view, 'ordering', None) or queryset.query.order_by or queryset.model._meta.ordering
+        opts = queryset.model._meta
+        fields = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?' or '__' in item:
+                continue
+            name = item.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            try:
+                nullable = opts.get_field(name).null
+            except FieldDoesNotExist:
+                continue
+            fields.append((name, item.startswith('-'), nullable))
+        if not any(name == 'id' for name, _, _ in fields):
+            fields.append(('id', fields[0][1] if fields else False, False))
+        return fields
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return list(cursor['p']), bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        position = [_encode_value(self._value(row, field)) for field, _, _ in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _value(row, field):
+        # Model instances, or dicts from .values()
+        return row[field] if isinstance(row, dict) else getattr(row, field)
+
+    def _order_by(self, reverse):
+        expressions = []
+        for field, descending, nullable in self.ordering:
+            # Only nullable columns get an explicit NULLS clause, so plain
+            # composite indexes still match the ORDER BY of the others
+            nulls = ({'nulls_first': True} if reverse else {'nulls_last': True}) if nullable else {}
+            if descending != reverse:
+                expressions.append(F(field).desc(**nulls))
+            else:
+                expressions.append(F(field).asc(**nulls))
+        return expressions
+
+    def _after(self, position, reverse):
+        """
+        Lexicographic (c1, c2, ...) beyond position, as an OR of prefix matches,
+        plus an inclusive bound on c1 so the index scan starts at the cursor.
+        """
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (field, descending, nullable), value in zip(self.ordering, position):
+            condition |= prefix & _beyond(field, descending, nullable, value, reverse)
+            prefix &= _equal(field, value)
+        field, descending, nullable = self.ordering[0]
+        return _beyond(field, descending, nullable, position[0], reverse, inclusive=True) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            position, reverse = cursor
+            if len(position) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(self._after(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset.order_by(*self._order_by(reverse))[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = bool(rows), has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
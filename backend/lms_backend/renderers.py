@@ -0,0 +1,53 @@
+"""
+orjson-backed JSON renderer, the project default in REST_FRAMEWORK.
+
+Output matches DRF's JSONRenderer: datetimes as ISO 8601 with a Z suffix
+for UTC, Decimals that reach the renderer un-coerced as numbers, and
+anything else orjson can't encode goes through DRF's JSONEncoder.default.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_default = JSONEncoder().default
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def dumps(data, indent=False):
+    """Encode `data` as JSON bytes, exactly as the API renders it."""
+    ret = orjson.dumps(data, default=_default, option=(_OPTIONS | orjson.OPT_INDENT_2) if indent else _OPTIONS)
+    # Keep the output a strict JavaScript subset, like JSONRenderer
+    if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+        ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Any requested indent (`Accept: application/json; indent=4`, the
+    browsable API) pretty-prints with orjson's fixed two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data, indent=bool(self.get_indent(accepted_media_type, renderer_context or {})))
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON. Lists stream one row per line (see
+    StreamingListMixin); anything DRF renders itself (errors, detail
+    views) is a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data) + b'\n'
+
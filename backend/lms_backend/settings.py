@@ -4,6 +4,7 @@ Django settings for lms_backend project.
 from pathlib import Path
 from decouple import config
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,7 +24,7 @@ if VERCEL_URL:
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default=default_hosts, cast=lambda v: [s.strip() for s in v.split(',')])
 
 # Application definition
-# Frontend-only: Only apps needed for template rendering
+# Frontend pages, plus the apps behind the background job worker and /api/jobs/
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -32,12 +33,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',  # For CORS if needed
-    'assignments',  # Only assignments app for templates
+    'rest_framework',
+    'academics',  # Class/Subject, referenced by assignments and attendance
+    'assignments',
+    'attendance',  # Attendance report job handler
+    'jobs',  # Background job queue (`python manage.py run_jobs`)
 ]
 
 MIDDLEWARE = [
+    'lms_backend.middleware.QueryInstrumentationMiddleware',  # Query counts, DB time and budgets
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
+    'lms_backend.middleware.CompressionMiddleware',  # brotli/gzip for JSON responses
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -124,13 +131,130 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Django REST Framework
+REST_FRAMEWORK = {
+    # Keyset pagination on Meta.ordering + id for every list endpoint
+    'DEFAULT_PAGINATION_CLASS': 'lms_backend.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=50, cast=int),
+    'DEFAULT_RENDERER_CLASSES': [
+        'lms_backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'lms_backend.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+# Rows fetched and written per chunk by streaming list responses (?stream=1, NDJSON)
+API_STREAM_CHUNK_SIZE = config('API_STREAM_CHUNK_SIZE', default=2000, cast=int)
+# POST /api/batch: max sub-requests per batch, and threads for "parallel": true
+API_BATCH_MAX_REQUESTS = config('API_BATCH_MAX_REQUESTS', default=20, cast=int)
+API_BATCH_MAX_WORKERS = config('API_BATCH_MAX_WORKERS', default=4, cast=int)
+
+# Per-request query instrumentation (see lms_backend/middleware.py)
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=True, cast=bool)
+# Server-Timing: db;dur=..;desc="N SQL", app;dur=..
+QUERY_TIMING_HEADER = config('QUERY_TIMING_HEADER', default=True, cast=bool)
+# Slowest / most repeated statements included in each log line
+QUERY_LOG_SLOWEST = config('QUERY_LOG_SLOWEST', default=3, cast=int)
+# Max queries per request by URL name (0 = no budget); includes session/auth lookups.
+# Router routes are named <basename>-list / <basename>-<action>, e.g. grades-gradebook
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=50, cast=int)
+QUERY_BUDGETS = {
+    'assignments-list': 8,
+    'submissions-list': 8,
+    'grades-list': 8,
+    'grades-gradebook': 6,
+    'attendance-list': 8,
+    'attendance-matrix': 6,
+    'attendance-reports-list': 8,
+    'jobs-list': 6,
+}
+# Over budget raises in tests (`manage.py test`) and logs a warning otherwise
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=len(sys.argv) > 1 and sys.argv[1] == 'test', cast=bool)
+
+# JSON responses at least this large are brotli/gzip compressed
+# (brotli needs the optional `brotli` package)
+API_COMPRESSION_MIN_BYTES = config('API_COMPRESSION_MIN_BYTES', default=1024, cast=int)
+
 # OpenAI Settings
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+# Optional override, e.g. for a local OpenAI-compatible endpoint
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+OPENAI_TIMEOUT = config('OPENAI_TIMEOUT', default=30, cast=float)
+# Shared client pool and provider limits (see assignments/llm.py)
+OPENAI_MAX_CONNECTIONS = config('OPENAI_MAX_CONNECTIONS', default=20, cast=int)
+OPENAI_REQUESTS_PER_MINUTE = config('OPENAI_REQUESTS_PER_MINUTE', default=500, cast=int)
+OPENAI_TOKENS_PER_MINUTE = config('OPENAI_TOKENS_PER_MINUTE', default=200000, cast=int)
+# Circuit breaker: open after N consecutive failures, retry after the reset window
+OPENAI_BREAKER_FAILURES = config('OPENAI_BREAKER_FAILURES', default=5, cast=int)
+OPENAI_BREAKER_RESET_SECONDS = config('OPENAI_BREAKER_RESET_SECONDS', default=30, cast=float)
+# Record/replay model calls for offline benchmarks: '', 'record', 'replay' or 'auto'
+OPENAI_CASSETTE_MODE = config('OPENAI_CASSETTE_MODE', default='')
+OPENAI_CASSETTE_DIR = config('OPENAI_CASSETTE_DIR', default=str(BASE_DIR / 'ai_cassettes'))
+# Synthetic latency (seconds) for replayed calls; empty reuses the recorded latency
+OPENAI_CASSETTE_LATENCY = config('OPENAI_CASSETTE_LATENCY', default='', cast=lambda v: float(v) if v != '' else None)
+# Max in-flight OpenAI requests when grading short answers concurrently
+AI_GRADING_CONCURRENCY = config('AI_GRADING_CONCURRENCY', default=8, cast=int)
+
+# AI response cache (in-process LRU + ai_cache_entries table)
+AI_CACHE_TTL = config('AI_CACHE_TTL', default=60 * 60 * 24 * 30, cast=int)
+AI_CACHE_MAX_ENTRIES = config('AI_CACHE_MAX_ENTRIES', default=2048, cast=int)
+# Bump to invalidate every cached feedback/grade (e.g. after a prompt change)
+AI_CACHE_VERSION = config('AI_CACHE_VERSION', default='1')
+
+# Offline batch grading (`python manage.py batch_grade`): 'openai' or 'local'
+# ('local' is a file-based stand-in that reads results from AI_BATCH_DIR)
+AI_BATCH_PROVIDER = config('AI_BATCH_PROVIDER', default='openai')
+AI_BATCH_DIR = config('AI_BATCH_DIR', default=str(BASE_DIR / 'ai_batches'))
+
+# Serve assignment submission/graded counts from counter columns kept in sync
+# on writes, instead of aggregating submissions per request (very large classes)
+ASSIGNMENT_DENORMALIZED_COUNTS = config('ASSIGNMENT_DENORMALIZED_COUNTS', default=False, cast=bool)
+# Keep per-(class, day) and per-(student, class, month) attendance counts in
+# rollup tables and answer statistics/reports from them when they cover the
+# range. Run `python manage.py rebuild_attendance_rollups` after turning it on.
+ATTENDANCE_ROLLUPS = config('ATTENDANCE_ROLLUPS', default=False, cast=bool)
+# Longest date range served by the attendance matrix endpoint
+ATTENDANCE_MATRIX_MAX_DAYS = config('ATTENDANCE_MATRIX_MAX_DAYS', default=366, cast=int)
+
+# Background jobs (run with `python manage.py run_jobs`)
+# AI work runs here, never inside gunicorn web workers
+JOB_HANDLERS = {
+    'ai_grade': 'assignments.jobs.ai_grade_assignment',
+    'generate_feedback': 'assignments.jobs.generate_feedback',
+    'precompute_feedback': 'assignments.jobs.precompute_feedback',
+    'attendance_reports': 'attendance.jobs.generate_attendance_reports',
+}
+JOB_WORKERS = config('JOB_WORKERS', default=4, cast=int)
+JOB_POOL = config('JOB_POOL', default='thread')  # 'thread' or 'process'
+JOB_RETRY_BACKOFF = config('JOB_RETRY_BACKOFF', default=30, cast=int)
+# Running jobs touch updated_at this often; without a heartbeat or progress
+# update for JOB_STALE_SECONDS they are requeued (or failed, out of attempts)
+JOB_HEARTBEAT_SECONDS = config('JOB_HEARTBEAT_SECONDS', default=60, cast=int)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=900, cast=int)
 
 # Backend API URL for frontend API calls
 # Set this to the client's backend URL if frontend should call external API
 BACKEND_API_URL = config('BACKEND_API_URL', default='http://3.226.252.253:8000')
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request at INFO, over-budget requests at WARNING
+        'lms_backend.queries': {
+            'handlers': ['console'],
+            'level': config('QUERY_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Production Security Settings
 if not DEBUG:
     SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=False, cast=bool)
@@ -0,0 +1,572 @@
+import json
+import re
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from academics.models import AcademicYear, Class, School, StudentClass, Subject, TeacherSubjectClass
+from academics.views import (
+    AcademicYearViewSet, ClassViewSet, SchoolViewSet, StudentClassViewSet, SubjectViewSet, TeacherSubjectClassViewSet,
+)
+from assignments.models import Assignment, Grade, Submission
+from assignments.tests import SHORT_ANSWER, make_assignment
+from assignments.viewsets import AssignmentViewSet, GradeViewSet, SubmissionViewSet
+from attendance.models import Attendance, AttendanceReport
+from attendance.views import AttendanceReportViewSet, AttendanceViewSet
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+from jobs.views import JobViewSet
+from .batch import BatchView
+from .middleware import QueryBudgetExceeded
+
+User = get_user_model()
+
+
+class ListQueryCountTests(TestCase):
+    """
+    List endpoints run the same number of queries for one row as for a full
+    page. Every row gets its own related objects, so a relation missing from
+    select_related/prefetch_related shows up as one extra query per row.
+    """
+    rows = 10
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username='admin')
+        self.school = School.objects.create(name='School', code='S0')
+        self.year = self.make_year(self.school, 0)
+
+    def make_user(self, prefix):
+        username = f'{prefix}{User.objects.count()}'
+        return User.objects.create(username=username, email=f'{username}@example.com')
+
+    def make_year(self, school, index):
+        start = date(2026, 1, 1) + timedelta(days=index)
+        return AcademicYear.objects.create(school=school, name=f'Year {index}', start_date=start, end_date=start + timedelta(days=300))
+
+    def make_school(self, index):
+        code = f'S{School.objects.count() + 1}'
+        return School.objects.create(name=f'School {index}', code=code)
+
+    def make_class(self, index):
+        school = self.make_school(index)
+        return Class.objects.create(
+            school=school, academic_year=self.make_year(school, index), name=f'Class {index}', code=f'C{index}',
+            grade_level=5, class_teacher=self.make_user('teacher'),
+        )
+
+    def make_subject(self, index):
+        return Subject.objects.create(school=self.make_school(index), name=f'Subject {index}', code=f'SUB{index}')
+
+    def make_assignment(self, index):
+        return Assignment.objects.create(
+            title=f'Assignment {index}', description='', teacher=self.make_user('teacher'),
+            class_obj=self.make_class(index), subject=self.make_subject(index), due_date=timezone.now(),
+        )
+
+    def make_submission(self, index):
+        return Submission.objects.create(
+            assignment=self.make_assignment(index), student=self.make_user('student'), status='SUBMITTED',
+        )
+
+    def make_grade(self, index, submission=None):
+        return Grade.objects.create(
+            submission=submission or self.make_submission(index), score=Decimal('3.00'), max_score=Decimal('5.00'),
+            graded_by=self.make_user('grader'),
+        )
+
+    def list_queries(self, viewset):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = viewset.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['results']
+
+    def assertConstantQueries(self, viewset, make_row):
+        """List with one row, then with self.rows rows; the query count must not change."""
+        make_row(0)
+        expected, results = self.list_queries(viewset)
+        self.assertEqual(len(results), 1)
+        for index in range(1, self.rows):
+            make_row(index)
+        with self.assertNumQueries(expected):
+            _, results = self.list_queries(viewset)
+        self.assertEqual(len(results), self.rows)
+
+    def test_schools(self):
+        School.objects.all().delete()
+        self.assertConstantQueries(SchoolViewSet, self.make_school)
+
+    def test_academic_years(self):
+        AcademicYear.objects.all().delete()
+        self.assertConstantQueries(AcademicYearViewSet, lambda index: self.make_year(self.make_school(index), index))
+
+    def test_subjects(self):
+        self.assertConstantQueries(SubjectViewSet, self.make_subject)
+
+    def test_classes(self):
+        self.assertConstantQueries(ClassViewSet, self.make_class)
+
+    def test_student_classes(self):
+        self.assertConstantQueries(StudentClassViewSet, lambda index: StudentClass.objects.create(
+            student=self.make_user('student'), class_obj=self.make_class(index), academic_year=self.year,
+        ))
+
+    def test_teacher_subject_classes(self):
+        self.assertConstantQueries(TeacherSubjectClassViewSet, lambda index: TeacherSubjectClass.objects.create(
+            teacher=self.make_user('teacher'), subject=self.make_subject(index),
+            class_obj=self.make_class(index), academic_year=self.year,
+        ))
+
+    def test_assignments(self):
+        def make_row(index):
+            submission = self.make_submission(index)
+            self.make_grade(index, submission)
+
+        self.assertConstantQueries(AssignmentViewSet, make_row)
+
+    def test_submissions(self):
+        # Graded, so get_grade reads grade and grade.graded_by on every row
+        self.assertConstantQueries(SubmissionViewSet, self.make_grade)
+
+    def test_grades(self):
+        self.assertConstantQueries(GradeViewSet, self.make_grade)
+
+    def test_attendance(self):
+        self.assertConstantQueries(AttendanceViewSet, lambda index: Attendance.objects.create(
+            student=self.make_user('student'), class_obj=self.make_class(index), date=date(2026, 3, 2),
+            marked_by=self.make_user('marker'),
+        ))
+
+    def test_attendance_reports(self):
+        self.assertConstantQueries(AttendanceReportViewSet, lambda index: AttendanceReport.objects.create(
+            student=self.make_user('student'), class_obj=self.make_class(index),
+            start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+        ))
+
+    def test_jobs(self):
+        # Only the requester's jobs are listed
+        self.assertConstantQueries(JobViewSet, lambda index: Job.objects.create(
+            kind='attendance_reports', created_by=self.user,
+        ))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        assignment = make_assignment([SHORT_ANSWER])
+        self.client.force_login(assignment.teacher)
+        now = timezone.now()
+        # Ties on submitted_at and unsubmitted (NULL) rows, which sort last
+        for submitted_at in [now, now - timedelta(hours=1), now, None, now - timedelta(days=1), None, now, None]:
+            Submission.objects.create(assignment=assignment, student_name='student', submitted_at=submitted_at)
+        rows = Submission.objects.values_list('id', 'submitted_at')
+        submitted = sorted((row for row in rows if row[1]), key=lambda row: (row[1], row[0]), reverse=True)
+        unsubmitted = sorted((row for row in rows if not row[1]), reverse=True)
+        self.expected = [pk for pk, _ in submitted + unsubmitted]
+
+    def page(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [row['id'] for row in data['results']], data['next'], data['previous']
+
+    def test_cursor_walks_forward_and_back_through_null_rows(self):
+        pages, url, previous = [], '/api/assignments/submissions/?page_size=3', None
+        while url:
+            ids, url, previous = self.page(url)
+            pages.append(ids)
+        self.assertEqual([pk for ids in pages for pk in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 2])
+
+        walked_back = [pages[-1]]
+        while previous:
+            ids, _, previous = self.page(previous)
+            walked_back.append(ids)
+        self.assertEqual(walked_back, pages[::-1])
+
+    def test_first_page_has_no_previous_link(self):
+        ids, next_url, previous = self.page('/api/assignments/submissions/?page_size=5')
+        self.assertEqual(ids, self.expected[:5])
+        self.assertIsNone(previous)
+        self.assertIn('page_size=5', next_url)
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ('not-base64!', 'eyJwIjpbXX0=', 'eyJwIjpbImEiLDFdfQ=='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/assignments/submissions/', {'cursor': cursor}, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    url = '/api/jobs/'
+
+    def setUp(self):
+        self.user = User.objects.create(username='requester')
+        self.client.force_login(self.user)
+        for done in range(3):
+            Job.objects.create(
+                kind='ai_grade', created_by=self.user, payload={'assignment_id': done},
+                result={'feedback': 'x' * 100}, progress_done=done, progress_total=4,
+            )
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params, HTTP_ACCEPT='application/json')
+        job_queries = [query['sql'] for query in queries if 'FROM "jobs"' in query['sql']]
+        self.assertEqual(len(job_queries), 1)
+        return response, job_queries[0]
+
+    def test_fields_renders_and_loads_only_those_fields(self):
+        response, sql = self.get({'fields': 'id,status'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({tuple(row) for row in response.json()['results']}, {('id', 'status')})
+        self.assertNotIn('"payload"', sql)
+        self.assertNotIn('"result"', sql)
+        # Read for the ETag and the cursor
+        self.assertIn('"updated_at"', sql)
+        self.assertIn('"created_at"', sql)
+
+    def test_exclude_drops_fields_and_their_columns(self):
+        response, sql = self.get({'exclude': 'payload,result'})
+
+        row = response.json()['results'][0]
+        self.assertNotIn('payload', row)
+        self.assertNotIn('result', row)
+        self.assertIn('kind', row)
+        self.assertNotIn('"payload"', sql)
+        self.assertIn('"kind"', sql)
+
+    def test_field_dependencies_stay_loaded(self):
+        # percentage is a model property; if its columns were deferred, reading
+        # it would refetch them row by row and self.get() would see more queries
+        response, sql = self.get({'fields': 'percentage'})
+
+        self.assertEqual(sorted(row['percentage'] for row in response.json()['results']), [0.0, 25.0, 50.0])
+        self.assertIn('"progress_done"', sql)
+        self.assertNotIn('"payload"', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        for param, value in (('fields', 'id,secret'), ('exclude', 'nope')):
+            with self.subTest(param=param):
+                response = self.client.get(self.url, {param: value}, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Unknown fields:', str(response.json()[param]))
+
+    def test_retrieve_honours_fields(self):
+        job = Job.objects.first()
+        response = self.client.get(f'{self.url}{job.pk}/', {'fields': 'id,kind'}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {'id': job.pk, 'kind': 'ai_grade'})
+
+
+@override_settings(API_STREAM_CHUNK_SIZE=2)
+class StreamingListTests(TestCase):
+    url = '/api/jobs/'
+
+    def setUp(self):
+        self.user = User.objects.create(username='requester')
+        self.client.force_login(self.user)
+        # More rows than a page of size 2, so nothing is paginated away
+        self.jobs = [Job.objects.create(kind='ai_grade', created_by=self.user, progress_total=index) for index in range(5)]
+        Job.objects.create(kind='ai_grade')
+
+    def stream(self, params=None, **headers):
+        response = self.client.get(self.url, params or {}, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_streams_one_row_per_line(self):
+        for params, headers in (({}, {'HTTP_ACCEPT': 'application/x-ndjson'}), ({'format': 'ndjson'}, {})):
+            with self.subTest(params=params, headers=headers):
+                response, body = self.stream({**params, 'page_size': 2}, **headers)
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                self.assertTrue(body.endswith(b'\n'))
+                rows = [json.loads(line) for line in body.splitlines()]
+                self.assertEqual({row['id'] for row in rows}, {job.pk for job in self.jobs})
+
+    def test_stream_param_streams_a_json_array(self):
+        response, body = self.stream({'stream': 1, 'fields': 'id,progress_total'}, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(body)
+        self.assertEqual(sorted(row['progress_total'] for row in rows), [0, 1, 2, 3, 4])
+        self.assertEqual({tuple(row) for row in rows}, {('id', 'progress_total')})
+
+    def test_empty_stream(self):
+        Job.objects.all().delete()
+        self.assertEqual(self.stream({'stream': 1}, HTTP_ACCEPT='application/json')[1], b'[]')
+        self.assertEqual(self.stream(HTTP_ACCEPT='application/x-ndjson')[1], b'')
+
+    def test_failures_mid_stream_are_visible(self):
+        rendered = []
+
+        def to_representation(instance):
+            if len(rendered) == 3:
+                raise RuntimeError('boom')
+            rendered.append(instance.pk)
+            return {'id': instance.pk}
+
+        with mock.patch.object(JobSerializer, 'to_representation', side_effect=to_representation), mock.patch('builtins.print'):
+            _, ndjson = self.stream(HTTP_ACCEPT='application/x-ndjson')
+            rendered.clear()
+            _, array = self.stream({'stream': 1}, HTTP_ACCEPT='application/json')
+
+        lines = [json.loads(line) for line in ndjson.splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[-1], {'error': 'Streaming failed'})
+        # The first chunk of two went out; the array is left unterminated
+        self.assertTrue(array.startswith(b'[{'))
+        self.assertFalse(array.endswith(b']'))
+
+    def test_unstreamed_list_is_paginated(self):
+        response = self.client.get(self.url, {'page_size': 2}, HTTP_ACCEPT='application/json')
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.assignment = make_assignment([SHORT_ANSWER])
+        self.teacher = self.assignment.teacher
+        self.client.force_login(self.teacher)
+        self.submissions = [
+            Submission.objects.create(assignment=self.assignment, student_name=f'student {index}', status='SUBMITTED')
+            for index in range(3)
+        ]
+
+    def get(self, url, etag=None, **headers):
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, HTTP_ACCEPT='application/json', **headers)
+
+    def assertRevalidates(self, url):
+        """200 with an ETag, then 304 with no body for the same ETag; returns the ETag."""
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        not_modified = self.get(url, etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], etag)
+        return etag
+
+    def test_unchanged_list_is_not_modified(self):
+        url = '/api/assignments/submissions/'
+        self.assertRevalidates(url)
+        # Lists have no Last-Modified, so If-Modified-Since alone never gives a 304
+        response = self.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE='Sun, 01 Jan 2090 00:00:00 GMT').status_code, 200)
+
+    def test_updates_and_deletes_change_the_list_etag(self):
+        url = '/api/assignments/submissions/'
+        etag = self.assertRevalidates(url)
+        self.submissions[0].status = 'LATE'
+        self.submissions[0].save()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+        # Deleting the most recently updated row must not look unchanged
+        etag = self.assertRevalidates(url)
+        self.submissions[0].delete()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_related_rows_and_annotations_change_the_etag(self):
+        submissions_url = '/api/assignments/submissions/'
+        etag = self.assertRevalidates(submissions_url)
+        # Rendered through SubmissionViewSet.extra_select_related
+        Grade.objects.create(submission=self.submissions[1], score=Decimal('2.00'), max_score=Decimal('4.00'))
+        self.assertEqual(self.get(submissions_url, etag).status_code, 200)
+
+        # submission_count/graded_count are annotations on the assignment rows
+        assignments_url = '/api/assignments/assignments/'
+        etag = self.assertRevalidates(assignments_url)
+        Submission.objects.create(assignment=self.assignment, student_name='late joiner')
+        self.assertEqual(self.get(assignments_url, etag).status_code, 200)
+
+    def test_pages_have_their_own_etags(self):
+        first = self.get('/api/assignments/submissions/?page_size=2')
+        second_url = first.json()['next']
+        second = self.get(second_url)
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(self.get(second_url, second['ETag']).status_code, 304)
+
+    def test_retrieve_without_related_rows_sends_last_modified(self):
+        job = Job.objects.create(kind='ai_grade', created_by=self.teacher)
+        url = f'/api/jobs/{job.pk}/'
+        etag = self.assertRevalidates(url)
+        last_modified = self.get(url)['Last-Modified']
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        job.status = 'RUNNING'
+        job.save()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_retrieve_with_related_rows_sends_only_an_etag(self):
+        url = f'/api/assignments/submissions/{self.submissions[0].pk}/'
+        self.assertRevalidates(url)
+        self.assertFalse(self.get(url).has_header('Last-Modified'))
+
+    def test_malformed_and_missing_pks_are_not_found(self):
+        self.assertEqual(self.get('/api/assignments/submissions/abc/').status_code, 404)
+        self.assertEqual(self.get('/api/assignments/submissions/999999/').status_code, 404)
+
+
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        self.assignment = make_assignment([SHORT_ANSWER])
+        self.client.force_login(self.assignment.teacher)
+        for index in range(3):
+            submission = Submission.objects.create(assignment=self.assignment, student_name=f'student {index}', status='SUBMITTED')
+            Grade.objects.create(submission=submission, score=Decimal('1.00'), max_score=Decimal('4.00'))
+
+    def test_every_budget_names_a_mounted_route(self):
+        names = {name for name in get_resolver().reverse_dict if isinstance(name, str)}
+        self.assertEqual(set(settings.QUERY_BUDGETS) - names, set())
+
+    def test_budgeted_routes_report_server_timing(self):
+        for url in ('/api/assignments/assignments/', '/api/assignments/submissions/', '/api/assignments/grades/gradebook/'):
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            timing = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) SQL", app;dur=[\d.]+', response['Server-Timing'])
+            self.assertIsNotNone(timing, response['Server-Timing'])
+            self.assertLessEqual(int(timing[1]), settings.QUERY_BUDGETS[response.resolver_match.view_name])
+
+    def test_over_budget_requests_fail_under_manage_py_test(self):
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+        with override_settings(QUERY_BUDGETS={**settings.QUERY_BUDGETS, 'grades-list': 2}):
+            with self.assertLogs('lms_backend.queries', 'WARNING'):
+                with self.assertRaisesMessage(QueryBudgetExceeded, '(grades-list) ran 3 queries, budget is 2'):
+                    self.client.get('/api/assignments/grades/', HTTP_ACCEPT='application/json')
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_over_budget_requests_only_warn_when_not_strict(self):
+        with override_settings(QUERY_BUDGETS={**settings.QUERY_BUDGETS, 'grades-list': 2}):
+            with self.assertLogs('lms_backend.queries', 'WARNING') as logs:
+                response = self.client.get('/api/assignments/grades/', HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"route":"grades-list"', logs.output[0])
+        self.assertIn('"budget":2', logs.output[0])
+
+
+class BatchClientMixin:
+    """A logged-in teacher whose client sends the CSRF cookie and header like a browser."""
+    csrf_token = 'x' * 32
+
+    def setUp(self):
+        self.assignment = make_assignment([SHORT_ANSWER])
+        self.teacher = self.assignment.teacher
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.teacher)
+        self.client.cookies['csrftoken'] = self.csrf_token
+
+    def batch(self, payload, csrf=True):
+        headers = {'HTTP_X_CSRFTOKEN': self.csrf_token} if csrf else {}
+        return self.client.post('/api/batch', payload, content_type='application/json', **headers)
+
+
+class BatchViewTests(BatchClientMixin, TestCase):
+
+    def test_sub_requests_run_in_order(self):
+        pk = self.assignment.pk
+        response = self.batch([
+            {'id': 'assignment', 'method': 'GET', 'path': f'/api/assignments/assignments/{pk}/'},
+            {'id': 'submissions', 'path': f'/api/assignments/assignments/{pk}/submissions/'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        assignment, submissions = response.json()['responses']
+        self.assertEqual((assignment['id'], assignment['status']), ('assignment', 200))
+        self.assertEqual(assignment['body']['title'], 'Seasons')
+        self.assertIn('ETag', assignment['headers'])
+        self.assertEqual((submissions['id'], submissions['status'], submissions['body']), ('submissions', 200, []))
+
+    def test_a_failing_sub_request_does_not_fail_the_batch(self):
+        with mock.patch.object(JobViewSet, 'list', side_effect=RuntimeError('boom')):
+            response = self.batch({'requests': [
+                {'id': 'missing', 'path': '/api/nowhere/'},
+                {'id': 'method', 'method': 'TRACE', 'path': '/api/jobs/'},
+                {'id': 'relative', 'path': 'api/jobs/'},
+                {'id': 'nested', 'method': 'POST', 'path': '/api/batch', 'body': []},
+                {'id': 'raises', 'path': '/api/jobs/'},
+                'not an object',
+                {'id': 'ok', 'path': f'/api/assignments/assignments/{self.assignment.pk}/'},
+            ]})
+
+        self.assertEqual(response.status_code, 200)
+        statuses = [(item['id'], item['status']) for item in response.json()['responses']]
+        self.assertEqual(statuses, [
+            ('missing', 404), ('method', 405), ('relative', 400), ('nested', 400),
+            ('raises', 500), (None, 400), ('ok', 200),
+        ])
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.batch({'requests': []}).status_code, 400)
+        self.assertEqual(self.batch({'calls': []}).status_code, 400)
+        with self.settings(API_BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch([{'path': '/api/jobs/'}] * 3).status_code, 400)
+
+    def test_sub_requests_inherit_the_session_and_csrf_check(self):
+        self.assertEqual(self.batch([{'path': '/api/jobs/'}], csrf=False).status_code, 403)
+
+        response = self.batch([
+            {'id': 'queue', 'method': 'POST', 'path': f'/api/assignments/assignments/{self.assignment.pk}/ai_grade/'},
+            {'id': 'jobs', 'path': '/api/jobs/'},
+        ])
+
+        queued, jobs = response.json()['responses']
+        self.assertEqual(queued['status'], 202)
+        job = Job.objects.get(pk=queued['body']['job_id'])
+        self.assertEqual(job.created_by, self.teacher)
+        # The second sub-request runs as the same user and sees the job
+        self.assertEqual([item['id'] for item in jobs['body']['results']], [job.pk])
+
+
+class ParallelBatchTests(BatchClientMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.threads = []
+        real_dispatch = BatchView.dispatch_one
+
+        def dispatch_one(view, parent, item):
+            self.threads.append(threading.get_ident())
+            return real_dispatch(view, parent, item)
+
+        patcher = mock.patch.object(BatchView, 'dispatch_one', dispatch_one)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_only_batches_run_on_the_thread_pool(self):
+        pk = self.assignment.pk
+        response = self.batch({'parallel': True, 'requests': [
+            {'id': 'assignment', 'path': f'/api/assignments/assignments/{pk}/'},
+            {'id': 'submissions', 'path': f'/api/assignments/assignments/{pk}/submissions/'},
+            {'id': 'missing', 'path': '/api/nowhere/'},
+        ]})
+
+        responses = response.json()['responses']
+        self.assertEqual([(item['id'], item['status']) for item in responses], [
+            ('assignment', 200), ('submissions', 200), ('missing', 404),
+        ])
+        self.assertEqual(responses[0]['body']['id'], pk)
+        self.assertNotIn(threading.get_ident(), self.threads)
+
+    def test_batches_with_writes_run_sequentially(self):
+        response = self.batch({'parallel': True, 'requests': [
+            {'method': 'POST', 'path': f'/api/assignments/assignments/{self.assignment.pk}/ai_grade/'},
+            {'path': '/api/jobs/'},
+        ]})
+
+        self.assertEqual([item['status'] for item in response.json()['responses']], [202, 200])
+        self.assertEqual(self.threads, [threading.get_ident()] * 2)
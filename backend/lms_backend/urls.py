@@ -3,13 +3,26 @@ URL configuration for lms_backend project.
 Frontend-only: All data comes from client's backend API.
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 from assignments import views as assignment_views
+from .batch import BatchView
 
 urlpatterns = [
     # Admin (optional, for Django admin if needed)
     path('admin/', admin.site.urls),
     
+    # Several API calls in one round trip, dispatched in-process
+    path('api/batch', BatchView.as_view(), name='api_batch'),
+    
+    # Assignments, submissions and grades: /api/assignments/... (ai_grade queues a job)
+    path('', include('assignments.urls')),
+    
+    # Attendance marking, reports and the class matrix: /api/attendance/...
+    path('api/attendance/', include('attendance.urls')),
+    
+    # Background job status and progress: /api/jobs/
+    path('api/', include('jobs.urls')),
+    
     # Frontend pages only - all data comes from client's backend API
     path('', assignment_views.index, name='index'),
     path('test-backend-url', assignment_views.test_backend_url, name='test_backend_url'),
@@ -15,6 +15,9 @@ class Policy(models.Model):
     class Meta:
         db_table = 'policies'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='idx_policies_created_id'),
+        ]
     
     def __str__(self):
         return self.title
@@ -57,6 +60,9 @@ class PolicyViolation(models.Model):
     class Meta:
         db_table = 'policy_violations'
         ordering = ['-reported_at']
+        indexes = [
+            models.Index(fields=['-reported_at', '-id'], name='idx_violations_reported_id'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.violation_type}"
@@ -93,6 +99,9 @@ class BehaviorIncident(models.Model):
     class Meta:
         db_table = 'behavior_incidents'
         ordering = ['-incident_date']
+        indexes = [
+            models.Index(fields=['-incident_date', '-id'], name='idx_incidents_date_id'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.incident_type} - {self.incident_date}"
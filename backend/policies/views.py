@@ -4,14 +4,15 @@ from rest_framework.response import Response
 from django.utils import timezone
 from .models import Policy, PolicyViolation, BehaviorIncident
 from .serializers import PolicySerializer, PolicyViolationSerializer, BehaviorIncidentSerializer
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class PolicyViewSet(viewsets.ModelViewSet):
+class PolicyViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Policy.objects.all()
     serializer_class = PolicySerializer
 
 
-class PolicyViolationViewSet(viewsets.ModelViewSet):
+class PolicyViolationViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = PolicyViolation.objects.all()
     serializer_class = PolicyViolationSerializer
     
@@ -31,7 +32,7 @@ class PolicyViolationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BehaviorIncidentViewSet(viewsets.ModelViewSet):
+class BehaviorIncidentViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = BehaviorIncident.objects.all()
     serializer_class = BehaviorIncidentSerializer
     
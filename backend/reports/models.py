@@ -24,6 +24,9 @@ class ReportTemplate(models.Model):
     class Meta:
         db_table = 'report_templates'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='idx_report_templates_name_id'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.report_type})"
@@ -57,6 +60,9 @@ class Report(models.Model):
     class Meta:
         db_table = 'reports'
         ordering = ['-generated_at']
+        indexes = [
+            models.Index(fields=['-generated_at', '-id'], name='idx_reports_generated_id'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.report_type}"
@@ -6,16 +6,18 @@ from django.utils import timezone
 from django.db.models import Avg
 from .models import Report, ReportTemplate
 from .serializers import ReportSerializer, ReportTemplateSerializer
-from attendance.models import Attendance, AttendanceReport
+from attendance.models import AttendanceReport
+from attendance.services import attendance_summary
 from assignments.models import Assignment, Submission
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class ReportTemplateViewSet(viewsets.ReadOnlyModelViewSet):
+class ReportTemplateViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ReportTemplate.objects.all()
     serializer_class = ReportTemplateSerializer
 
 
-class ReportViewSet(viewsets.ModelViewSet):
+class ReportViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
     
@@ -28,20 +30,18 @@ class ReportViewSet(viewsets.ModelViewSet):
         start_date = data.get('start_date')
         end_date = data.get('end_date')
         
-        # Generate attendance report
-        attendances = Attendance.objects.filter(
-            student_id=student_id,
-            class_obj_id=class_obj_id,
-            date__gte=start_date,
-            date__lte=end_date
+        # Generate attendance report (one query)
+        counts = attendance_summary(
+            student=student_id, class_obj=class_obj_id, start_date=start_date, end_date=end_date
         )
         
         report_data = {
-            'total_days': attendances.count(),
-            'present_days': attendances.filter(status='PRESENT').count(),
-            'absent_days': attendances.filter(status='ABSENT').count(),
-            'late_days': attendances.filter(status='LATE').count(),
-            'excused_days': attendances.filter(status='EXCUSED').count(),
+            'total_days': counts['total'],
+            'present_days': counts['present'],
+            'absent_days': counts['absent'],
+            'late_days': counts['late'],
+            'excused_days': counts['excused'],
+            'partial_days': counts['partial'],
         }
         
         report = Report.objects.create(
@@ -194,6 +194,29 @@ BEGIN
         ALTER TABLE assignments ALTER COLUMN questions SET NOT NULL;
     END IF;
     
+    -- Add precomputed_feedback (MCQ feedback per answer pattern)
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'assignments' AND column_name = 'precomputed_feedback'
+    ) THEN
+        ALTER TABLE assignments ADD COLUMN precomputed_feedback JSONB NOT NULL DEFAULT '{}'::jsonb;
+    END IF;
+    
+    -- Add denormalized submission counters
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'assignments' AND column_name = 'submission_counter'
+    ) THEN
+        ALTER TABLE assignments ADD COLUMN submission_counter INTEGER NOT NULL DEFAULT 0 CHECK (submission_counter >= 0);
+    END IF;
+    
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'assignments' AND column_name = 'graded_counter'
+    ) THEN
+        ALTER TABLE assignments ADD COLUMN graded_counter INTEGER NOT NULL DEFAULT 0 CHECK (graded_counter >= 0);
+    END IF;
+    
     -- Update column types
     ALTER TABLE assignments 
         ALTER COLUMN title TYPE VARCHAR(200),
@@ -338,6 +361,7 @@ CREATE TABLE IF NOT EXISTS attendance_reports (
     absent_days INTEGER NOT NULL DEFAULT 0,
     late_days INTEGER NOT NULL DEFAULT 0,
     excused_days INTEGER NOT NULL DEFAULT 0,
+    partial_days INTEGER NOT NULL DEFAULT 0,
     attendance_percentage NUMERIC(5, 2) NOT NULL DEFAULT 0,
     generated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
@@ -345,6 +369,48 @@ CREATE TABLE IF NOT EXISTS attendance_reports (
     updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
 );
 
+DO $$ 
+BEGIN
+    -- Add partial_days (PARTIAL attendance was previously not counted)
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'attendance_reports' AND column_name = 'partial_days'
+    ) THEN
+        ALTER TABLE attendance_reports ADD COLUMN partial_days INTEGER NOT NULL DEFAULT 0;
+    END IF;
+END $$;
+
+-- Attendance rollups (ATTENDANCE_ROLLUPS): per-status counts kept in sync on
+-- writes; backfill with `python manage.py rebuild_attendance_rollups`
+CREATE TABLE IF NOT EXISTS attendance_class_daily (
+    id SERIAL PRIMARY KEY,
+    class_obj_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    present INTEGER NOT NULL DEFAULT 0,
+    absent INTEGER NOT NULL DEFAULT 0,
+    late INTEGER NOT NULL DEFAULT 0,
+    excused INTEGER NOT NULL DEFAULT 0,
+    partial INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
+    UNIQUE(class_obj_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS attendance_student_monthly (
+    id SERIAL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    class_obj_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    present INTEGER NOT NULL DEFAULT 0,
+    absent INTEGER NOT NULL DEFAULT 0,
+    late INTEGER NOT NULL DEFAULT 0,
+    excused INTEGER NOT NULL DEFAULT 0,
+    partial INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
+    UNIQUE(student_id, class_obj_id, month)
+);
+
 -- ============================================
 -- STEP 7: Create Reports Tables
 -- ============================================
@@ -446,13 +512,74 @@ CREATE INDEX IF NOT EXISTS idx_assignments_subject ON assignments(subject_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_assignment ON submissions(assignment_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions(student_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status);
+-- Covers the per-assignment submitted/graded counts
+CREATE INDEX IF NOT EXISTS idx_submissions_asgn_status ON submissions(assignment_id, status);
 CREATE INDEX IF NOT EXISTS idx_grades_submission ON grades(submission_id);
 CREATE INDEX IF NOT EXISTS idx_attendance_student ON attendance(student_id);
 CREATE INDEX IF NOT EXISTS idx_attendance_class ON attendance(class_obj_id);
 CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date);
+CREATE INDEX IF NOT EXISTS idx_att_monthly_class_month ON attendance_student_monthly(class_obj_id, month);
+
+-- Keyset pagination: each table's default ordering plus the id tiebreaker
+CREATE INDEX IF NOT EXISTS idx_schools_name_id ON schools(name, id);
+CREATE INDEX IF NOT EXISTS idx_academic_years_start_id ON academic_years(start_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_subjects_name_id ON subjects(name, id);
+CREATE INDEX IF NOT EXISTS idx_classes_name_id ON classes(name, id);
+CREATE INDEX IF NOT EXISTS idx_enrollments_date_id ON student_enrollments(enrollment_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tsc_created_id ON teacher_subject_classes(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_assignments_created_id ON assignments(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_submissions_submitted_id ON submissions(submitted_at DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_grades_graded_id ON grades(graded_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_attendance_date_id ON attendance(date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_att_reports_generated_id ON attendance_reports(generated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_report_templates_name_id ON report_templates(name, id);
+CREATE INDEX IF NOT EXISTS idx_reports_generated_id ON reports(generated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_policies_created_id ON policies(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_violations_reported_id ON policy_violations(reported_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_incidents_date_id ON behavior_incidents(incident_date DESC, id DESC);
+
+-- ============================================
+-- STEP 10: Create AI Cache Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS ai_cache_entries (
+    id SERIAL PRIMARY KEY,
+    key VARCHAR(64) UNIQUE NOT NULL,
+    kind VARCHAR(20) NOT NULL,
+    model VARCHAR(100) NOT NULL DEFAULT '',
+    value JSONB NOT NULL,
+    expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_ai_cache_entries_expires ON ai_cache_entries(expires_at);
+
+-- ============================================
+-- STEP 11: Create Jobs Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR(100),
+    created_by_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    started_at TIMESTAMP WITHOUT TIME ZONE,
+    finished_at TIMESTAMP WITHOUT TIME ZONE,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_id ON jobs(created_at DESC, id DESC);
 
 -- ============================================
--- STEP 10: Create Updated At Triggers
+-- STEP 12: Create Updated At Triggers
 -- ============================================
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -474,8 +601,9 @@ BEGIN
             'users', 'schools', 'academic_years', 'subjects', 'classes',
             'student_enrollments', 'teacher_subject_classes', 'assignments',
             'submissions', 'grades', 'attendance', 'attendance_reports',
+            'attendance_class_daily', 'attendance_student_monthly',
             'report_templates', 'reports', 'policies', 'policy_violations',
-            'behavior_incidents'
+            'behavior_incidents', 'ai_cache_entries', 'jobs'
         )
     LOOP
         EXECUTE format('DROP TRIGGER IF EXISTS update_%s_updated_at ON %I', table_name, table_name);
@@ -7,9 +7,10 @@ from django.contrib.auth.hashers import make_password, check_password
 from rest_framework.authtoken.models import Token
 from .models import User
 from .serializers import UserSerializer
+from lms_backend.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, StreamingListMixin
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, StreamingListMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 